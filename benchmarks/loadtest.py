@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+End-to-end load harness for the orchestration layer, with stub tool binaries.
+
+Every binary used by an infra/web TOOLS entry (nmap, nxc, ffuf, ...) is
+replaced on PATH by benchmarks/stubtool.py, which emulates the tool's
+runtime, output volume and exit codes from a JSON spec (see --spec and
+DEFAULT_SPEC below). No network or real targets are needed. Scenarios:
+
+    fanout    N background tool runs through the modules' run_tool across
+              many targets (rate governor, resource profiles, parsers, job logs)
+    control   long jobs killed while running (kill latency, leftovers)
+    playbook  a generated playbook of stub steps, answered automatically
+
+Reported: throughput, submit rate, spawn and first-line latency, output
+capture latency (line printed by the stub -> job listener), per-job overhead
+over the stub's runtime, RSS growth and peak thread count.
+
+    python benchmarks/loadtest.py --jobs 200 --targets 50
+    python benchmarks/loadtest.py --scenario control --jobs 100
+    python benchmarks/loadtest.py --spec my_tools.json --json report.json --no-limits
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STUB = os.path.join(ROOT, "benchmarks", "stubtool.py")
+LONG_STUB = "redsploit-stub-long"
+DEFAULT_SPEC = {
+    "default": {"runtime": 2.0, "jitter": 0.2, "lines": 100, "line_bytes": 100, "exit_codes": {"0": 0.95, "1": 0.05}},
+    "nmap": {"runtime": 3.0, "lines": 60, "sample": [
+        "Discovered open port {port}/tcp on {target}", "Nmap scan report for {target}",
+        "{port}/tcp open  http    Apache httpd 2.4.41"]},
+    "nxc": {"runtime": 1.5, "lines": 20, "sample": [
+        "SMB         {target}   445    DC01   [*] Windows Server 2019 (name:DC01) (domain:corp.local)",
+        "SMB         {target}   445    DC01   [-] corp.local\\user{i}:Passw0rd STATUS_LOGON_FAILURE"]},
+    "ffuf": {"runtime": 4.0, "lines": 400, "sample": ["admin{i}                  [Status: 200, Size: 1234, Words: 10]"]},
+    "feroxbuster": {"runtime": 4.0, "lines": 400, "sample": ["200      GET       10l       20w      300c http://{target}/p{i}"]},
+    # Used by the control scenario: runs until killed
+    LONG_STUB: {"runtime": 3600, "jitter": 0, "lines": 3600},
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc, else peak RSS from getrusage)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def install_stubs(bin_dir: str, modules) -> Dict[str, str]:
+    """Wrapper per tool binary on bin_dir; returns {tool name: binary}."""
+    binaries = {name: tool["cmd"].split()[0] for module in modules for name, tool in module.TOOLS.items()}
+    for binary in set(binaries.values()) | {LONG_STUB}:
+        path = os.path.join(bin_dir, binary)
+        with open(path, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{STUB}" "{binary}" "$@"\n')
+        os.chmod(path, 0o755)
+    return binaries
+
+
+class Monitor:
+    """Samples RSS and thread count in the background, and collects job listener timings."""
+
+    def __init__(self, session) -> None:
+        self.session = session
+        self.capture: List[float] = []
+        self.first_line: Dict[int, float] = {}
+        self.peak_rss = rss_mb()
+        self.peak_threads = threading.active_count()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def listener(self, job, line: Optional[str]) -> None:
+        if line is None:
+            return
+        now = time.time()
+        self.first_line.setdefault(job.id, now)
+        _, _, stamp = line.rpartition("#ts=")
+        try:
+            self.capture.append(now - float(stamp))
+        except ValueError:
+            pass
+
+    def _sample(self) -> None:
+        while not self._done.wait(0.2):
+            self.peak_rss = max(self.peak_rss, rss_mb())
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+
+    def __enter__(self) -> "Monitor":
+        self.session.jobs.add_listener(self.listener)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._done.set()
+        self._thread.join()
+        self.session.jobs.remove_listener(self.listener)
+
+
+def wait_all(session, jobs, timeout: float) -> None:
+    deadline = time.time() + timeout
+    for job in jobs:
+        session.jobs.wait(job.id, max(deadline - time.time(), 0))
+
+
+def job_report(jobs, monitor: Monitor, runtimes: Dict[str, float]) -> Dict:
+    spawn = [j.started - j.created for j in jobs if j.started]
+    first = [monitor.first_line[j.id] - j.created for j in jobs if j.id in monitor.first_line]
+    overhead = [j.elapsed - runtimes.get(j.tool, 0.0) for j in jobs if j.started]
+    statuses: Dict[str, int] = {}
+    for job in jobs:
+        statuses[job.status] = statuses.get(job.status, 0) + 1
+    return {
+        "statuses": statuses,
+        "spawn_p50": percentile(spawn, 0.5), "spawn_p95": percentile(spawn, 0.95),
+        "first_line_p50": percentile(first, 0.5), "first_line_p95": percentile(first, 0.95),
+        "capture_p50": percentile(monitor.capture, 0.5), "capture_p95": percentile(monitor.capture, 0.95),
+        "capture_max": max(monitor.capture, default=0.0), "lines": len(monitor.capture),
+        "overhead_median": statistics.median(overhead) if overhead else 0.0,
+        "peak_threads": monitor.peak_threads,
+    }
+
+
+# Scenarios
+
+def scenario_fanout(session, modules, binaries, spec, count: int, targets: int, tools: List[str],
+                    timeout: float) -> Dict:
+    infra, web = modules
+    before = set(session.jobs.jobs)
+    rss_before = rss_mb()
+    with Monitor(session) as monitor:
+        start = time.time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(count):
+                tool = tools[i % len(tools)]
+                host = i % targets + 1
+                session.env["target"] = f"10.{host // 65536 % 256}.{host // 256 % 256}.{host % 256}"
+                if tool in infra.TOOLS:
+                    infra.run_tool(tool, use_auth=True, background=True)
+                else:
+                    web.run_tool(tool, background=True)
+        submitted = time.time() - start
+        jobs = [session.jobs.jobs[k] for k in sorted(set(session.jobs.jobs) - before)]
+        wait_all(session, jobs, timeout)
+        wall = time.time() - start
+    runtimes = {t: tool_spec(spec, binaries[t])["runtime"] for t in tools}
+    report = {"jobs": len(jobs), "wall": wall, "throughput": len(jobs) / wall if wall else 0.0,
+              "submit_rate": len(jobs) / submitted if submitted else 0.0,
+              "rss_growth_mb": monitor.peak_rss - rss_before}
+    report.update(job_report(jobs, monitor, runtimes))
+    return report
+
+
+def scenario_control(session, count: int, timeout: float) -> Dict:
+    """Start count long-running stub jobs, kill them all once running, time the kills."""
+    rss_before = rss_mb()
+    with Monitor(session) as monitor:
+        jobs = [session.jobs.submit(f"{LONG_STUB} 10.9.{i // 256}.{i % 256}", tool=LONG_STUB,
+                                    target=f"10.9.{i // 256}.{i % 256}") for i in range(count)]
+        deadline = time.time() + timeout
+        while time.time() < deadline and any(j.process is None and not j.done.is_set() for j in jobs):
+            time.sleep(0.05)
+        killed_at = {}
+        for job in jobs:
+            killed_at[job.id] = time.time()
+            session.jobs.kill(job.id)
+        wait_all(session, jobs, timeout)
+    latency = [j.ended - killed_at[j.id] for j in jobs if j.ended]
+    report = {"jobs": count, "kill_p50": percentile(latency, 0.5), "kill_p95": percentile(latency, 0.95),
+              "kill_max": max(latency, default=0.0), "survivors": sum(1 for j in jobs if not j.done.is_set()),
+              "rss_growth_mb": monitor.peak_rss - rss_before}
+    # Killed before producing output: only the spawn side of the job report applies
+    full = job_report(jobs, monitor, {})
+    report.update({k: full[k] for k in ("statuses", "spawn_p50", "spawn_p95", "peak_threads")})
+    return report
+
+
+def scenario_playbook(session, spec, steps: int, home: str) -> Dict:
+    import yaml
+    directory = os.path.join(home, "playbooks")
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "load.yaml"), "w") as f:
+        yaml.safe_dump({"name": "load", "description": "stub steps",
+                        "steps": [{"name": f"step {i}", "cmd": f"nxc smb {{target}} --step {i}"} for i in range(steps)]}, f)
+    session.playbook.playbooks_dir = directory
+    session.env["target"] = "10.8.0.1"
+    # Answer "execute" to every step; the steps inherit fd 1, so silence it at the fd level
+    stdin, saved = sys.stdin, os.dup(1)
+    sys.stdin = io.StringIO("e\n" * steps)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    start = time.time()
+    try:
+        os.dup2(devnull, 1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            session.playbook.run_playbook("load")
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+        sys.stdin = stdin
+    wall = time.time() - start
+    runtime = tool_spec(spec, "nxc")["runtime"]
+    return {"steps": steps, "wall": wall, "step_overhead": wall / steps - runtime}
+
+
+def tool_spec(spec: Dict, binary: str) -> Dict:
+    merged = dict(DEFAULT_SPEC["default"])
+    merged.update(spec.get("default", {}))
+    merged.update(spec.get(binary, {}))
+    return merged
+
+
+def print_report(name: str, report: Dict) -> None:
+    print(f"\n== {name}")
+    for key, value in report.items():
+        if isinstance(value, float):
+            unit = "" if key in ("throughput", "submit_rate", "rss_growth_mb") else "s"
+            value = f"{value:.4f}{unit}" if unit else f"{value:.2f}"
+        print(f"  {key:<18} {value}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="redsploit orchestration load harness (stub tools)")
+    parser.add_argument("--scenario", action="append", choices=["fanout", "control", "playbook"],
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--jobs", type=int, default=200, help="Jobs for fanout/control (default 200)")
+    parser.add_argument("--targets", type=int, default=50, help="Distinct targets for fanout (default 50)")
+    parser.add_argument("--tools", default="nmap,netexec,dir_ffuf,dir_ferox",
+                        help="Comma separated TOOLS entries used by fanout")
+    parser.add_argument("--steps", type=int, default=10, help="Playbook steps (default 10)")
+    parser.add_argument("--spec", help="JSON stub spec merged over the built-in one")
+    parser.add_argument("--no-limits", action="store_true", help="Disable the rate governor")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-scenario timeout in seconds")
+    parser.add_argument("--json", metavar="FILE", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    spec = json.loads(json.dumps(DEFAULT_SPEC))
+    if args.spec:
+        with open(args.spec) as f:
+            for binary, values in json.load(f).items():
+                spec.setdefault(binary, {}).update(values)
+
+    home = tempfile.mkdtemp(prefix="redsploit-load-")
+    bin_dir = os.path.join(home, "bin")
+    os.makedirs(bin_dir)
+    spec_path = os.path.join(home, "spec.json")
+    with open(spec_path, "w") as f:
+        json.dump(spec, f)
+    os.environ.update(HOME=home, PATH=bin_dir + os.pathsep + os.environ.get("PATH", ""),
+                      REDSPLOIT_STUB_SPEC=spec_path)
+
+    from redsploit.core.session import Session
+    from redsploit.core.ratelimit import RateGovernor
+    from redsploit.modules.infra import InfraModule
+    from redsploit.modules.web import WebModule
+
+    reports = {}
+    session = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            session = Session()
+            session.set("user", "admin:Passw0rd")
+        if args.no_limits:
+            session.governor = RateGovernor({})
+        modules = (InfraModule(session), WebModule(session))
+        binaries = install_stubs(bin_dir, modules)
+        tools = [t.strip() for t in args.tools.split(",") if t.strip()]
+        unknown = [t for t in tools if t not in binaries]
+        if unknown:
+            print(f"Unknown tools: {', '.join(unknown)}", file=sys.stderr)
+            return 2
+
+        scenarios = args.scenario or ["fanout", "control", "playbook"]
+        if "fanout" in scenarios:
+            reports["fanout"] = scenario_fanout(session, modules, binaries, spec, args.jobs, args.targets, tools,
+                                                args.timeout)
+            print_report("fanout", reports["fanout"])
+        if "control" in scenarios:
+            reports["control"] = scenario_control(session, args.jobs, args.timeout)
+            print_report("control", reports["control"])
+        if "playbook" in scenarios:
+            reports["playbook"] = scenario_playbook(session, spec, args.steps, home)
+            print_report("playbook", reports["playbook"])
+    finally:
+        if session:
+            # Write buffered stats now: the atexit flush would run after the temporary HOME is gone
+            session.telemetry.flush()
+        shutil.rmtree(home, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for startup, command construction, completion and loot at scale.
+
+Every case is timed `repeat` times (each sample averages `number` calls) and
+reported as median/min per call. Results can be saved as a JSON baseline and
+later runs compared against it: a case regresses when its median is slower
+than the baseline median by more than its threshold (default 25%, 50% for
+the noisier process start-up cases). The exit code is 1 on any regression.
+
+Everything runs against a temporary HOME, so real workspaces are untouched.
+
+    python benchmarks/microbench.py                        # run, compare with benchmarks/baseline.json if present
+    python benchmarks/microbench.py --save                 # run and (re)write the baseline
+    python benchmarks/microbench.py -k loot --scale 10000  # only matching cases, smaller loot
+    python benchmarks/microbench.py --json results.json    # also dump this run (e.g. for CI artifacts)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+STARTUP_THRESHOLD = 0.5
+
+STARTUP_MODES = {
+    "help": ["-h"],
+    "infra": ["-i", "-h"],
+    "web": ["-w", "-h"],
+    "file": ["-f", "-h"],
+    "command": ["-C", "loot show"],
+}
+COMPLETION_LINES = {
+    "main": ["", "lo", "loot ", "loot search ty", "set ", "set tar", "use ", "crack -m ", "workspace "],
+    "infra": ["", "nm", "nmap ", "nmap -", "spray "],
+    "web": ["", "dir", "gobuster_dir -", "wordlist "],
+}
+
+
+class Case:
+    """One benchmark: func is called `number` times per sample, `repeat` samples."""
+
+    def __init__(self, name: str, func: Callable[[], object], number: int = 1, repeat: int = 5,
+                 threshold: float = DEFAULT_THRESHOLD) -> None:
+        self.name = name
+        self.func = func
+        self.number = number
+        self.repeat = repeat
+        self.threshold = threshold
+
+    def run(self) -> Dict:
+        samples = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                for _ in range(self.number):
+                    self.func()
+                samples.append((time.perf_counter() - start) / self.number)
+        return {"median": statistics.median(samples), "min": min(samples), "runs": self.repeat * self.number,
+                "threshold": self.threshold}
+
+
+# Case families
+
+def startup_cases(home: str) -> List[Case]:
+    env = dict(os.environ, HOME=home)
+    red = os.path.join(ROOT, "red.py")
+
+    def start(args: List[str]) -> Callable[[], object]:
+        return lambda: subprocess.run([sys.executable, red] + args, env=env, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL, check=False)
+
+    return [Case(f"startup.{mode}", start(args), repeat=5, threshold=STARTUP_THRESHOLD)
+            for mode, args in STARTUP_MODES.items()]
+
+
+def bench_session():
+    from redsploit.core.session import Session
+    session = Session()
+    for key, value in (("target", "10.0.0.5"), ("domain", "corp.local"), ("user", "admin:Passw0rd!"),
+                       ("hash", "aad3b435b51404eeaad3b435b51404ee:31d6cfe0d16ae931b73c59d7e0c089c0")):
+        session.env[key] = value
+    session.env["username"], session.env["password"] = "admin", "Passw0rd!"
+    return session
+
+
+def session_cases() -> List[Case]:
+    from redsploit.core.session import Session
+    return [Case("session.init", Session, number=5)]
+
+
+def build_cases(session) -> List[Case]:
+    from redsploit.modules.infra import InfraModule
+    from redsploit.modules.web import WebModule
+    cases = []
+    infra, web = InfraModule(session), WebModule(session)
+    for tool in sorted(infra.TOOLS):
+        # With -auth, so tools that require credentials build their full command
+        cases.append(Case(f"build.infra.{tool}", lambda t=tool: infra.run_tool(t, preview=True, use_auth=True),
+                          number=200))
+    for tool in sorted(web.TOOLS):
+        cases.append(Case(f"build.web.{tool}", lambda t=tool: web.run_tool(t, preview=True), number=200))
+    return cases
+
+
+def completion_cases(session) -> List[Case]:
+    from prompt_toolkit.completion import CompleteEvent
+    from prompt_toolkit.document import Document
+    from redsploit.core.completer import CmdCompleter
+    from redsploit.core.shell import RedShell
+    from redsploit.modules.infra import InfraShell
+    from redsploit.modules.web import WebShell
+
+    event = CompleteEvent(completion_requested=True)
+    cases = []
+    for label, shell_class in (("main", RedShell), ("infra", InfraShell), ("web", WebShell)):
+        completer = CmdCompleter(shell_class(session))
+        for line in COMPLETION_LINES[label]:
+            document = Document(line, len(line))
+            name = f"complete.{label}.{line.strip().replace(' ', '_') or '<empty>'}{'_' if line.endswith(' ') else ''}"
+            cases.append(Case(name, lambda c=completer, d=document: list(c.get_completions(d, event)), number=200))
+    return cases
+
+
+def loot_items(count: int) -> List[Tuple[str, str, str, str]]:
+    kinds = ("cred", "hash", "user")
+    return [(kinds[i % 3], f"user{i}:Secret{i}" if i % 3 != 1 else f"user{i}:{i:032x}", "smb",
+             f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}") for i in range(count)]
+
+
+def loot_cases(home: str, count: int) -> List[Case]:
+    from redsploit.core.loot import LootManager
+    directory = os.path.join(home, f"loot-{count}")
+    os.makedirs(directory, exist_ok=True)
+    loot = LootManager(directory, "bench")
+    with contextlib.redirect_stdout(io.StringIO()):
+        loot.add_many(loot_items(count))
+    ids = loot.ids()
+    rng = random.Random(count)
+    added: List[int] = []
+
+    def add():
+        entry = loot.add(f"bench{len(added)}:x", "cred", "bench", "10.255.255.255")
+        added.append(entry["id"])
+
+    def remove():
+        # Removes what add() created, so the locker size stays at count
+        loot.remove(added.pop() if added else ids.pop())
+
+    fewer = 3 if count >= 100_000 else 10
+    return [
+        Case(f"loot.load.{count}", lambda: LootManager(directory, "bench").loot_data, repeat=3),
+        Case(f"loot.add.{count}", add, number=fewer, repeat=3),
+        Case(f"loot.remove.{count}", remove, number=fewer, repeat=3),
+        Case(f"loot.list.{count}", loot.list_loot, number=20),
+        Case(f"loot.lookup.{count}", lambda: loot.get(rng.choice(ids)), number=1000),
+        Case(f"loot.search.{count}", lambda: loot.search(equals={"type": ["hash"]}, regex={"content": "user1"}),
+             number=20),
+    ]
+
+
+# Reporting
+
+def load_baseline(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def compare(results: Dict[str, Dict], baseline: Dict, threshold: Optional[float]) -> int:
+    """Print the results table against the baseline; returns the number of regressions."""
+    previous = baseline.get("results", {})
+    regressions = 0
+    print(f"\n{'Case':<44} {'Median':>10} {'Min':>10} {'Baseline':>10} {'Change':>8}  Status")
+    print("-" * 96)
+    for name, result in results.items():
+        base = previous.get(name)
+        limit = threshold if threshold is not None else (base or result).get("threshold", DEFAULT_THRESHOLD)
+        if not base:
+            change, status, base_text = "", "new", "-"
+        else:
+            ratio = result["median"] / base["median"] if base["median"] else 1.0
+            change = f"{(ratio - 1) * 100:+.0f}%"
+            base_text = fmt(base["median"])
+            if ratio > 1 + limit:
+                status = f"REGRESSION (>{limit * 100:.0f}%)"
+                regressions += 1
+            elif ratio < 1 - limit:
+                status = "faster"
+            else:
+                status = "ok"
+        print(f"{name[:44]:<44} {fmt(result['median']):>10} {fmt(result['min']):>10} {base_text:>10} {change:>8}  {status}")
+    return regressions
+
+
+def fmt(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.1f}us"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="redsploit microbenchmarks")
+    parser.add_argument("-k", metavar="TEXT", action="append", default=[],
+                        help="Only run cases whose name contains TEXT (repeatable)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Write this run's results into the baseline")
+    parser.add_argument("--threshold", type=float, help="Override every case's regression threshold (0.25 = 25%%)")
+    parser.add_argument("--scale", default="10000,100000", help="Loot sizes, comma separated")
+    parser.add_argument("--json", metavar="FILE", help="Also write this run's results to FILE")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="redsploit-bench-")
+    os.environ["HOME"] = home
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            session = bench_session()
+        families = [
+            lambda: startup_cases(home),
+            session_cases,
+            lambda: build_cases(session),
+            lambda: completion_cases(session),
+        ] + [lambda n=int(n): loot_cases(home, n) for n in args.scale.split(",") if n.strip()]
+
+        results: Dict[str, Dict] = {}
+        for family in families:
+            # Case setup (e.g. filling the loot locker) is not timed
+            with contextlib.redirect_stdout(io.StringIO()):
+                cases = family()
+            for case in cases:
+                if args.k and not any(k in case.name for k in args.k):
+                    continue
+                print(f"  {case.name}", end="\r", flush=True, file=sys.stderr)
+                results[case.name] = case.run()
+            print(" " * 60, end="\r", file=sys.stderr)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.threshold)
+    meta = {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.node(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+    if args.save:
+        # Cases not run this time (-k) keep their previous baseline
+        merged = dict(baseline.get("results", {}), **results)
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": meta, "results": merged}, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline} ({len(results)} cases updated)")
+        return 0
+    if baseline and baseline.get("meta", {}).get("machine") != meta["machine"]:
+        print(f"\nNote: baseline was recorded on {baseline.get('meta', {}).get('machine')}, not this machine.")
+    print(f"\n{len(results)} cases, {regressions} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Stress test for concurrent workspace storage.
+
+Spawns many writer processes against one temporary workspace. Each adds loot,
+removes some of its own entries, records services in the inventory and saves
+the workspace file. Afterwards the files must be valid JSON with no lost or
+duplicate entries and no reused IDs.
+
+    python benchmarks/stress_storage.py [--writers 48] [--entries 25]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redsploit.core.inventory import Inventory
+from redsploit.core.loot import LootManager
+from redsploit.core.storage import locked, write_json
+
+WORKSPACE = "stress"
+
+
+def writer(workspace_dir: str, worker: int, entries: int, start) -> None:
+    import io
+    from contextlib import redirect_stdout
+
+    start.wait()
+    with redirect_stdout(io.StringIO()):
+        loot = LootManager(workspace_dir, WORKSPACE)
+        inventory = Inventory(workspace_dir, WORKSPACE)
+        for i in range(entries):
+            entry = loot.add(f"user{worker}_{i}:pass", "cred", "smb", f"10.0.{worker}.{i}")
+            # Every fifth entry is removed again by its writer
+            if i % 5 == 4:
+                loot.remove(entry["id"])
+            inventory.add_service(f"10.0.{worker}.1", 1000 + i, name=f"svc{i}")
+            path = os.path.join(workspace_dir, f"{WORKSPACE}.json")
+            with locked(path):
+                write_json(path, {"workspace": WORKSPACE, "target": f"10.0.{worker}.{i}"})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=48)
+    parser.add_argument("--entries", type=int, default=25)
+    args = parser.parse_args()
+
+    workspace_dir = tempfile.mkdtemp(prefix="redsploit-stress-")
+    start = multiprocessing.Event()
+    procs = [multiprocessing.Process(target=writer, args=(workspace_dir, w, args.entries, start))
+             for w in range(args.writers)]
+    for p in procs:
+        p.start()
+    began = time.perf_counter()
+    start.set()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - began
+
+    errors = []
+    if any(p.exitcode != 0 for p in procs):
+        errors.append(f"{sum(p.exitcode != 0 for p in procs)} writer(s) crashed")
+
+    with open(os.path.join(workspace_dir, f"{WORKSPACE}_loot.json")) as f:
+        loot = json.load(f)
+    ids = [e["id"] for e in loot["loot"]]
+    removed_per_writer = args.entries // 5
+    expected = args.writers * (args.entries - removed_per_writer)
+    if len(ids) != expected:
+        errors.append(f"loot: expected {expected} entries, found {len(ids)}")
+    if len(set(ids)) != len(ids):
+        errors.append("loot: duplicate IDs")
+    if loot["next_id"] != args.writers * args.entries + 1:
+        errors.append(f"loot: next_id is {loot['next_id']}, expected {args.writers * args.entries + 1}")
+    contents = {e["content"] for e in loot["loot"]}
+    for w in range(args.writers):
+        for i in range(args.entries):
+            present = f"user{w}_{i}:pass" in contents
+            if present == (i % 5 == 4):
+                errors.append(f"loot: user{w}_{i} {'not removed' if present else 'lost'}")
+
+    with open(os.path.join(workspace_dir, f"{WORKSPACE}_inventory.json")) as f:
+        hosts = json.load(f)["hosts"]
+    services = sum(len(h["services"]) for h in hosts.values())
+    if len(hosts) != args.writers or services != args.writers * args.entries:
+        errors.append(f"inventory: {len(hosts)} hosts / {services} services, "
+                      f"expected {args.writers} / {args.writers * args.entries}")
+
+    with open(os.path.join(workspace_dir, f"{WORKSPACE}.json")) as f:
+        json.load(f)
+
+    leftovers = [f for f in os.listdir(workspace_dir) if f.endswith(".tmp")]
+    if leftovers:
+        errors.append(f"{len(leftovers)} temp file(s) left behind")
+
+    ops = args.writers * args.entries
+    print(f"{args.writers} writers x {args.entries} entries: {ops} adds in {elapsed:.2f}s "
+          f"({ops / elapsed:.0f} adds/s), workspace {workspace_dir}")
+    for error in errors[:20]:
+        print(f"FAIL {error}")
+    print("FAILED" if errors else "OK")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
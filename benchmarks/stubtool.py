@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Stub tool binary for benchmarks/loadtest.py.
+
+loadtest.py puts one wrapper per tool binary (nmap, nxc, ffuf, ...) on PATH,
+each running `stubtool.py <binary> <args>`. The stub emulates the tool from
+the JSON spec in $REDSPLOIT_STUB_SPEC (the "default" entry merged with the
+entry for the binary): it runs for `runtime` seconds (+/- `jitter`), spreads
+`lines` output lines of about `line_bytes` bytes evenly over that time, and
+exits with a code drawn from `exit_codes` ({"0": 0.95, "1": 0.05}). Lines
+come from the spec's `sample` templates, so the tool parsers see realistic
+output, and end in "#ts=<epoch>" for capture latency measurements.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+DEFAULT_SPEC = {"runtime": 2.0, "jitter": 0.2, "lines": 100, "line_bytes": 100, "exit_codes": {"0": 1.0}}
+
+
+def load_spec(binary: str) -> dict:
+    specs = {}
+    path = os.environ.get("REDSPLOIT_STUB_SPEC")
+    if path:
+        with open(path) as f:
+            specs = json.load(f)
+    spec = dict(DEFAULT_SPEC)
+    spec.update(specs.get("default", {}))
+    spec.update(specs.get(binary, {}))
+    return spec
+
+
+def exit_code(weights: dict) -> int:
+    codes = list(weights)
+    return int(random.choices(codes, weights=[float(weights[c]) for c in codes])[0])
+
+
+def main() -> int:
+    binary, args = sys.argv[1], sys.argv[2:]
+    spec = load_spec(binary)
+    start = time.time()
+    jitter = float(spec["jitter"])
+    runtime = max(float(spec["runtime"]) * random.uniform(1 - jitter, 1 + jitter), 0.0)
+    lines = int(spec["lines"])
+    samples = spec.get("sample") or [binary + " {args} result {i}"]
+    target = next((a for a in reversed(args) if not a.startswith("-")), "")
+
+    for i in range(lines):
+        delay = start + runtime * (i + 1) / (lines + 1) - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        text = samples[i % len(samples)].format(i=i, port=1 + i % 65535, target=target, args=" ".join(args)[:40])
+        stamp = f" #ts={time.time():.6f}"
+        sys.stdout.write(text[:max(int(spec["line_bytes"]) - len(stamp), 0)].ljust(
+            int(spec["line_bytes"]) - len(stamp)) + stamp + "\n")
+        sys.stdout.flush()
+
+    delay = start + runtime - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    return exit_code(spec["exit_codes"])
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (BrokenPipeError, KeyboardInterrupt):
+        sys.exit(1)
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import os
 import sys
 from pathlib import Path
 
@@ -9,12 +10,32 @@ if str(project_dir) not in sys.path:
     sys.path.insert(0, str(project_dir))
 
 import argparse
-from redsploit.core.session import Session
-from redsploit.core.shell import RedShell
-from redsploit.core.colors import Colors, log_error
-# Imports moved to inner scopes for lazy loading
+# Imports moved to inner scopes for lazy loading (and so daemon clients stay thin)
+
+def main(argv=None, session=None):
+    """
+    Run one red invocation. argv defaults to sys.argv[1:]; the daemon passes
+    a forwarded argv together with its long-lived session.
+    Returns the process exit code.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+        if "--profile" in argv:
+            # Profile the whole invocation (imports, Session, command) locally, never via the daemon
+            from redsploit.core.profiler import profile_call
+            argv = [a for a in argv if a != "--profile"]
+            return profile_call(main, argv, session, name="red " + " ".join(argv) if argv else "red")
+        # Hand the call to a running daemon instead of cold-starting a Session
+        from redsploit.core.daemon import should_forward, forward
+        if should_forward(argv):
+            code = forward(argv)
+            if code is not None:
+                return code
+
+    from redsploit.core.session import Session
+    from redsploit.core.shell import RedShell
+    from redsploit.core.colors import Colors, log_error
 
-def main():
     parser = argparse.ArgumentParser(description="Red Team Pentest Helper", add_help=False)
     parser.add_argument("-h", action="store_true", help="Show help message and exit")
     
@@ -28,25 +49,64 @@ def main():
     parser.add_argument("-i", action="store_true", help="Infra module")
     parser.add_argument("-w", action="store_true", help="Web module")
     parser.add_argument("-f", action="store_true", help="File module")
+    parser.add_argument("-r", metavar="FILE", help="Run commands from a resource script ('-' for stdin)")
+    parser.add_argument("-x", action="store_true", help="Stop the resource script at the first failed command")
+    parser.add_argument("-C", metavar="CMD", help="Run a single shell command (e.g. \"loot show\", \"jobs\")")
+    parser.add_argument("--daemon", choices=["start", "stop", "status", "run"],
+                        help="Manage the background daemon that serves red calls over a Unix socket")
+    parser.add_argument("--api", nargs="?", const="", metavar="SOCKET",
+                        help="Serve the JSON-RPC automation API (default ~/.redsploit/api.sock)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile this invocation (cProfile + sampled stacks saved in the workspace)")
     
     # Parse only known args to find out mode
-    args, unknown = parser.parse_known_args()
+    args, unknown = parser.parse_known_args(argv)
+
+    if args.daemon:
+        from redsploit.core import daemon
+        if args.daemon == "start":
+            return 0 if daemon.start(str(Path(__file__).resolve())) else 1
+        if args.daemon == "stop":
+            return 0 if daemon.stop() else 1
+        if args.daemon == "status":
+            return 0 if daemon.status() else 1
+        try:
+            session = Session()
+            # The daemon outlives terminals: it is the natural home of the scan queue
+            session.scheduler.attach()
+            daemon.RedDaemon(session, main).serve()
+        except (RuntimeError, OSError) as e:
+            log_error(f"Daemon failed: {e}")
+            return 1
+        return 0
+
+    if args.api is not None:
+        import asyncio
+        from redsploit.core.api import ApiServer, API_SOCKET
+        try:
+            asyncio.run(ApiServer(os.path.expanduser(args.api or API_SOCKET)).serve())
+        except KeyboardInterrupt:
+            pass
+        except (RuntimeError, OSError) as e:
+            log_error(f"API server failed: {e}")
+            return 1
+        return 0
 
     # Handle Help Manually
     if args.h:
         # Check for context
         if args.i or "-i" in unknown:
             from redsploit.modules.infra import InfraModule
-            InfraModule(Session()).run(['-h'])
-            sys.exit(0)
+            InfraModule(session or Session()).run(['-h'])
+            return 0
         elif args.w or "-w" in unknown:
             from redsploit.modules.web import WebModule
-            WebModule(Session()).run(['-h'])
-            sys.exit(0)
+            WebModule(session or Session()).run(['-h'])
+            return 0
         elif args.f or "-f" in unknown:
             from redsploit.modules.file import FileModule
-            FileModule(Session()).run(['-h'])
-            sys.exit(0)
+            FileModule(session or Session()).run(['-h'])
+            return 0
         elif "-set" in unknown:
             print("usage: red.py -set <key> <value>")
             print("")
@@ -58,16 +118,16 @@ def main():
             print("")
             print("Valid Variables:")
             print("========================================")
-            session = Session()
+            session = session or Session()
             for key in sorted(session.env.keys()):
                 meta = session.VAR_METADATA.get(key, {})
                 print(f"  {key:<11} {meta.get('desc', '')}")
-            sys.exit(0)
+            return 0
         else:
             parser.print_help()
-            sys.exit(0)
+            return 0
 
-    session = Session()
+    session = session or Session()
 
     # Handle Short Flags (convert to lowercase)
     if args.T:
@@ -114,6 +174,21 @@ def main():
             except ValueError:
                 pass # Ignore if split fails somehow
 
+    # Resource script mode: same command dispatch, no prompt or banner
+    if args.r:
+        from redsploit.core.script import ScriptRunner
+        status = ScriptRunner(session, stop_on_error=args.x).run_file(args.r)
+        wait_background(session)
+        return status
+
+    # Single shell command (works the same against the daemon's live session)
+    if args.C:
+        from redsploit.core.script import ScriptRunner
+        runner = ScriptRunner(session)
+        runner.run_line(args.C, "main")
+        wait_background(session)
+        return 1 if runner.failed else 0
+
     # Detect and warn on conflicting module flags
     module_flags_set = sum([args.i, args.w, args.f])
     if module_flags_set > 1:
@@ -159,7 +234,7 @@ def main():
     # Launch interactive console if:
     # - No arguments OR -set flag OR --interactive flag
     should_start_shell = (
-        len(sys.argv) == 1 or
+        len(argv) == 0 or
         set_command_used
     )
         
@@ -178,6 +253,9 @@ def main():
 Type 'help' or '?' to list commands.
 """)
             
+            # Pick up scans a previous (killed) session left in the queue
+            session.scheduler.attach()
+
             # Main Loop
             session.next_shell = "main"
             
@@ -211,6 +289,8 @@ Type 'help' or '?' to list commands.
             print("\nExiting...")
     else:
         # CLI Mode
+        from redsploit.core.runner import RunLocally
+        session.last_returncode = 0
         try:
             if args.i:
                 from redsploit.modules.infra import InfraModule
@@ -221,9 +301,29 @@ Type 'help' or '?' to list commands.
             elif args.f:
                 from redsploit.modules.file import FileModule
                 FileModule(session).run(unknown)
+        except RunLocally:
+            raise  # the daemon hands interactive tools back to the client
         except Exception as e:
             log_error(f"Module execution failed: {e}")
-            sys.exit(1)
+            return 1
+        wait_background(session)
+        if session.last_returncode:
+            return session.last_returncode
+    return 0
+
+
+def wait_background(session):
+    """Without a daemon nothing outlives this process, so see worker runs and background jobs through."""
+    if session.capture_output:
+        return
+    from redsploit.core.colors import log_warn
+    if session.workers.busy:
+        log_warn("No daemon running, waiting for the workers to finish.")
+        session.workers.wait()
+    for job in session.jobs.running():
+        log_warn(f"No daemon running, waiting for job #{job.id} (start one with 'red --daemon start').")
+        session.jobs.wait(job.id)
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
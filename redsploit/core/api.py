@@ -0,0 +1,503 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import re
+import socket
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from .loot import parse_query
+
+API_SOCKET = os.path.expanduser("~/.redsploit/api.sock")
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+APP_ERROR = -32000
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+LOG_PREFIX_RE = re.compile(r"^\[[*+!-]\] ", re.MULTILINE)
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, code: int = APP_ERROR) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+@contextlib.contextmanager
+def captured() -> Iterator[io.StringIO]:
+    """Collect what the wrapped call prints (log_* messages) instead of writing to the server log."""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        yield buffer
+
+
+def plain(text: str) -> str:
+    return LOG_PREFIX_RE.sub("", ANSI_RE.sub("", text)).strip()
+
+
+def _param(params: Dict, name: str, kind: type = str, default: Any = ...) -> Any:
+    if name not in params:
+        if default is ...:
+            raise ApiError(f"Missing parameter '{name}'", INVALID_PARAMS)
+        return default
+    value = params[name]
+    if kind is int and isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ApiError(f"Parameter '{name}' must be {kind.__name__}", INVALID_PARAMS)
+    return value
+
+
+class Connection:
+    """One API client: its writer and the jobs it subscribed to."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.subscriptions: Set[Tuple[str, Optional[int]]] = set()
+        self.closed = False
+
+    def wants(self, workspace: str, job_id: int) -> bool:
+        return (workspace, job_id) in self.subscriptions or (workspace, None) in self.subscriptions
+
+    def send(self, message: Dict) -> None:
+        if self.closed:
+            return
+        try:
+            self.writer.write((json.dumps(message) + "\n").encode())
+        except (ConnectionError, RuntimeError):
+            self.closed = True
+
+
+class ApiServer:
+    """
+    JSON-RPC 2.0 over a Unix socket (one JSON object per line).
+
+    Every method takes an optional `workspace` parameter; each workspace gets
+    its own Session, so one process can drive many engagements at once.
+    Clients that call job.subscribe receive `job.output` and `job.exit`
+    notifications as tool output is produced.
+    """
+
+    def __init__(self, path: str = API_SOCKET, session_factory: Optional[Callable] = None) -> None:
+        from .session import Session
+        self.path = path
+        self.session_factory = session_factory or Session
+        self.sessions: Dict[str, Any] = {}
+        self.modules: Dict[Tuple[str, str], Any] = {}
+        self.connections: Set[Connection] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.methods: Dict[str, Callable] = {
+            "rpc.methods": self.rpc_methods,
+            "workspace.open": self.workspace_open,
+            "workspace.close": self.workspace_close,
+            "workspace.list": self.workspace_list,
+            "session.get": self.session_get,
+            "session.set": self.session_set,
+            "tool.list": self.tool_list,
+            "tool.preview": self.tool_preview,
+            "tool.run": self.tool_run,
+            "job.list": self.job_list,
+            "job.get": self.job_get,
+            "job.output": self.job_output,
+            "job.kill": self.job_kill,
+            "job.wait": self.job_wait,
+            "job.subscribe": self.job_subscribe,
+            "job.unsubscribe": self.job_unsubscribe,
+            "loot.list": self.loot_list,
+            "loot.get": self.loot_get,
+            "loot.add": self.loot_add,
+            "loot.remove": self.loot_remove,
+            "loot.clear": self.loot_clear,
+            "inventory.hosts": self.inventory_hosts,
+            "inventory.services": self.inventory_services,
+            "inventory.add_host": self.inventory_add_host,
+            "inventory.add_service": self.inventory_add_service,
+            "playbook.list": self.playbook_list,
+        }
+
+    # Server
+
+    async def serve(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+                raise RuntimeError(f"An API server is already listening on {self.path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.path)
+            finally:
+                probe.close()
+        old_umask = os.umask(0o177)  # socket is 0600: it exposes credentials
+        try:
+            server = await asyncio.start_unix_server(self._client, path=self.path, limit=2 ** 20)
+        finally:
+            os.umask(old_umask)
+        print(f"API listening on {self.path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn = Connection(writer)
+        self.connections.add(conn)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self.handle(line, conn)
+                if response is not None:
+                    conn.send(response)
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            conn.closed = True
+            self.connections.discard(conn)
+            writer.close()
+
+    async def handle(self, line: bytes, conn: Connection) -> Optional[Dict]:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": "Parse error"}}
+
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": "Invalid request"}}
+
+        req_id = request.get("id")
+        params = request.get("params") or {}
+        method = self.methods.get(request["method"])
+        try:
+            if not method:
+                raise ApiError(f"Method not found: {request['method']}", METHOD_NOT_FOUND)
+            if not isinstance(params, dict):
+                raise ApiError("params must be an object", INVALID_PARAMS)
+            result = method(params, conn)
+            if asyncio.iscoroutine(result):
+                result = await result
+            response = {"jsonrpc": "2.0", "id": req_id, "result": result}
+        except ApiError as e:
+            response = {"jsonrpc": "2.0", "id": req_id, "error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            response = {"jsonrpc": "2.0", "id": req_id, "error": {"code": INTERNAL_ERROR, "message": str(e)}}
+        # Requests without an id are notifications: no response
+        return response if "id" in request else None
+
+    # Workspaces
+
+    def session_for(self, params: Dict, create: bool = True):
+        name = _param(params, "workspace", str, "default") or "default"
+        with self._lock:
+            session = self.sessions.get(name)
+            if session is None:
+                if not create:
+                    raise ApiError(f"Workspace '{name}' is not open")
+                with captured():
+                    session = self.session_factory()
+                    if os.path.exists(os.path.join(session.workspace_dir, f"{name}.json")):
+                        session.load_workspace(name)
+                    session.set("workspace", name)
+                session.jobs.add_listener(lambda job, line, ws=name: self._job_event(ws, job, line))
+                self.sessions[name] = session
+        return session
+
+    def _job_event(self, workspace: str, job, line: Optional[str]) -> None:
+        """Called from job threads: forward output to subscribed clients on the event loop."""
+        if not self.loop or not any(c.wants(workspace, job.id) for c in list(self.connections)):
+            return
+        if line is None:
+            message = {"jsonrpc": "2.0", "method": "job.exit", "params": dict(job.to_dict(), workspace=workspace)}
+        else:
+            message = {"jsonrpc": "2.0", "method": "job.output",
+                       "params": {"workspace": workspace, "job": job.id, "line": line}}
+        self.loop.call_soon_threadsafe(self._broadcast, workspace, job.id, message)
+
+    def _broadcast(self, workspace: str, job_id: int, message: Dict) -> None:
+        for conn in list(self.connections):
+            if conn.wants(workspace, job_id):
+                conn.send(message)
+
+    def rpc_methods(self, params, conn) -> List[str]:
+        return sorted(self.methods)
+
+    def workspace_open(self, params, conn) -> Dict:
+        session = self.session_for(params)
+        return {"workspace": session.get("workspace"), "env": dict(session.env)}
+
+    def workspace_close(self, params, conn) -> bool:
+        name = _param(params, "workspace", str)
+        session = self.sessions.get(name)
+        if not session:
+            return False
+        if session.jobs.running():
+            raise ApiError(f"Workspace '{name}' has running jobs")
+        with captured():
+            session.save_workspace(name)
+        del self.sessions[name]
+        # Cached modules hold the closed Session; a reopened workspace must build fresh ones
+        for key in [k for k in self.modules if k[0] == name]:
+            del self.modules[key]
+        return True
+
+    def workspace_list(self, params, conn) -> List[Dict]:
+        return [{"workspace": name, "target": s.get("target"), "jobs": len(s.jobs.running()),
+                 "loot": len(s.loot.loot_data)} for name, s in sorted(self.sessions.items())]
+
+    # Session variables
+
+    def session_get(self, params, conn):
+        session = self.session_for(params)
+        if "key" in params:
+            key = _param(params, "key", str).lower()
+            if key not in session.env:
+                raise ApiError(f"Invalid variable: {key}", INVALID_PARAMS)
+            return session.get(key)
+        return dict(session.env)
+
+    def session_set(self, params, conn) -> Dict:
+        session = self.session_for(params)
+        values = params.get("vars")
+        if values is None:
+            values = {_param(params, "key", str): _param(params, "value", str)}
+        if not isinstance(values, dict):
+            raise ApiError("vars must be an object", INVALID_PARAMS)
+        invalid = [k for k in values if k.lower() not in session.env or k.lower() == "workspace"]
+        if invalid:
+            raise ApiError(f"Invalid variable(s): {', '.join(invalid)}", INVALID_PARAMS)
+        with captured():
+            for key, value in values.items():
+                session.set(key, str(value))
+        return dict(session.env)
+
+    # Tools
+
+    def _module(self, params):
+        session = self.session_for(params)
+        module_name = _param(params, "module", str, "infra")
+        key = (session.get("workspace"), module_name)
+        if key not in self.modules:
+            if module_name == "infra":
+                from ..modules.infra import InfraModule
+                self.modules[key] = InfraModule(session)
+            elif module_name == "web":
+                from ..modules.web import WebModule
+                self.modules[key] = WebModule(session)
+            else:
+                raise ApiError(f"Unknown module '{module_name}' (expected infra or web)", INVALID_PARAMS)
+        return session, module_name, self.modules[key]
+
+    def _build(self, params) -> Tuple[Any, str, str, Dict]:
+        session, module_name, module = self._module(params)
+        tool_name = _param(params, "tool", str)
+        tool = module.TOOLS.get(tool_name)
+        if not tool:
+            raise ApiError(f"Unknown {module_name} tool '{tool_name}'", INVALID_PARAMS)
+        with captured() as log:
+            if module_name == "infra":
+                cmd = module.build_command(tool_name, use_auth=bool(params.get("auth", False)))
+            else:
+                cmd = module.build_command(tool_name)
+        if not cmd:
+            raise ApiError(plain(log.getvalue()) or f"Could not build command for {tool_name}")
+        return session, tool_name, cmd, tool
+
+    def tool_list(self, params, conn) -> List[Dict]:
+        _, module_name, module = self._module(params)
+        return [{"tool": name, "module": module_name, "category": data.get("category", ""),
+                 "cmd": data.get("cmd", ""), "requires": data.get("requires", []),
+                 "interactive": data.get("interactive", False)}
+                for name, data in sorted(module.TOOLS.items())]
+
+    def tool_preview(self, params, conn) -> str:
+        return self._build(params)[2]
+
+    async def tool_run(self, params, conn) -> Dict:
+        session, tool_name, cmd, tool = self._build(params)
+        if tool.get("interactive"):
+            raise ApiError(f"{tool_name} is interactive and cannot be run through the API")
+        domain, _, _ = session.resolve_target()
+        job = session.jobs.submit(cmd, tool=tool_name, target=domain or session.get("target"))
+        if params.get("subscribe"):
+            conn.subscriptions.add((session.get("workspace"), job.id))
+        if params.get("wait"):
+            timeout = params.get("timeout")
+            await asyncio.get_running_loop().run_in_executor(None, job.done.wait, timeout)
+        return job.to_dict()
+
+    # Jobs
+
+    def _job(self, params):
+        session = self.session_for(params)
+        job = session.jobs.get(_param(params, "id", int))
+        if not job:
+            raise ApiError(f"Job #{params['id']} not found")
+        return session, job
+
+    def job_list(self, params, conn) -> List[Dict]:
+        return [job.to_dict() for job in self.session_for(params).jobs.list()]
+
+    def job_get(self, params, conn) -> Dict:
+        return self._job(params)[1].to_dict()
+
+    def job_output(self, params, conn) -> List[str]:
+        session, job = self._job(params)
+        return session.jobs.tail(job.id, _param(params, "lines", int, 100))
+
+    def job_kill(self, params, conn) -> bool:
+        session, job = self._job(params)
+        return session.jobs.kill(job.id)
+
+    async def job_wait(self, params, conn) -> Dict:
+        _, job = self._job(params)
+        await asyncio.get_running_loop().run_in_executor(None, job.done.wait, params.get("timeout"))
+        return job.to_dict()
+
+    def job_subscribe(self, params, conn) -> bool:
+        session = self.session_for(params)
+        job_id = params.get("id")
+        if job_id is not None:
+            job_id = self._job(params)[1].id
+        conn.subscriptions.add((session.get("workspace"), job_id))
+        return True
+
+    def job_unsubscribe(self, params, conn) -> bool:
+        session = self.session_for(params)
+        key = (session.get("workspace"), params.get("id"))
+        if key not in conn.subscriptions:
+            return False
+        conn.subscriptions.discard(key)
+        return True
+
+    # Loot
+
+    def loot_list(self, params, conn) -> List[Dict]:
+        loot = self.session_for(params).loot
+        terms = [f"{k}={v}" for k, v in params.items() if k in ("type", "target", "service", "since", "until", "sort")]
+        terms += [f"{k}~{v}" for k, v in (params.get("regex") or {}).items()]
+        try:
+            query = parse_query(terms)
+        except ValueError as e:
+            raise ApiError(str(e), INVALID_PARAMS)
+        entries = loot.search(**query)
+        offset = _param(params, "offset", int, 0)
+        limit = _param(params, "limit", int, 0)
+        return entries[offset:offset + limit] if limit else entries[offset:]
+
+    def loot_get(self, params, conn) -> Dict:
+        loot = self.session_for(params).loot
+        loot_id = _param(params, "id", int)
+        entry = loot.get(loot_id)
+        if not entry:
+            raise ApiError(f"Loot #{loot_id} not found")
+        return entry
+
+    def loot_add(self, params, conn) -> Dict:
+        session = self.session_for(params)
+        with captured() as log:
+            entry = session.loot.add(_param(params, "content", str), _param(params, "type", str, "cred"),
+                                     _param(params, "service", str, ""),
+                                     _param(params, "target", str, session.get("target")))
+        if entry is None:
+            raise ApiError(plain(log.getvalue()))
+        return entry
+
+    def loot_remove(self, params, conn) -> bool:
+        session = self.session_for(params)
+        with captured():
+            return session.loot.remove(_param(params, "id", int))
+
+    def loot_clear(self, params, conn) -> bool:
+        with captured():
+            self.session_for(params).loot.clear()
+        return True
+
+    # Inventory
+
+    def inventory_hosts(self, params, conn) -> List[Dict]:
+        return self.session_for(params).inventory.hosts()
+
+    def inventory_services(self, params, conn) -> List[Dict]:
+        return self.session_for(params).inventory.services(
+            host=_param(params, "host", str, ""), port=_param(params, "port", int, None),
+            name=_param(params, "name", str, ""))
+
+    def inventory_add_host(self, params, conn) -> Dict:
+        return self.session_for(params).inventory.add_host(
+            _param(params, "host", str), _param(params, "hostname", str, ""), _param(params, "os", str, ""))
+
+    def inventory_add_service(self, params, conn) -> Dict:
+        return self.session_for(params).inventory.add_service(
+            _param(params, "host", str), _param(params, "port", int), _param(params, "proto", str, "tcp"),
+            _param(params, "name", str, ""), _param(params, "product", str, ""),
+            _param(params, "version", str, ""))
+
+    # Playbooks
+
+    def playbook_list(self, params, conn) -> List[Dict]:
+        return self.session_for(params).playbook.available()
+
+
+class ApiClient:
+    """
+    Minimal blocking client for scripts and orchestration code.
+
+        client = ApiClient()
+        client.call("session.set", workspace="acme", key="target", value="10.0.0.5")
+        job = client.call("tool.run", workspace="acme", module="infra", tool="nmap", subscribe=True)
+        for note in client.notifications():
+            ...
+    """
+
+    def __init__(self, path: str = API_SOCKET) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rwb")
+        self._next_id = 1
+        self.pending: List[Dict] = []  # notifications received while waiting for a response
+
+    def call(self, method: str, **params) -> Any:
+        req_id = self._next_id
+        self._next_id += 1
+        self.file.write((json.dumps({"jsonrpc": "2.0", "id": req_id, "method": method,
+                                     "params": params}) + "\n").encode())
+        self.file.flush()
+        while True:
+            message = self._read()
+            if message.get("id") == req_id and ("result" in message or "error" in message):
+                if "error" in message:
+                    raise ApiError(message["error"]["message"], message["error"]["code"])
+                return message["result"]
+            self.pending.append(message)
+
+    def _read(self) -> Dict:
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("API server closed the connection")
+        return json.loads(line)
+
+    def notifications(self) -> Iterator[Dict]:
+        """Yield job.output / job.exit notifications as they arrive."""
+        while True:
+            while self.pending:
+                yield self.pending.pop(0)
+            yield self._read()
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
@@ -1,71 +1,15 @@
 import cmd
 import os
+import shlex
 import subprocess
+import sys
+import time
 # import readline # Removed in favor of prompt_toolkit
-from prompt_toolkit import PromptSession
-from prompt_toolkit.completion import Completer, Completion
-from prompt_toolkit.shortcuts import CompleteStyle
-from prompt_toolkit.history import FileHistory
-from prompt_toolkit.formatted_text import ANSI
-from .colors import Colors, log_warn, log_error, log_success
+# prompt_toolkit is imported in cmdloop so script/CLI modes never load it
+from .colors import Colors, log_info, log_warn, log_error, log_success
 from .session import Session
-
-class CmdCompleter(Completer):
-    def __init__(self, shell):
-        self.shell = shell
-
-    def get_completions(self, document, complete_event):
-        text = document.text_before_cursor
-        line = text
-        
-        # Get the full command line part
-        # We need to parse it similar to how cmd does
-        parts = line.split()
-        
-        if not parts:
-            # Completing the first word (command)
-            candidates = self.shell.completenames(text)
-            for c in candidates:
-                yield Completion(c, start_position=-len(text))
-            return
-            
-        cmd_name = parts[0]
-        
-        # If we are effectively completing the command name (e.g. "inf" -> "infra")
-        # and cursor is at end of first word
-        if len(parts) == 1 and not line.endswith(' '):
-             candidates = self.shell.completenames(cmd_name)
-             for c in candidates:
-                yield Completion(c, start_position=-len(cmd_name))
-             return
-
-        # Argument completion
-        # Check if complete_<cmd> exists
-        comp_func_name = 'complete_' + cmd_name
-        if hasattr(self.shell, comp_func_name):
-            comp_func = getattr(self.shell, comp_func_name)
-        else:
-            comp_func = self.shell.completedefault
-            
-        # Prepare arguments for complete_func(text, line, begidx, endidx)
-        # prompt_toolkit provides the full line.
-        # We need to figure out 'text' (the word being completed).
-        
-        # Simple tokenization for 'text'
-        if line.endswith(' '):
-            text_arg = ''
-            begidx = len(line)
-        else:
-            text_arg = parts[-1]
-            begidx = len(line) - len(text_arg)
-            
-        endidx = len(line)
-        
-        candidates = comp_func(text_arg, line, begidx, endidx)
-        
-        if candidates:
-            for c in candidates:
-                yield Completion(c, start_position=-len(text_arg))
+from .scheduler import DEFAULT_PRIORITY
+from .spray import is_nt_hash
 
 class BaseShell(cmd.Cmd):
     def __init__(self, session=None, module_name=None):
@@ -100,12 +44,15 @@ class BaseShell(cmd.Cmd):
             stop = None
             
             # Setup prompt_toolkit session
+            from prompt_toolkit import PromptSession
+            from prompt_toolkit.shortcuts import CompleteStyle
+            from prompt_toolkit.formatted_text import ANSI
+            from .completer import CmdCompleter
             completer = CmdCompleter(self)
             
-            # History Persistence
+            # History Persistence (per workspace, indexed)
             try:
-                history_path = os.path.expanduser("~/.redsploit_history")
-                history = FileHistory(history_path)
+                history = self.get_history()
             except Exception:
                 history = None
 
@@ -152,6 +99,28 @@ class BaseShell(cmd.Cmd):
                 except ImportError:
                     pass
 
+    def get_history(self):
+        """Return the session's workspace history backend, creating it on first use."""
+        if self.session.history is None:
+            from .history import WorkspaceHistory
+            history_config = self.session.config.get("history", {}) or {}
+            self.session.history = WorkspaceHistory(
+                self.session,
+                max_entries=history_config.get("max_entries", 10000),
+                preload=history_config.get("preload", 1000),
+            )
+        return self.session.history
+
+    def onecmd(self, line):
+        """Dispatch a command line, timing it for the stats command."""
+        start = time.monotonic()
+        command, _, line = self.parseline(line)
+        parse = time.monotonic() - start
+        if not command or command == "EOF" or not hasattr(self, "do_" + command):
+            return super().onecmd(line)
+        with self.session.telemetry.command(command, parse):
+            return super().onecmd(line)
+
     def update_prompt(self):
         target = self.session.get("target")
         module_str = f" ({Colors.FAIL}{self.module_name}{Colors.ENDC})" if self.module_name else ""
@@ -162,12 +131,13 @@ class BaseShell(cmd.Cmd):
             self.prompt = f"{Colors.FAIL}{Colors.BOLD}redsploit{Colors.ENDC}{module_str} > "
 
     def parse_common_options(self, arg):
-        """Parse -c (copy), -e (edit), -p (preview), and -auth flags from argument string."""
+        """Parse -c (copy), -e (edit), -p (preview), -auth and -b (background) flags from argument string."""
         args = arg.split()
         copy_only = False
         edit = False
         preview = False
         use_auth = False
+        background = False
         
         if "-c" in args:
             copy_only = True
@@ -185,7 +155,31 @@ class BaseShell(cmd.Cmd):
             use_auth = True
             args.remove("-auth")
             
-        return " ".join(args), copy_only, edit, preview, use_auth
+        if "-b" in args:
+            background = True
+            args.remove("-b")
+            
+        return " ".join(args), copy_only, edit, preview, use_auth, background
+
+    def parse_queue_option(self, arg):
+        """Strip -q [priority] (add to the scan queue, see 'queue') and return (arg, priority or None)."""
+        args = arg.split()
+        if "-q" not in args:
+            return arg, None
+        i = args.index("-q")
+        priority = None
+        if i + 1 < len(args) and args[i + 1].isdigit():
+            priority = int(args.pop(i + 1))
+        args.pop(i)
+        return " ".join(args), DEFAULT_PRIORITY if priority is None else priority
+
+    def parse_remote_option(self, arg):
+        """Strip -remote (run on a registered worker, see 'workers') and return (arg, remote)."""
+        args = arg.split()
+        if "-remote" not in args:
+            return arg, False
+        args.remove("-remote")
+        return " ".join(args), True
 
     def do_back(self, arg):
         """Return to the main menu"""
@@ -322,14 +316,21 @@ class BaseShell(cmd.Cmd):
         Manage captured loot (credentials, hashes).
         Usage:
             loot add <content> [service] [type]
-            loot show
+            loot show [page]
+            loot search [field=value[,value]] [field~regex] [regex] [since=] [until=] [sort=[-]field] [page=] [limit=]
             loot use <id>
             loot rm <id>
             loot clear
+            loot import <file|-> [-f auto|secretsdump|pwdump|netexec|potfile] [-T target]
+            loot export <hashcat|john|csv|jsonl> [-m mode] [-o file] [--username] [search terms]
         
         Examples:
             loot add admin:pass123 smb cred
+            loot import dc01.ntds -T 10.0.0.5
+            loot export hashcat -m ntlm -o ntlm.txt target=10.0.0.5
             loot use 1  # Loads admin:pass123 into session user/pass
+            loot search type=hash target=10.0.0.5 since=2d sort=-timestamp
+            loot search service~ntds ^CORP\\adm page=2
         """
         parts = arg.split()
         if not parts:
@@ -340,7 +341,18 @@ class BaseShell(cmd.Cmd):
         cmd = parts[0].lower()
         
         if cmd == "show" or cmd == "list":
-            self.session.loot.list_loot()
+            page = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+            self.session.loot.list_loot(page=page)
+
+        elif cmd == "search" or cmd == "find":
+            from .loot import parse_query, PAGE_SIZE
+            try:
+                query = parse_query(shlex.split(arg)[1:])
+                entries = self.session.loot.search(**query)
+            except ValueError as e:
+                log_error(str(e))
+                return
+            self.session.loot.list_loot(entries, query.get("page", 1), query.get("limit", PAGE_SIZE))
             
         elif cmd == "add":
             if len(parts) < 2:
@@ -361,7 +373,7 @@ class BaseShell(cmd.Cmd):
             try:
                 loot_id = int(parts[1])
                 # Find the entry
-                entry = next((item for item in self.session.loot.loot_data if item["id"] == loot_id), None)
+                entry = self.session.loot.get(loot_id)
                 if not entry:
                     log_error("Invalid Loot ID")
                     return
@@ -371,7 +383,13 @@ class BaseShell(cmd.Cmd):
                 l_type = entry.get("type", "cred")
                 
                 if l_type == "hash" or l_type == "ntlm":
-                    self.session.set("hash", content)
+                    # Parsed hashes are stored as user:nthash
+                    user, _, nt = content.rpartition(":")
+                    if user and is_nt_hash(nt) and not is_nt_hash(user):
+                        self.session.set("user", user.split("\\")[-1])
+                        self.session.set("hash", nt)
+                    else:
+                        self.session.set("hash", content)
                 else:
                     # Default to setting user (which auto-splits username/pass)
                     self.session.set("user", content)
@@ -393,16 +411,174 @@ class BaseShell(cmd.Cmd):
         
         elif cmd == "clear":
             self.session.loot.clear()
+
+        elif cmd == "import":
+            self._loot_import(parts[1:])
+
+        elif cmd == "export":
+            self._loot_export(shlex.split(arg)[1:])
             
         else:
             log_error(f"Unknown loot command: {cmd}")
 
+    def _loot_export(self, args):
+        from .loot import parse_query
+        from .lootio import EXPORT_FORMATS, HASH_MODES, export, mode_counts, resolve_mode
+        usage = "Usage: loot export <hashcat|john|csv|jsonl> [-m mode] [-o file] [--username] [search terms]"
+        if not args or args[0].lower() not in EXPORT_FORMATS:
+            log_error(usage)
+            return
+        fmt, mode, out_path, with_user, terms = args[0].lower(), None, None, False, []
+        i = 1
+        try:
+            while i < len(args):
+                if args[i] in ("-m", "-o") and i + 1 < len(args):
+                    if args[i] == "-m":
+                        mode = resolve_mode(args[i + 1])
+                    else:
+                        out_path = os.path.expanduser(args[i + 1])
+                    i += 2
+                    continue
+                if args[i] in ("-u", "--username"):
+                    with_user = True
+                else:
+                    terms.append(args[i])
+                i += 1
+            query = parse_query(terms)
+        except ValueError as e:
+            log_error(str(e))
+            return
+
+        entries = self.session.loot.search(**query)
+        if fmt == "hashcat" and mode is None:
+            counts = mode_counts(entries)
+            if len(counts) > 1:
+                names = {m: name for name, m in HASH_MODES.items()}
+                found = ", ".join(f"{names[m]} ({m}): {n}" for m, n in sorted(counts.items()))
+                log_error(f"Matching hashes use several hashcat modes, pick one with -m: {found}")
+                return
+            mode = next(iter(counts), None)
+
+        if out_path is None:
+            # Raw lines only, so the output can be piped into a cracker
+            try:
+                export(entries, fmt, sys.stdout, mode, with_user)
+                sys.stdout.flush()
+            except BrokenPipeError:
+                pass
+            return
+        try:
+            with open(out_path, "w") as f:
+                written = export(entries, fmt, f, mode, with_user)
+        except OSError as e:
+            log_error(f"Export failed: {e}")
+            return
+        hint = f" (hashcat -m {mode})" if fmt == "hashcat" and mode else ""
+        log_success(f"Exported {written} entries to {out_path}{hint}")
+
+    def _loot_import(self, args):
+        from .lootio import Importer, IMPORT_FORMATS
+        usage = "Usage: loot import <file|-> [-f auto|secretsdump|pwdump|netexec|potfile] [-T target]"
+        path, fmt, target = None, "auto", ""
+        i = 0
+        while i < len(args):
+            if args[i] in ("-f", "-T") and i + 1 < len(args):
+                if args[i] == "-f":
+                    fmt = args[i + 1].lower()
+                else:
+                    target = args[i + 1]
+                i += 2
+            elif path is None and (args[i] == "-" or not args[i].startswith("-")):
+                path = args[i]
+                i += 1
+            else:
+                log_error(usage)
+                return
+        if path is None:
+            log_error(usage)
+            return
+        if fmt not in IMPORT_FORMATS:
+            log_error(f"Unknown format '{fmt}'. Choose from: {', '.join(IMPORT_FORMATS)}")
+            return
+        if path != "-" and not os.path.isfile(os.path.expanduser(path)):
+            log_error(f"File not found: {path}")
+            return
+
+        importer = Importer(self.session.loot, fmt, target)
+        start = time.time()
+        try:
+            added = importer.run(os.path.expanduser(path) if path != "-" else path)
+        except OSError as e:
+            log_error(f"Import failed: {e}")
+            return
+        duplicates = importer.parsed - len(added)
+        log_success(f"Imported {len(added)} entries from {importer.lines} lines "
+                    f"({importer.fmt}, {duplicates} duplicates skipped, {time.time() - start:.1f}s)")
+
+    def do_inventory(self, arg):
+        """
+        Show hosts and services discovered in the workspace.
+        Usage:
+            inventory [hosts]
+            inventory services [port|name]
+            inventory add <host> [port[/proto]] [service]
+            inventory rm <host>
+            inventory clear
+        """
+        parts = arg.split()
+        cmd = parts[0].lower() if parts else "hosts"
+        inventory = self.session.inventory
+
+        if cmd in ("hosts", "show", "list"):
+            inventory.show()
+        elif cmd == "services":
+            if len(parts) > 1 and parts[1].isdigit():
+                inventory.show(port=int(parts[1]))
+            else:
+                inventory.show(name=parts[1] if len(parts) > 1 else "")
+        elif cmd == "add":
+            if len(parts) < 2:
+                log_error("Usage: inventory add <host> [port[/proto]] [service]")
+                return
+            if len(parts) > 2:
+                port, _, proto = parts[2].partition("/")
+                if not port.isdigit():
+                    log_error(f"Invalid port: {parts[2]}")
+                    return
+                inventory.add_service(parts[1], int(port), proto or "tcp", parts[3] if len(parts) > 3 else "")
+            else:
+                inventory.add_host(parts[1])
+            log_success(f"Added {' '.join(parts[1:3])} to inventory")
+        elif cmd in ("rm", "del"):
+            if len(parts) < 2:
+                log_error("Usage: inventory rm <host>")
+                return
+            if inventory.remove_host(parts[1]):
+                log_success(f"Removed {parts[1]} from inventory")
+            else:
+                log_error(f"Host {parts[1]} not in inventory.")
+        elif cmd == "clear":
+            inventory.clear()
+            log_success("Inventory cleared.")
+        else:
+            log_error(f"Unknown inventory command: {cmd}")
+
+    def complete_inventory(self, text, line, begidx, endidx):
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+            cmds = ["hosts", "services", "add", "rm", "clear"]
+            return [c for c in cmds if c.startswith(text)]
+        if len(parts) >= 2 and parts[1] in ["rm", "del", "add"]:
+            return [h for h in self.session.inventory.hosts_data if h.startswith(text)]
+        return []
+
     def do_playbook(self, arg):
         """
         Run interactive playbooks.
         Usage:
             playbook list
-            playbook run <name>
+            playbook run <name> [--yes]
+        --yes executes every step without prompting (always the case in scripts).
         """
         parts = arg.split()
         if not parts:
@@ -414,11 +590,13 @@ class BaseShell(cmd.Cmd):
         if cmd == "list":
             self.session.playbook.list_playbooks()
         elif cmd == "run":
-            if len(parts) < 2:
-                log_error("Usage: playbook run <name>")
+            assume_yes = "--yes" in parts
+            args = [p for p in parts[1:] if p != "--yes"]
+            if not args:
+                log_error("Usage: playbook run <name> [--yes]")
                 return
-            name = parts[1]
-            self.session.playbook.run_playbook(name)
+            name = args[0]
+            self.session.playbook.run_playbook(name, assume_yes=assume_yes)
         else:
             log_error(f"Unknown playbook command: {cmd}")
 
@@ -433,15 +611,685 @@ class BaseShell(cmd.Cmd):
              # Autocomplete playbook names
              pb_dir = self.session.playbook.playbooks_dir
              if os.path.exists(pb_dir):
-                 files = [f for f in os.listdir(pb_dir) if f.endswith('.yaml')]
+                 files = [f for f in os.listdir(pb_dir) if f.endswith('.yaml')] + ["--yes"]
                  return [f for f in files if f.startswith(text)]
         return []
 
+    def do_history(self, arg):
+        """
+        Search the command history of the current workspace.
+        Usage:
+            history [-n N]
+            history search <text> [-t tool] [-T target] [-n N]
+            history compact
+            history clear
+
+        Examples:
+            history search 10.10.10.5
+            history search -t nmap
+            history search smb -T 10.10.10.5 -n 50
+        """
+        parts = arg.split()
+        cmd = parts[0].lower() if parts else ""
+        history = self.get_history()
+
+        if cmd == "compact":
+            removed = history.compact()
+            log_success(f"History compacted ({removed} entries removed).")
+            return
+        if cmd == "clear":
+            history.clear()
+            log_success("History cleared.")
+            return
+        if cmd == "search":
+            parts = parts[1:]
+
+        text_parts = []
+        tool = target = ""
+        limit = 20
+        i = 0
+        while i < len(parts):
+            if parts[i] in ("-t", "-T", "-n") and i + 1 < len(parts):
+                if parts[i] == "-t":
+                    tool = parts[i + 1]
+                elif parts[i] == "-T":
+                    target = parts[i + 1]
+                else:
+                    try:
+                        limit = int(parts[i + 1])
+                    except ValueError:
+                        log_error("Invalid count for -n")
+                        return
+                i += 2
+            else:
+                text_parts.append(parts[i])
+                i += 1
+
+        if text_parts and cmd != "search":
+            log_error(f"Unknown history command: {cmd}")
+            return
+
+        rows = history.search(" ".join(text_parts), tool=tool, target=target, limit=limit)
+        if not rows:
+            print("No matching history entries.")
+            return
+        print(f"\n{Colors.HEADER}History ({self.session.get('workspace')}){Colors.ENDC}")
+        print(f"{'Time':<20} {'Target':<16} {'Command'}")
+        print("-" * 70)
+        for ts, command, _, row_target in reversed(rows):
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+            print(f"{when:<20} {row_target:<16} {command}")
+        print("")
+
+    def complete_history(self, text, line, begidx, endidx):
+        """Autocomplete for history command"""
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+             cmds = ["search", "compact", "clear"]
+             return [c for c in cmds if c.startswith(text)]
+        return []
+
+    def do_jobs(self, arg):
+        """
+        Manage background jobs (start tools with -b).
+        Usage:
+            jobs
+            jobs output <id> [-n N]
+            jobs follow <id>
+            jobs kill <id>
+            jobs wait <id>
+            jobs clean
+        """
+        parts = arg.split()
+        if not parts or parts[0] in ("list", "show"):
+            self.session.jobs.show()
+            return
+
+        cmd = parts[0].lower()
+        if cmd == "clean":
+            removed = self.session.jobs.clean()
+            log_success(f"Removed {removed} finished job(s).")
+            return
+
+        if len(parts) < 2:
+            log_error(f"Usage: jobs {cmd} <id>")
+            return
+        try:
+            job_id = int(parts[1])
+        except ValueError:
+            log_error("Invalid job ID")
+            return
+        job = self.session.jobs.get(job_id)
+        if not job:
+            log_error(f"Job #{job_id} not found.")
+            return
+
+        if cmd == "output":
+            count = 20
+            if "-n" in parts:
+                try:
+                    count = int(parts[parts.index("-n") + 1])
+                except (IndexError, ValueError):
+                    log_error("Invalid count for -n")
+                    return
+            for line in self.session.jobs.tail(job_id, count):
+                print(line)
+        elif cmd == "follow":
+            self.session.jobs.follow(job_id)
+        elif cmd == "kill":
+            if self.session.jobs.kill(job_id):
+                log_success(f"Killed job #{job_id}")
+            else:
+                log_warn(f"Job #{job_id} is not running.")
+        elif cmd == "wait":
+            try:
+                self.session.jobs.wait(job_id)
+            except KeyboardInterrupt:
+                print("")
+            log_info(f"Job #{job_id} {job.status} (exit {job.returncode})")
+        else:
+            log_error(f"Unknown jobs command: {cmd}")
+
+    def complete_jobs(self, text, line, begidx, endidx):
+        """Autocomplete for jobs command"""
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+             cmds = ["output", "follow", "kill", "wait", "clean"]
+             return [c for c in cmds if c.startswith(text)]
+        if len(parts) >= 2 and parts[1] in ["output", "follow", "kill", "wait"]:
+            ids = [str(j.id) for j in self.session.jobs.list()]
+            return [i for i in ids if i.startswith(text)]
+        return []
+
+    def do_dashboard(self, arg):
+        """
+        Full-screen live view of jobs, the scan queue and per-target progress.
+        Usage: dashboard [-1]
+
+        Shows elapsed time, output rate, CPU and RSS of each job's process
+        group and its last output line. Keys: q quit, up/down select,
+        k kill the selected job, f hide/show finished jobs. -1 (and daemon
+        clients, which have no screen here) print a single snapshot instead.
+        """
+        from .dashboard import Dashboard
+        dashboard = Dashboard(self.session)
+        if arg.strip() == "-1" or self.session.capture_output or not sys.__stdout__.isatty():
+            print(dashboard.snapshot())
+            return
+        dashboard.run()
+
+    def do_rescan(self, arg):
+        """
+        Incremental rescan: probe for changes, fully scan only what changed.
+        Usage:
+            rescan [-top N] [-p ports] [-playbook name] [target|cidr|file ...]
+            rescan last
+
+        Without targets every inventory host is rescanned. A fast probe of
+        the known ports plus the top N (default from config) finds new,
+        closed and changed services; only those get full service detection
+        and the diff is printed and saved. -playbook runs a playbook
+        afterwards, whose foreach steps can use hosts(changed ...) to touch
+        only the changed hosts.
+        """
+        from .rescan import Rescan, last_report, show_report
+        try:
+            options = shlex.split(arg)
+        except ValueError as e:
+            log_error(str(e))
+            return
+        if options and options[0] == "last":
+            report = last_report(self.session)
+            if report:
+                show_report(report)
+            else:
+                log_warn("No rescan yet in this workspace.")
+            return
+
+        usage = "Usage: rescan [-top N] [-p ports] [-playbook name] [target|cidr|file ...]"
+        top, ports, playbook = None, [], ""
+        try:
+            if "-top" in options:
+                i = options.index("-top")
+                top = int(options[i + 1])
+                del options[i:i + 2]
+            if "-p" in options:
+                i = options.index("-p")
+                ports = [int(p) for p in options[i + 1].split(",") if p]
+                del options[i:i + 2]
+            if "-playbook" in options:
+                i = options.index("-playbook")
+                playbook = options[i + 1]
+                del options[i:i + 2]
+        except (IndexError, ValueError):
+            log_error(usage)
+            return
+        if any(o.startswith("-") for o in options):
+            log_error(usage)
+            return
+
+        try:
+            report = Rescan(self.session, options, top, ports).run()
+        except KeyboardInterrupt:
+            log_warn("Rescan interrupted.")
+            return
+        except (OSError, RuntimeError) as e:
+            log_error(f"Rescan failed: {e}")
+            return
+        if not report:
+            return
+        show_report(report)
+        if playbook:
+            if report["changed_hosts"]:
+                self.session.playbook.run_playbook(playbook)
+            else:
+                log_info(f"Nothing changed, not running {playbook}.")
+
+    def complete_rescan(self, text, line, begidx, endidx):
+        """Autocomplete for rescan command"""
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+            return [c for c in ["last", "-top", "-p", "-playbook"] if c.startswith(text)]
+        if parts[-1] == "-playbook" or (len(parts) > 2 and parts[-2] == "-playbook" and not line.endswith(' ')):
+            pb_dir = self.session.playbook.playbooks_dir
+            if os.path.exists(pb_dir):
+                return [f for f in os.listdir(pb_dir) if f.endswith('.yaml') and f.startswith(text)]
+        return [c for c in ["-top", "-p", "-playbook"] if c.startswith(text)]
+
+    def do_queue(self, arg):
+        """
+        Persistent scan queue: priorities, dependencies, caps and preemption.
+        Usage:
+            queue
+            queue add [-P N] [-t target] [-tool name] [-after id,id] [-np] <command>
+            queue rm <id>
+            queue retry <id>
+            queue clean
+            queue start | stop
+            queue run
+
+        Tools can also be queued from a module with -q [N] (e.g. 'nmap -q 1').
+        Priority 0 is the most urgent, 9 the least (default 5). -np marks an
+        entry as not preemptible. 'queue run' works through the queue in the
+        foreground until it is empty (batch mode).
+        """
+        scheduler = self.session.scheduler
+        parts = arg.split()
+        if not parts or parts[0] in ("list", "show"):
+            scheduler.show()
+            return
+
+        cmd = parts[0].lower()
+        if cmd == "add":
+            usage = "Usage: queue add [-P N] [-t target] [-tool name] [-after id,id] [-np] <command>"
+            options = {"priority": DEFAULT_PRIORITY, "target": "", "tool": "", "after": [], "preemptible": True}
+            # Options are split off the front; the command itself is kept verbatim (pipes, quotes)
+            rest = arg.split(None, 1)[1] if len(parts) > 1 else ""
+            try:
+                while rest.split(None, 1) and rest.split(None, 1)[0] in ("-P", "-t", "-tool", "-after", "-np"):
+                    flag, rest = (rest.split(None, 1) + [""])[:2]
+                    if flag == "-np":
+                        options["preemptible"] = False
+                        continue
+                    value, rest = (rest.split(None, 1) + [""])[:2]
+                    if flag == "-P":
+                        options["priority"] = int(value)
+                    elif flag == "-t":
+                        options["target"] = value
+                    elif flag == "-tool":
+                        options["tool"] = value
+                    else:
+                        options["after"] = [int(v) for v in value.split(",") if v]
+            except ValueError:
+                log_error(usage)
+                return
+            command = rest.strip()
+            if not command:
+                log_error(usage)
+                return
+            try:
+                entry = scheduler.add(command, tool=options["tool"], target=options["target"] or self.session.get("target"),
+                                      priority=options["priority"], after=options["after"],
+                                      preemptible=options["preemptible"])
+            except ValueError as e:
+                log_error(str(e))
+                return
+            log_success(f"Queued #{entry['id']} at priority {entry['priority']}: {command}")
+            scheduler.poke()
+        elif cmd in ("rm", "del", "retry"):
+            if len(parts) < 2 or not parts[1].isdigit():
+                log_error(f"Usage: queue {cmd} <id>")
+                return
+            entry_id = int(parts[1])
+            if cmd == "retry":
+                if scheduler.retry(entry_id):
+                    log_success(f"Requeued #{entry_id}")
+                    scheduler.poke()
+                else:
+                    log_warn(f"Queue #{entry_id} has not failed or does not exist.")
+            elif scheduler.remove(entry_id):
+                log_success(f"Removed queue #{entry_id}")
+            else:
+                log_warn(f"Queue #{entry_id} not removed.")
+        elif cmd == "clean":
+            log_success(f"Removed {scheduler.clean()} finished queue entries.")
+        elif cmd == "start":
+            if scheduler.start():
+                log_success("Scheduler started.")
+            else:
+                log_info("Scheduler is already running.")
+        elif cmd == "stop":
+            scheduler.stop()
+            log_success("Scheduler stopped (running entries finish as jobs).")
+        elif cmd == "run":
+            scheduler.drain()
+        else:
+            log_error(f"Unknown queue command: {cmd}")
+
+    def complete_queue(self, text, line, begidx, endidx):
+        """Autocomplete for queue command"""
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+             cmds = ["add", "rm", "retry", "clean", "start", "stop", "run"]
+             return [c for c in cmds if c.startswith(text)]
+        if len(parts) >= 2 and parts[1] in ["rm", "del", "retry"]:
+            ids = [str(e["id"]) for e in self.session.scheduler.entries()]
+            return [i for i in ids if i.startswith(text)]
+        return []
+
+    def do_workers(self, arg):
+        """
+        Distributed runs on registered SSH workers (attack boxes).
+        Usage:
+            workers
+            workers add <name> <user@host|local> [-slots N] [-ssh "options"]
+            workers rm <name>
+            workers check [name]
+            workers run [-tool name] [-t target] <command>
+            workers shard [-n N] [-tool name] <file> <command with {shard}>
+            workers wait
+
+        Tools run on a worker from a module with -remote (e.g. 'nmap -remote').
+        'shard' splits a target list or wordlist into N parts (default: the
+        total free slots), uploads one to each job and replaces {shard} with
+        its path there, e.g.:
+            workers shard -tool nmap scope.txt nmap -sV -Pn -iL {shard}
+            workers shard words.txt ffuf -u http://site/FUZZ -w {shard}
+        """
+        from .workers import WorkSpec
+        pool = self.session.workers
+        parts = arg.split()
+        if not parts or parts[0] in ("list", "show"):
+            pool.show()
+            return
+
+        cmd = parts[0].lower()
+        if cmd == "add":
+            try:
+                options = shlex.split(arg)[1:]
+            except ValueError as e:
+                log_error(str(e))
+                return
+            slots, ssh_options = 2, ""
+            try:
+                if "-slots" in options:
+                    i = options.index("-slots")
+                    slots = int(options[i + 1])
+                    del options[i:i + 2]
+                if "-ssh" in options:
+                    i = options.index("-ssh")
+                    ssh_options = options[i + 1]
+                    del options[i:i + 2]
+            except (IndexError, ValueError):
+                log_error("Usage: workers add <name> <user@host|local> [-slots N] [-ssh \"options\"]")
+                return
+            if len(options) != 2 or slots < 1:
+                log_error("Usage: workers add <name> <user@host|local> [-slots N] [-ssh \"options\"]")
+                return
+            worker = pool.add(options[0], options[1], slots, ssh_options)
+            log_success(f"Worker {worker.name} => {worker.dest} ({worker.slots} slots)")
+        elif cmd == "rm":
+            if len(parts) < 2:
+                log_error("Usage: workers rm <name>")
+            elif pool.remove(parts[1]):
+                log_success(f"Removed worker {parts[1]}")
+            else:
+                log_error(f"Unknown worker: {parts[1]}")
+        elif cmd == "check":
+            names = parts[1:] or sorted(pool.workers)
+            for name in names:
+                worker = pool.workers.get(name)
+                if not worker:
+                    log_error(f"Unknown worker: {name}")
+                    continue
+                rtt = pool.check(worker)
+                if rtt is not None:
+                    log_success(f"{name}: reachable ({rtt * 1000:.0f}ms)")
+        elif cmd in ("run", "shard"):
+            usage = ("Usage: workers run [-tool name] [-t target] <command>" if cmd == "run" else
+                     "Usage: workers shard [-n N] [-tool name] <file> <command with {shard}>")
+            options = {"-tool": "", "-t": self.session.get("target"), "-n": ""}
+            # Options are split off the front; the command itself is kept verbatim (pipes, quotes)
+            rest = arg.split(None, 1)[1] if len(parts) > 1 else ""
+            while rest.split(None, 1) and rest.split(None, 1)[0] in options:
+                flag, rest = (rest.split(None, 1) + [""])[:2]
+                options[flag], rest = (rest.split(None, 1) + [""])[:2]
+            if cmd == "run":
+                if not rest.strip():
+                    log_error(usage)
+                    return
+                pool.submit([WorkSpec(rest.strip(), tool=options["-tool"], target=options["-t"])])
+                return
+            shard_file, _, template = rest.strip().partition(" ")
+            if not shard_file or "{shard}" not in template or (options["-n"] and not options["-n"].isdigit()):
+                log_error(usage)
+                return
+            try:
+                shards = pool.split(shard_file, int(options["-n"] or pool.total_slots()))
+            except OSError as e:
+                log_error(f"Cannot read {shard_file}: {e}")
+                return
+            log_info(f"Split {shard_file} into {len(shards)} shards ({pool.shard_dir()})")
+            pool.submit(pool.shard_specs(template.strip(), shards, tool=options["-tool"], target=options["-t"]))
+        elif cmd == "wait":
+            pool.wait()
+        else:
+            log_error(f"Unknown workers command: {cmd}")
+
+    def complete_workers(self, text, line, begidx, endidx):
+        """Autocomplete for workers command"""
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+             cmds = ["add", "rm", "check", "run", "shard", "wait"]
+             return [c for c in cmds if c.startswith(text)]
+        if len(parts) >= 2 and parts[1] in ["rm", "check"]:
+            return [n for n in sorted(self.session.workers.workers) if n.startswith(text)]
+        return []
+
+    def do_dedup(self, arg):
+        """
+        Sort and deduplicate huge line lists (URLs, subdomains, wordlists) within a memory budget.
+        Usage: dedup <file|glob|->... [-o output] [-m MB] [-i]
+
+        Options:
+            -o FILE   Write to FILE (may be one of the inputs) instead of stdout
+            -m MB     In-memory budget before spilling sorted runs to disk (default 256)
+            -i        Case-insensitive (lines are lowercased)
+        """
+        import glob
+        from .dedup import ExternalDedup, read_inputs
+        try:
+            parts = shlex.split(arg)
+        except ValueError as e:
+            log_error(str(e))
+            return
+        inputs, out_path, memory_mb, ignore_case = [], None, 256, False
+        i = 0
+        while i < len(parts):
+            if parts[i] in ("-o", "-m") and i + 1 < len(parts):
+                if parts[i] == "-o":
+                    out_path = os.path.expanduser(parts[i + 1])
+                elif parts[i + 1].isdigit():
+                    memory_mb = int(parts[i + 1])
+                else:
+                    log_error("-m expects a size in MB")
+                    return
+                i += 2
+                continue
+            if parts[i] == "-i":
+                ignore_case = True
+            elif parts[i] == "-":
+                inputs.append("-")
+            else:
+                matches = sorted(glob.glob(os.path.expanduser(parts[i])))
+                if not matches:
+                    log_error(f"No such file: {parts[i]}")
+                    return
+                inputs.extend(matches)
+            i += 1
+        if not inputs:
+            log_error("Usage: dedup <file|glob|->... [-o output] [-m MB] [-i]")
+            return
+
+        start = time.time()
+        with ExternalDedup(memory_mb, ignore_case=ignore_case) as dedup:
+            try:
+                dedup.extend(read_inputs(inputs))
+                if out_path is None:
+                    dedup.write(sys.stdout)
+                    sys.stdout.flush()
+                    return
+                # Write next to the target and rename, so an input can be deduplicated in place
+                tmp = out_path + ".dedup.tmp"
+                with open(tmp, "w", encoding="utf-8", errors="surrogateescape") as out:
+                    dedup.write(out)
+                os.replace(tmp, out_path)
+            except BrokenPipeError:
+                return
+            except OSError as e:
+                log_error(f"dedup: {e}")
+                return
+            log_success(f"{dedup.read} lines -> {dedup.written} unique in {out_path} "
+                        f"({len(dedup.runs)} spilled runs, {time.time() - start:.1f}s)")
+
+    def do_crack(self, arg):
+        """
+        Crack loot hashes with hashcat/john as background jobs.
+        Usage:
+            crack [-m mode] [-w wordlist] [-r rules] [--john] [-p] [search terms]
+            crack status
+            crack harvest
+            crack clear
+
+        Hashes already in a potfile are stored as credentials without being queued.
+        Wordlists and rules may be aliases from the 'crack' section of config.yaml;
+        with --john, -r is a john rule section name (e.g. Jumbo).
+
+        Examples:
+            crack -m ntlm target=10.0.0.5
+            crack -w rockyou -r best64 type=asrep
+        """
+        from .loot import parse_query
+        from .lootio import resolve_mode
+        crack = self.session.crack
+        try:
+            parts = shlex.split(arg)
+        except ValueError as e:
+            log_error(str(e))
+            return
+        cmd = parts[0].lower() if parts else ""
+        if cmd in ("status", "show"):
+            crack.show()
+            return
+        if cmd == "harvest":
+            log_success(f"{crack.harvest()} new credentials from the potfile")
+            return
+        if cmd == "clear":
+            log_success(f"Removed {crack.clear()} queued crack task(s)")
+            return
+
+        mode, wordlist, rules, engine, preview, terms = None, "", "", "", False, []
+        i = 0
+        try:
+            while i < len(parts):
+                if parts[i] in ("-m", "-w", "-r") and i + 1 < len(parts):
+                    value = parts[i + 1]
+                    if parts[i] == "-m":
+                        mode = resolve_mode(value)
+                    elif parts[i] == "-w":
+                        wordlist = value
+                    else:
+                        rules = value
+                    i += 2
+                    continue
+                if parts[i] == "--john":
+                    engine = "john"
+                elif parts[i] == "-p":
+                    preview = True
+                else:
+                    terms.append(parts[i])
+                i += 1
+            query = parse_query(terms)
+        except ValueError as e:
+            log_error(str(e))
+            return
+        crack.queue(self.session.loot.search(**query), mode, wordlist, rules, engine, preview)
+
+    def complete_crack(self, text, line, begidx, endidx):
+        """Autocomplete for crack command"""
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+            cmds = ["status", "harvest", "clear", "-m", "-w", "-r", "--john", "-p"]
+            return [c for c in cmds if c.startswith(text)]
+        option = parts[-1] if line.endswith(' ') else parts[-2]
+        if option == "-m":
+            from .lootio import HASH_MODES
+            return [m for m in HASH_MODES if m.startswith(text)]
+        if option in ("-w", "-r"):
+            import glob
+            aliases = list(self.session.config.get("crack", {}).get("wordlists" if option == "-w" else "rules", {}))
+            return [a for a in aliases if a.startswith(text)] + glob.glob(os.path.expanduser(text) + "*")
+        return []
+
+    def do_stats(self, arg):
+        """
+        Timing telemetry: where time goes per tool, target and shell command.
+        Usage:
+            stats [tools|targets|commands]  - Show totals (default: tools), slowest first
+            stats export [file]             - Write OpenMetrics text (default: telemetry.textfile)
+            stats reset                     - Clear the stats of the current workspace
+        """
+        telemetry = self.session.telemetry
+        parts = arg.split()
+        action = parts[0] if parts else "tools"
+        if action in ("tools", "targets", "commands"):
+            telemetry.show(action)
+        elif action == "export":
+            path = parts[1] if len(parts) > 1 else telemetry.config.get("textfile", "")
+            if not path:
+                log_error("Usage: stats export <file> (or set telemetry.textfile in config.yaml)")
+                return
+            path = os.path.expanduser(path)
+            if telemetry.export(path):
+                log_success(f"Metrics written to {path}")
+        elif action == "reset":
+            telemetry.reset()
+            log_success("Stats cleared.")
+        else:
+            log_error("Usage: stats [tools|targets|commands|export [file]|reset]")
+
+    def complete_stats(self, text, line, begidx, endidx):
+        """Autocomplete for stats command"""
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+            return [c for c in ["tools", "targets", "commands", "export", "reset"] if c.startswith(text)]
+        return []
+
+    def do_profile(self, arg):
+        """
+        Profile one command (cProfile + sampled stacks) and print the top functions.
+        Usage: profile [-n N] [-s cumulative|tottime|calls] <command>
+
+        The .pstats file (python -m pstats, snakeviz) and a collapsed-stack .folded
+        file (flamegraph.pl, speedscope) are saved in ~/.redsploit/workspaces/<workspace>_profiles.
+        Use `red --profile ...` to include startup (imports, config, Session).
+        """
+        from .profiler import profile_call, TOP_N
+        parts = arg.split()
+        top, sort = TOP_N, "cumulative"
+        while parts and parts[0] in ("-n", "-s") and len(parts) > 1:
+            if parts[0] == "-n":
+                if not parts[1].isdigit():
+                    log_error("-n expects a number")
+                    return
+                top = int(parts[1])
+            elif parts[1] in ("cumulative", "tottime", "calls"):
+                sort = parts[1]
+            else:
+                log_error("-s expects cumulative, tottime or calls")
+                return
+            parts = parts[2:]
+        if not parts:
+            log_error("Usage: profile [-n N] [-s cumulative|tottime|calls] <command>")
+            return
+        line = " ".join(parts)
+        return profile_call(self.onecmd, line, name=line, session=self.session, top=top, sort=sort)
+
+    def complete_profile(self, text, line, begidx, endidx):
+        """Autocomplete the profiled command"""
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+            return [n[3:] for n in self.get_names() if n.startswith("do_" + text)]
+        return []
+
     def do_config(self, arg):
         """
         Show all active tool configurations.
-        Usage: config [list]
+        Usage: config [list|resources]
         """
+        if arg.strip().lower() == "resources":
+            self.session.resources.show()
+            return
         self.session.show_configs()
 
     def complete_loot(self, text, line, begidx, endidx):
@@ -450,15 +1298,39 @@ class BaseShell(cmd.Cmd):
         
         # Subcommand completion
         if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
-             cmds = ["add", "show", "list", "rm", "clear", "use"]
+             cmds = ["add", "show", "list", "search", "rm", "clear", "use", "import", "export"]
              return [c for c in cmds if c.startswith(text)]
         
         # ID completion for 'use', 'rm', 'del'
         if len(parts) >= 2:
             cmd = parts[1]
+            if cmd == "export" and (len(parts) == 2 or (len(parts) == 3 and not line.endswith(' '))):
+                from .lootio import EXPORT_FORMATS
+                return [f for f in EXPORT_FORMATS if f.startswith(text)]
+            if cmd == "export" and (parts[-1] == "-m" or (parts[-2:-1] == ["-m"] and not line.endswith(' '))):
+                from .lootio import HASH_MODES
+                return [m for m in HASH_MODES if m.startswith(text)]
+            if cmd in ("search", "find", "export"):
+                from .loot import INDEXED_FIELDS, SORT_FIELDS
+                if "=" in text:
+                    field, _, value = text.partition("=")
+                    if field in INDEXED_FIELDS:
+                        values = self.session.loot.index.by_field[field]
+                        return [f"{field}={v}" for v in values if v and v.startswith(value)]
+                    if field == "sort":
+                        return [f"sort={p}{f}" for f in SORT_FIELDS for p in ("", "-") if f"{p}{f}".startswith(value)]
+                    return []
+                keys = [f"{f}=" for f in INDEXED_FIELDS] + ["content~", "since=", "until=", "sort=", "page=", "limit="]
+                return [k for k in keys if k.startswith(text)]
+            if cmd == "import":
+                if parts[-1] == "-f" or (parts[-2:-1] == ["-f"] and not line.endswith(' ')):
+                    from .lootio import IMPORT_FORMATS
+                    return [f for f in IMPORT_FORMATS if f.startswith(text)]
+                import glob
+                return [p + "/" if os.path.isdir(p) else p for p in glob.glob(os.path.expanduser(text) + "*")]
             if cmd in ["use", "rm", "del", "load"]:
                 # Suggest IDs
-                ids = [str(x['id']) for x in self.session.loot.loot_data]
+                ids = [str(i) for i in self.session.loot.ids()]
                 return [i for i in ids if i.startswith(text)]
             
         return []
@@ -495,7 +1367,7 @@ class BaseShell(cmd.Cmd):
 
     def do_shell(self, arg):
         """Run a shell command"""
-        subprocess.run(arg, shell=True)
+        self.session.last_returncode = subprocess.run(arg, shell=True).returncode
 
     def do_help(self, arg):
         """List available commands with descriptions."""
@@ -510,6 +1382,9 @@ class BaseShell(cmd.Cmd):
         print(f"{'-p':<10} Preview command without running")
         print(f"{'-e':<10} Edit command before running")
         print(f"{'-auth':<10} Use credentials from session (interactive mode)")
+        print(f"{'-b':<10} Run in the background as a job (see 'jobs')")
+        print(f"{'-q [N]':<10} Add to the scan queue at priority N (0 = most urgent, see 'queue')")
+        print(f"{'-remote':<10} Run on the worker with the most free slots (see 'workers')")
 
 
 
@@ -518,7 +1393,7 @@ class BaseShell(cmd.Cmd):
         # Categorize core commands
         navigation_cmds = ["back", "use", "exit", "help", "clear"]
         config_cmds = ["set", "options"]
-        advanced_cmds = ["workspace", "loot", "playbook"]
+        advanced_cmds = ["workspace", "loot", "inventory", "playbook", "history", "jobs", "dashboard", "rescan", "queue", "workers", "crack", "dedup", "stats", "profile"]
         module_select_cmds = ["infra", "web", "file", "shell"]
         
         module_cmds = []
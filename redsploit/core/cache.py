@@ -0,0 +1,158 @@
+import os
+import pickle
+import string
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .foreach import bound_vars, parse_foreach
+from .storage import file_version, write_bytes
+
+CACHE_DIR = "~/.redsploit/cache"
+# Bump when the shape of cached values changes (e.g. compile_playbook output)
+CACHE_FORMAT = 2
+
+
+class FileCache:
+    """
+    Parsed-file cache in one pickle per namespace (~/.redsploit/cache/<name>.pickle).
+
+    Entries are keyed by absolute path and validated against the file's
+    (inode, mtime_ns, size), so an unchanged file is never parsed again and
+    an edited one is re-parsed on next use. Misses are collected in memory
+    and written back by flush() in a single atomic replace; a missing,
+    stale-format or unreadable cache simply starts empty. Concurrent writers
+    can only lose each other's new entries, never corrupt the file.
+    """
+
+    def __init__(self, name: str, directory: str = CACHE_DIR) -> None:
+        self.path = os.path.join(os.path.expanduser(directory), f"{name}.pickle")
+        self.entries: Dict[str, Tuple[Tuple[int, int, int], Any]] = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("format") == (CACHE_FORMAT, sys.version_info[:2]):
+                self.entries = data["entries"]
+        except Exception:
+            self.entries = {}
+
+    def get(self, path: str, loader: Callable[[str], Any]) -> Any:
+        """Cached loader(path) for the file's current version. Loader errors propagate and are not cached."""
+        path = os.path.abspath(path)
+        version = file_version(path)
+        cached = self.entries.get(path)
+        if version and cached and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        value = loader(path)
+        self.misses += 1
+        if version:
+            self.entries[path] = (version, value)
+            self.dirty = True
+        return value
+
+    def prune(self, directory: str, keep: List[str]) -> None:
+        """Forget entries for files in directory that are not in keep (deleted or renamed)."""
+        directory = os.path.abspath(directory)
+        keep_set = {os.path.abspath(p) for p in keep}
+        for path in [p for p in self.entries if os.path.dirname(p) == directory and p not in keep_set]:
+            del self.entries[path]
+            self.dirty = True
+
+    def flush(self) -> None:
+        if not self.dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            payload = {"format": (CACHE_FORMAT, sys.version_info[:2]), "entries": self.entries}
+            write_bytes(self.path, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), sync=False)
+            self.dirty = False
+        except (OSError, pickle.PicklingError):
+            # A cache that cannot be written only costs the next start a re-parse
+            pass
+
+
+def load_yaml(path: str) -> Any:
+    # Imported on a cache miss only: a warm start never loads PyYAML
+    import yaml
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+
+def cached_yaml(path: str, namespace: str = "yaml") -> Any:
+    """yaml.safe_load(path) through a FileCache namespace."""
+    cache = FileCache(namespace)
+    value = cache.get(path, load_yaml)
+    cache.flush()
+    return value
+
+
+def placeholders(template: str) -> List[str]:
+    """Field names used by a str.format template ("{target} {url}" -> ["target", "url"])."""
+    names = []
+    for _, field, _, _ in string.Formatter().parse(template):
+        if field is not None:
+            name = field.split(".", 1)[0].split("[", 1)[0]
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def compile_playbook(path: str) -> Dict:
+    """
+    Parse a playbook into the structure the manager runs: name, description,
+    steps (as written, plus each cmd's placeholders and parsed foreach
+    sources) and validation errors. Placeholders bound by a step's foreach
+    are not reported at playbook level. Raises on unreadable files or
+    invalid YAML.
+    """
+    data = load_yaml(path) or {}
+    if not isinstance(data, dict):
+        raise ValueError("playbook must be a mapping")
+    steps, errors = [], []
+    for i, step in enumerate(data.get("steps") or []):
+        if not isinstance(step, dict):
+            errors.append(f"step {i + 1}: not a mapping")
+            continue
+        step = dict(step)
+        try:
+            step["placeholders"] = placeholders(str(step.get("cmd", "")))
+        except ValueError as e:
+            errors.append(f"step {i + 1}: bad cmd template ({e})")
+            step["placeholders"] = []
+        step["sources"] = []
+        if step.get("foreach"):
+            try:
+                step["sources"] = parse_foreach(step["foreach"])
+            except ValueError as e:
+                errors.append(f"step {i + 1}: {e}")
+        if not step.get("cmd"):
+            errors.append(f"step {i + 1}: no cmd")
+        steps.append(step)
+    return {
+        "name": data.get("name", os.path.basename(path)),
+        "description": data.get("description", ""),
+        "steps": steps,
+        "placeholders": sorted({p for s in steps for p in s["placeholders"] if p not in bound_vars(s["sources"])}),
+        "errors": errors,
+    }
+
+
+def cached_playbooks(paths: List[str], directory: Optional[str] = None) -> Dict[str, Optional[Dict]]:
+    """
+    compile_playbook for every path through one cache read/write; None for
+    files that fail to parse. If paths is the complete listing of directory,
+    pass it to drop entries of files that no longer exist there.
+    """
+    cache = FileCache("playbooks")
+    compiled: Dict[str, Optional[Dict]] = {}
+    for path in paths:
+        try:
+            compiled[path] = cache.get(path, compile_playbook)
+        except Exception:
+            compiled[path] = None
+    if directory:
+        cache.prune(directory, paths)
+    cache.flush()
+    return compiled
@@ -1,3 +1,6 @@
+import threading
+
+
 class Colors:
     HEADER = '\033[95m'
     OKBLUE = '\033[94m'
@@ -11,4 +14,14 @@ class Colors:
 def log_info(msg): print(f"{Colors.OKCYAN}[*] {msg}{Colors.ENDC}")
 def log_success(msg): print(f"{Colors.OKGREEN}[+] {msg}{Colors.ENDC}")
 def log_warn(msg): print(f"{Colors.WARNING}[!] {msg}{Colors.ENDC}")
-def log_error(msg): print(f"{Colors.FAIL}[-] {msg}{Colors.ENDC}")
+# Errors logged per thread (the script runner's exit status); job, scheduler and worker
+# threads, and other daemon clients, count on their own threads
+_errors = threading.local()
+
+def errors_logged() -> int:
+    """Number of errors logged so far by the calling thread."""
+    return getattr(_errors, "count", 0)
+
+def log_error(msg):
+    _errors.count = errors_logged() + 1
+    print(f"{Colors.FAIL}[-] {msg}{Colors.ENDC}")
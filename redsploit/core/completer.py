@@ -0,0 +1,58 @@
+from prompt_toolkit.completion import Completer, Completion
+
+class CmdCompleter(Completer):
+    def __init__(self, shell):
+        self.shell = shell
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        line = text
+        
+        # Get the full command line part
+        # We need to parse it similar to how cmd does
+        parts = line.split()
+        
+        if not parts:
+            # Completing the first word (command)
+            candidates = self.shell.completenames(text)
+            for c in candidates:
+                yield Completion(c, start_position=-len(text))
+            return
+            
+        cmd_name = parts[0]
+        
+        # If we are effectively completing the command name (e.g. "inf" -> "infra")
+        # and cursor is at end of first word
+        if len(parts) == 1 and not line.endswith(' '):
+             candidates = self.shell.completenames(cmd_name)
+             for c in candidates:
+                yield Completion(c, start_position=-len(cmd_name))
+             return
+
+        # Argument completion
+        # Check if complete_<cmd> exists
+        comp_func_name = 'complete_' + cmd_name
+        if hasattr(self.shell, comp_func_name):
+            comp_func = getattr(self.shell, comp_func_name)
+        else:
+            comp_func = self.shell.completedefault
+            
+        # Prepare arguments for complete_func(text, line, begidx, endidx)
+        # prompt_toolkit provides the full line.
+        # We need to figure out 'text' (the word being completed).
+        
+        # Simple tokenization for 'text'
+        if line.endswith(' '):
+            text_arg = ''
+            begidx = len(line)
+        else:
+            text_arg = parts[-1]
+            begidx = len(line) - len(text_arg)
+            
+        endidx = len(line)
+        
+        candidates = comp_func(text_arg, line, begidx, endidx)
+        
+        if candidates:
+            for c in candidates:
+                yield Completion(c, start_position=-len(text_arg))
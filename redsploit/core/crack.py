@@ -0,0 +1,310 @@
+import os
+import shlex
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from .colors import Colors, log_info, log_success, log_warn, log_error
+from .lootio import HASH_MODES, JOHN_FORMATS, export_lines, hash_mode, split_potfile_line
+
+DEFAULT_POTFILE = "~/.redsploit/crack.potfile"
+# Read-only potfiles checked before queueing, so hashes cracked outside red are skipped too
+KNOWN_POTFILES = ["~/.local/share/hashcat/hashcat.potfile", "~/.hashcat/hashcat.potfile", "~/.john/john.pot"]
+HARVEST_INTERVAL = 5
+# Exit codes that end a crack job normally (hashcat: 1 = keyspace exhausted, nothing left to crack)
+ENGINE_OK_CODES = {"hashcat": (0, 1), "john": (0,)}
+
+
+def pot_key(hash_part: str) -> str:
+    """Normalized potfile key (john writes NT hashes as $NT$<hash>)."""
+    value = hash_part.strip()
+    if value.startswith("$NT$"):
+        value = value[4:]
+    return value.lower()
+
+
+class Potfile:
+    """
+    hash -> plaintext index over a hashcat/john potfile.
+
+    refresh() only reads what was appended since the last call (the offset
+    is kept per file), so watching the potfile of a running job is cheap
+    however large it grows. A truncated or replaced file is re-read.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.expanduser(path)
+        self.cracked: Dict[str, str] = {}
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> List[Tuple[str, str]]:
+        """Read new potfile lines; returns the newly seen (key, plaintext) pairs."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return []
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                self._inode, self._offset = st.st_ino, 0
+            if st.st_size == self._offset:
+                return []
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+            # Leave a partially written last line for the next refresh
+            end = data.rfind(b"\n") + 1
+            self._offset += end
+            found = []
+            for raw in data[:end].decode("utf-8", errors="replace").splitlines():
+                split = split_potfile_line(raw)
+                if not split or not split[0]:
+                    continue
+                key = pot_key(split[0])
+                if key not in self.cracked:
+                    self.cracked[key] = split[1]
+                    found.append((key, split[1]))
+            return found
+
+    def get(self, key: str) -> Optional[str]:
+        return self.cracked.get(key)
+
+
+class CrackTask:
+    """One queued cracking run: a hash file of a single mode plus its attack."""
+
+    def __init__(self, mode: int, hash_file: str, count: int, wordlist: str, rules: str, engine: str) -> None:
+        self.mode = mode
+        self.hash_file = hash_file
+        self.count = count
+        self.wordlist = wordlist
+        self.rules = rules
+        self.engine = engine
+        self.job = None
+
+
+class CrackManager:
+    """
+    Local hashcat/john orchestration for hashes in the loot locker.
+
+    Hashes are grouped per hashcat mode, checked against the potfile index
+    (already cracked ones are written back straight away and never queued),
+    and each group becomes a background job. Jobs run one at a time, since
+    every cracker wants all the CPU. While a job runs the potfile is read
+    incrementally and new plaintexts are stored as `cred` loot pointing at
+    the hash entry they came from.
+    """
+
+    def __init__(self, session) -> None:
+        self.session = session
+        self._queue: Deque[CrackTask] = deque()
+        self._current: Optional[CrackTask] = None
+        self._lock = threading.Lock()
+        self._potfiles: Dict[str, Potfile] = {}
+        # pot key -> [(loot id, user, target)] for every hash handed to a cracker
+        self._targets: Dict[str, List[Tuple[int, str, str]]] = {}
+        self._last_harvest = 0.0
+        self.cracked = 0
+
+    @property
+    def config(self) -> Dict:
+        return self.session.config.get("crack", {}) or {}
+
+    @property
+    def potfile(self) -> Potfile:
+        return self._potfile(self.config.get("potfile", DEFAULT_POTFILE))
+
+    def _potfile(self, path: str) -> Potfile:
+        path = os.path.expanduser(path)
+        if path not in self._potfiles:
+            self._potfiles[path] = Potfile(path)
+        return self._potfiles[path]
+
+    def _known_potfiles(self) -> List[Potfile]:
+        paths = [self.config.get("potfile", DEFAULT_POTFILE)] + self.config.get("potfiles", KNOWN_POTFILES)
+        potfiles = [self._potfile(path) for path in paths]
+        for potfile in potfiles:
+            potfile.refresh()
+        return potfiles
+
+    @staticmethod
+    def lookup(potfiles: List[Potfile], key: str) -> Optional[str]:
+        """Plaintext for a hash from the first potfile that has it."""
+        for potfile in potfiles:
+            plain = potfile.get(key)
+            if plain is not None:
+                return plain
+        return None
+
+    @property
+    def work_dir(self) -> str:
+        path = os.path.join(self.session.workspace_dir, f"{self.session.get('workspace') or 'default'}_crack")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def resolve(self, kind: str, name: str) -> str:
+        """Wordlist/rules path from a config alias or a literal path."""
+        return os.path.expanduser(self.config.get(kind, {}).get(name, name)) if name else ""
+
+    # Queueing
+
+    def queue(self, entries: List[Dict], mode: Optional[int] = None, wordlist: str = "", rules: str = "",
+              engine: str = "", preview: bool = False) -> List[CrackTask]:
+        """Group hash entries per mode, skip cracked ones, and queue a task per mode."""
+        engine = engine or self.config.get("engine", "hashcat")
+        wordlist = self.resolve("wordlists", wordlist or "default")
+        if engine == "john":
+            # john applies a rule section from its config (Jumbo, best64, ...), not a rules file
+            if rules and (os.sep in rules or os.path.isfile(rules)):
+                log_error(f"john takes a rule section name (e.g. -r Jumbo), not a rules file: {rules}")
+                return []
+        else:
+            rules = self.resolve("rules", rules)
+        if not os.path.isfile(wordlist):
+            log_error(f"Wordlist not found: {wordlist}")
+            return []
+
+        potfiles = self._known_potfiles()
+        groups: Dict[int, List[Dict]] = {}
+        known: List[Tuple[Dict, str]] = []
+        for entry in entries:
+            classified = hash_mode(entry)
+            if not classified or (mode is not None and classified[0] != mode):
+                continue
+            plain = self.lookup(potfiles, pot_key(classified[2]))
+            if plain is not None:
+                known.append((entry, plain))
+            else:
+                groups.setdefault(classified[0], []).append(entry)
+
+        if known and not preview:
+            added = self._store(known)
+            log_success(f"{len(known)} hashes already cracked (potfile), {added} new credentials stored")
+        if not groups:
+            log_warn("No uncracked hashes to queue.")
+            return []
+
+        tasks = []
+        for found_mode, group in sorted(groups.items()):
+            name = f"{int(time.time())}-{os.getpid()}-{found_mode}.txt"
+            hash_file = os.path.join(self.work_dir, name)
+            task = CrackTask(found_mode, hash_file, len(group), wordlist, rules, engine)
+            if preview:
+                print(f"  {found_mode:<6} {len(group):>7} hashes  {self.build_command(task)}")
+                continue
+            with open(hash_file, "w") as f:
+                for line in export_lines(group, engine, found_mode):
+                    f.write(line + "\n")
+            with self._lock:
+                for entry in group:
+                    _, user, value = hash_mode(entry)
+                    self._targets.setdefault(pot_key(value), []).append(
+                        (entry.get("id"), user, entry.get("target", "")))
+                self._queue.append(task)
+            tasks.append(task)
+        self._start_next()
+        return tasks
+
+    def build_command(self, task: CrackTask) -> str:
+        potfile = shlex.quote(self.potfile.path)
+        extra = self.config.get("extra", {}).get(task.engine, "")
+        if task.engine == "john":
+            parts = ["john", f"--format={JOHN_FORMATS[task.mode]}", f"--wordlist={shlex.quote(task.wordlist)}",
+                     f"--pot={potfile}"]
+            if task.rules:
+                parts.append(f"--rules={shlex.quote(task.rules)}")
+        else:
+            parts = ["hashcat", "-m", str(task.mode), "-a", "0", "--potfile-path", potfile,
+                     "--status", "--status-timer", str(HARVEST_INTERVAL)]
+            if task.rules:
+                parts += ["-r", shlex.quote(task.rules)]
+        if extra:
+            parts.append(extra)
+        if task.engine == "john":
+            parts.append(shlex.quote(task.hash_file))
+        else:
+            parts += [shlex.quote(task.hash_file), shlex.quote(task.wordlist)]
+        return " ".join(parts)
+
+    def _start_next(self) -> None:
+        with self._lock:
+            if self._current or not self._queue:
+                return
+            task = self._current = self._queue.popleft()
+        os.makedirs(os.path.dirname(self.potfile.path), exist_ok=True)
+        task.job = self.session.jobs.submit(
+            self.build_command(task), tool=task.engine, name=f"crack {task.mode}",
+            on_line=lambda line: self._maybe_harvest(), on_exit=lambda job: self._finished(task),
+            ok_codes=ENGINE_OK_CODES.get(task.engine, (0,)))
+        self.session.jobs.announce(task.job)
+
+    def _finished(self, task: CrackTask) -> None:
+        added = self.harvest()
+        log_info(f"Crack job #{task.job.id} (mode {task.mode}) {task.job.status}: "
+                 f"{added} new credentials")
+        with self._lock:
+            self._current = None
+        self._start_next()
+
+    # Potfile watching
+
+    def _maybe_harvest(self) -> None:
+        if time.time() - self._last_harvest >= HARVEST_INTERVAL:
+            self.harvest()
+
+    def harvest(self) -> int:
+        """Store plaintexts that reached the potfile for hashes we queued. Returns new loot count."""
+        self._last_harvest = time.time()
+        potfile = self.potfile
+        potfile.refresh()
+        items = []
+        with self._lock:
+            for key in [k for k in self._targets if potfile.get(k) is not None]:
+                for loot_id, user, target in self._targets.pop(key):
+                    items.append(self._item({"id": loot_id, "target": target}, potfile.get(key), user, key))
+        if not items:
+            return 0
+        added = self.session.loot.add_many(items)
+        for entry in added:
+            log_success(f"Cracked: {entry['content']}")
+        self.cracked += len(added)
+        return len(added)
+
+    @staticmethod
+    def _item(entry: Dict, plain: str, user: str, key: str) -> Tuple[str, str, str, str]:
+        """Loot tuple for a cracked hash: a cred linked to the hash entry, or a bare hash:plain."""
+        link = f"cracked #{entry.get('id')}"
+        if user:
+            return "cred", f"{user}:{plain}", link, entry.get("target", "")
+        return "cracked", f"{key}:{plain}", link, entry.get("target", "")
+
+    def _store(self, known: List[Tuple[Dict, str]]) -> int:
+        items = []
+        for entry, plain in known:
+            _, user, value = hash_mode(entry)
+            items.append(self._item(entry, plain, user, pot_key(value)))
+        return len(self.session.loot.add_many(items))
+
+    # Status
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._queue)
+            self._queue.clear()
+        return count
+
+    def show(self) -> None:
+        names = {m: name for name, m in HASH_MODES.items()}
+        print(f"\n{Colors.HEADER}Cracking{Colors.ENDC}")
+        print(f"Potfile: {self.potfile.path} ({len(self.potfile.cracked)} cracked)")
+        print(f"Credentials recovered this session: {self.cracked}")
+        current = self._current
+        if current and current.job:
+            job = current.job
+            print(f"Running: job #{job.id} {names.get(current.mode, current.mode)} ({current.count} hashes, "
+                  f"{job.elapsed:.0f}s) {job.last_line[:60]}")
+        for task in list(self._queue):
+            print(f"Queued:  {names.get(task.mode, task.mode)} ({task.count} hashes) "
+                  f"{os.path.basename(task.wordlist)}")
+        print("")
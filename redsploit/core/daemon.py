@@ -0,0 +1,320 @@
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+from .runner import RunLocally, set_cwd
+
+SOCKET_PATH = os.path.expanduser("~/.redsploit/red.sock")
+LOG_PATH = os.path.expanduser("~/.redsploit/daemon.log")
+
+# Invocations that must stay in the calling process (terminal UI, local servers)
+LOCAL_FLAGS = {"-set", "--daemon", "--api", "-f", "-download", "-upload", "-http", "-smb", "-base64"}
+
+
+class ThreadLocalStream:
+    """File-like object that routes I/O to a per-thread stream (the current client)."""
+
+    def __init__(self, default) -> None:
+        self._default = default
+        self._local = threading.local()
+
+    def set(self, stream) -> None:
+        self._local.stream = stream
+
+    def _target(self):
+        return getattr(self._local, "stream", None) or self._default
+
+    def write(self, data):
+        return self._target().write(data)
+
+    def flush(self):
+        return self._target().flush()
+
+    def readline(self, *args):
+        return self._target().readline(*args)
+
+    def __iter__(self):
+        return iter(self._target())
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+class ClientChannel:
+    """Newline-delimited JSON messages to and from one connected client."""
+
+    def __init__(self, rfile, wfile) -> None:
+        self.rfile = rfile
+        self.wfile = wfile
+        self._lock = threading.Lock()
+
+    def send(self, message: dict) -> None:
+        with self._lock:
+            self.wfile.write((json.dumps(message) + "\n").encode())
+            self.wfile.flush()
+
+    def receive(self) -> Optional[dict]:
+        line = self.rfile.readline()
+        return json.loads(line) if line else None
+
+
+class ClientOutput:
+    """stdout/stderr replacement streaming text to the client."""
+
+    def __init__(self, channel: ClientChannel) -> None:
+        self.channel = channel
+
+    def write(self, data: str) -> int:
+        if data:
+            self.channel.send({"out": data})
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+class ClientInput:
+    """stdin replacement that asks the client for each line (input(), scripts from '-')."""
+
+    def __init__(self, channel: ClientChannel) -> None:
+        self.channel = channel
+
+    def readline(self, *args) -> str:
+        self.channel.send({"input": True})
+        reply = self.channel.receive()
+        return (reply or {}).get("data", "")
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def isatty(self) -> bool:
+        return False
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        channel = ClientChannel(self.rfile, self.wfile)
+        try:
+            request = channel.receive()
+        except ValueError:
+            return
+        if not request:
+            return
+
+        server = self.server
+        op = request.get("op", "run")
+        if op == "ping":
+            channel.send({"exit": 0, "pid": os.getpid(), "uptime": time.time() - server.started,
+                          "workspace": server.session.get("workspace"),
+                          "target": server.session.get("target"),
+                          "jobs": len(server.session.jobs.running())})
+            return
+        if op == "shutdown":
+            channel.send({"exit": 0})
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            return
+
+        output = ClientOutput(channel)
+        sys.stdout.set(output)
+        sys.stderr.set(output)
+        sys.stdin.set(ClientInput(channel))
+        set_cwd(request.get("cwd"))
+        code = 0
+        try:
+            code = server.handler(request.get("argv", []), session=server.session) or 0
+        except RunLocally as e:
+            channel.send({"local": e.cmd})
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 0
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        except Exception as e:
+            from .colors import log_error
+            log_error(f"Daemon command failed: {e}")
+            code = 1
+        finally:
+            sys.stdout.set(None)
+            sys.stderr.set(None)
+            sys.stdin.set(None)
+            set_cwd(None)
+        try:
+            channel.send({"exit": code})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class RedDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Long-lived redsploit process holding one Session (workspace, loot, jobs)
+    in memory and serving CLI invocations over a Unix socket.
+
+    Each client runs in its own thread against the shared session, so a
+    'set target' from one terminal is visible to the next call from any
+    other; background jobs keep running between calls.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, session, handler: Callable, path: str = SOCKET_PATH) -> None:
+        self.session = session
+        self.handler = handler
+        self.started = time.time()
+        self.path = path
+        if os.path.exists(path):
+            if ping(path):
+                raise RuntimeError(f"A daemon is already listening on {path}")
+            os.unlink(path)
+        old_umask = os.umask(0o177)  # socket is 0600: it exposes credentials
+        try:
+            super().__init__(path, RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def serve(self) -> None:
+        self.session.capture_output = True
+        sys.stdout = ThreadLocalStream(sys.stdout)
+        sys.stderr = ThreadLocalStream(sys.stderr)
+        sys.stdin = ThreadLocalStream(sys.stdin)
+        try:
+            self.serve_forever()
+        finally:
+            self.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+# Client side
+
+def _connect(path: str = SOCKET_PATH, timeout: Optional[float] = None) -> Optional[socket.socket]:
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _request(message: dict, path: str = SOCKET_PATH, timeout: Optional[float] = 2.0) -> Optional[dict]:
+    sock = _connect(path, timeout)
+    if not sock:
+        return None
+    try:
+        with sock, sock.makefile("rwb") as f:
+            f.write((json.dumps(message) + "\n").encode())
+            f.flush()
+            line = f.readline()
+            return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+
+
+def ping(path: str = SOCKET_PATH) -> Optional[dict]:
+    return _request({"op": "ping"}, path)
+
+
+def should_forward(argv: List[str]) -> bool:
+    """True if this invocation can be served by a running daemon."""
+    if not argv or any(a in LOCAL_FLAGS for a in argv):
+        return False
+    return os.path.exists(SOCKET_PATH)
+
+
+def forward(argv: List[str], path: str = SOCKET_PATH) -> Optional[int]:
+    """
+    Run argv in the daemon and stream its output. Returns the exit code,
+    or None if no daemon answered (the caller then runs locally).
+    """
+    argv = list(argv)
+    # Script paths are resolved by the daemon, make them absolute
+    for i, arg in enumerate(argv[:-1]):
+        if arg == "-r" and argv[i + 1] != "-":
+            argv[i + 1] = os.path.abspath(argv[i + 1])
+
+    sock = _connect(path)
+    if not sock:
+        return None
+    code = None
+    local_code = None
+    try:
+        with sock, sock.makefile("rwb") as f:
+            f.write((json.dumps({"op": "run", "argv": argv, "cwd": os.getcwd()}) + "\n").encode())
+            f.flush()
+            for line in f:
+                message = json.loads(line)
+                if "out" in message:
+                    sys.stdout.write(message["out"])
+                    sys.stdout.flush()
+                elif "input" in message:
+                    data = sys.stdin.readline()
+                    f.write((json.dumps({"data": data}) + "\n").encode())
+                    f.flush()
+                elif "local" in message:
+                    # Interactive tool: run it attached to this terminal
+                    local_code = subprocess.call(message["local"], shell=True)
+                elif "exit" in message:
+                    code = message["exit"]
+                    break
+    except KeyboardInterrupt:
+        print("")
+        return 130
+    except (OSError, ValueError):
+        if code is None:
+            return None
+    return local_code if local_code is not None else code
+
+
+def start(red_script: str) -> bool:
+    """Start the daemon in the background and wait until it answers."""
+    info = ping()
+    if info:
+        print(f"Daemon already running (pid {info['pid']}).")
+        return True
+    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+    with open(LOG_PATH, "a") as log:
+        subprocess.Popen([sys.executable, red_script, "--daemon", "run"], stdin=subprocess.DEVNULL,
+                         stdout=log, stderr=log, start_new_session=True)
+    for _ in range(100):
+        time.sleep(0.1)
+        info = ping()
+        if info:
+            print(f"Daemon started (pid {info['pid']}, socket {SOCKET_PATH}).")
+            return True
+    print(f"Daemon did not start, see {LOG_PATH}")
+    return False
+
+
+def stop() -> bool:
+    if _request({"op": "shutdown"}) is None:
+        print("Daemon is not running.")
+        return False
+    print("Daemon stopped.")
+    return True
+
+
+def status() -> bool:
+    info = ping()
+    if not info:
+        print("Daemon is not running.")
+        return False
+    print(f"Daemon running (pid {info['pid']}, up {int(info['uptime'])}s)")
+    print(f"  workspace: {info['workspace']}  target: {info['target'] or '-'}  running jobs: {info['jobs']}")
+    return True
@@ -0,0 +1,355 @@
+import io
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from .jobs import FINISHED, QUEUED, RUNNING, DONE, FAILED, KILLED
+from .storage import file_version, read_json
+
+REFRESH = 1.0
+PROC_REFRESH = 2.0  # /proc is scanned less often than the table is redrawn
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+STATUS_STYLE = {RUNNING: "ansicyan", DONE: "ansigreen", FAILED: "ansired", KILLED: "ansiyellow", QUEUED: "ansigray"}
+
+
+class ProcSampler:
+    """
+    CPU and RSS per process group from /proc (Linux; empty elsewhere).
+
+    stream_command starts every job in its own session, so a job's pid is
+    the process group of the tool and everything it spawned. The tree under
+    each group leader is walked through /proc/<pid>/task/<tid>/children, so
+    a pass costs a few reads per job instead of one per process on the box;
+    kernels without that file fall back to scanning all of /proc. utime +
+    stime and rss are summed per group; CPU% is the tick delta between two
+    passes.
+    """
+
+    def __init__(self) -> None:
+        self.available = os.path.isdir("/proc/self")
+        self.tick = os.sysconf("SC_CLK_TCK") if self.available else 100
+        self.page = os.sysconf("SC_PAGE_SIZE") if self.available else 4096
+        self._last: Dict[int, Tuple[float, int]] = {}
+        self.stats: Dict[int, Tuple[float, int]] = {}
+        self.tree = self.available and os.path.exists(f"/proc/self/task/{os.getpid()}/children")
+
+    @staticmethod
+    def _stat(pid) -> Optional[List[bytes]]:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        # comm may contain spaces and parentheses: fields start after the last ')'
+        return data[data.rfind(b")") + 2:].split()
+
+    def _walk(self, leader: int) -> List[List[bytes]]:
+        """stat fields of the leader and its descendants in the same process group."""
+        found, pending = [], [leader]
+        while pending:
+            pid = pending.pop()
+            fields = self._stat(pid)
+            if not fields or int(fields[2]) != leader:
+                continue
+            found.append(fields)
+            try:
+                for tid in os.listdir(f"/proc/{pid}/task"):
+                    with open(f"/proc/{pid}/task/{tid}/children", "rb") as f:
+                        pending.extend(int(child) for child in f.read().split())
+            except OSError:
+                continue
+        return found
+
+    def _scan(self, wanted: set) -> Dict[int, List[List[bytes]]]:
+        groups: Dict[int, List[List[bytes]]] = {}
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                fields = self._stat(name)
+                if fields and len(fields) > 21 and int(fields[2]) in wanted:
+                    groups.setdefault(int(fields[2]), []).append(fields)
+        return groups
+
+    def sample(self, groups: List[int]) -> Dict[int, Tuple[float, int]]:
+        """{pgid: (cpu percent, rss bytes)} for the given process groups."""
+        if not self.available or not groups:
+            self.stats = {}
+            return self.stats
+        wanted = set(groups)
+        members = {leader: self._walk(leader) for leader in wanted} if self.tree else self._scan(wanted)
+        ticks: Dict[int, int] = {}
+        rss: Dict[int, int] = {}
+        for pgrp, processes in members.items():
+            if processes:
+                ticks[pgrp] = sum(int(p[11]) + int(p[12]) for p in processes)
+                rss[pgrp] = sum(int(p[21]) for p in processes) * self.page
+        now = time.time()
+        stats = {}
+        for pgrp in wanted:
+            last = self._last.get(pgrp)
+            cpu = 0.0
+            if last and pgrp in ticks and now > last[0]:
+                cpu = max(ticks[pgrp] - last[1], 0) / self.tick / (now - last[0]) * 100
+            if pgrp in ticks:
+                self._last[pgrp] = (now, ticks[pgrp])
+                stats[pgrp] = (cpu, rss.get(pgrp, 0))
+        self.stats = stats
+        return stats
+
+
+class CapturedOutput(io.TextIOBase):
+    """Stands in for sys.stdout while the dashboard owns the screen; keeps the last lines for the log pane."""
+
+    def __init__(self, lines: int = 200) -> None:
+        self.lines: Deque[str] = deque(maxlen=lines)
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def write(self, data: str) -> int:
+        with self._lock:
+            text = self._partial + data
+            *complete, self._partial = text.split("\n")
+            for line in complete:
+                line = ANSI_RE.sub("", line).strip()
+                if line:
+                    self.lines.append(line)
+        return len(data)
+
+    def isatty(self) -> bool:
+        return False
+
+
+def _size(count: float) -> str:
+    for unit in ("B", "K", "M", "G"):
+        if count < 1024 or unit == "G":
+            return f"{count:.0f}{unit}" if unit == "B" else f"{count:.1f}{unit}"
+        count /= 1024
+    return ""
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class Dashboard:
+    """
+    Full-screen view of jobs, the scan queue and per-target progress.
+
+    Everything is read from counters the jobs already keep (lines, bytes,
+    last line), so a running job pays nothing for being watched: there is
+    no output listener. Each redraw only formats the rows that fit on the
+    screen; finished rows are formatted once and reused, the queue file is
+    re-read only when its version changes, and /proc is sampled every
+    PROC_REFRESH seconds.
+    """
+
+    def __init__(self, session) -> None:
+        self.session = session
+        self.proc = ProcSampler()
+        self.selected = 0
+        self.offset = 0
+        self.show_finished = True
+        self._rates: Dict[int, Tuple[float, int, int, float, float]] = {}
+        self._finished_rows: Dict[Tuple[int, int], List[Tuple[str, str]]] = {}
+        self._queue: List[Dict] = []
+        self._queue_version = None
+        self._proc_at = 0.0
+        self.log: Optional[CapturedOutput] = None
+
+    # Data
+
+    def jobs(self) -> List:
+        jobs = self.session.jobs.list()
+        if not self.show_finished:
+            jobs = [j for j in jobs if j.status not in FINISHED]
+        # Running first, then waiting, then finished (newest first)
+        order = {RUNNING: 0, QUEUED: 1}
+        return sorted(jobs, key=lambda j: (order.get(j.status, 2), -j.id if j.status in FINISHED else j.id))
+
+    def queue_entries(self) -> List[Dict]:
+        path = self.session.scheduler.path
+        version = file_version(path)
+        if version != self._queue_version:
+            self._queue_version = version
+            try:
+                self._queue = (read_json(path) or {}).get("entries", [])
+            except ValueError:
+                pass  # caught mid-write by another process; keep the previous snapshot
+        return self._queue
+
+    def rate(self, job) -> Tuple[float, float]:
+        """(lines/s, bytes/s) over the last refresh interval."""
+        now = time.time()
+        last = self._rates.get(job.id)
+        if last and now - last[0] < REFRESH / 2:
+            return last[3], last[4]
+        lines_rate = bytes_rate = 0.0
+        if last and now > last[0]:
+            lines_rate = (job.lines - last[1]) / (now - last[0])
+            bytes_rate = (job.bytes - last[2]) / (now - last[0])
+        self._rates[job.id] = (now, job.lines, job.bytes, lines_rate, bytes_rate)
+        return lines_rate, bytes_rate
+
+    def progress(self, jobs: List, entries: List[Dict]) -> List[Tuple[str, int, int, int]]:
+        """(target, finished, running, total) per target over jobs and not yet started queue entries."""
+        targets: Dict[str, List[int]] = {}
+        for job in jobs:
+            counts = targets.setdefault(job.target or "-", [0, 0, 0])
+            counts[2] += 1
+            if job.status in FINISHED:
+                counts[0] += 1
+            elif job.status == RUNNING:
+                counts[1] += 1
+        for entry in entries:
+            # Started entries are already counted through their job
+            if entry["status"] == "queued":
+                targets.setdefault(entry["target"] or "-", [0, 0, 0])[2] += 1
+        return sorted(((t, c[0], c[1], c[2]) for t, c in targets.items()), key=lambda r: (r[1] == r[3], r[0]))
+
+    # Rendering
+
+    def _job_row(self, job, width: int) -> List[Tuple[str, str]]:
+        if job.status in FINISHED and (job.id, width) in self._finished_rows:
+            return self._finished_rows[(job.id, width)]
+        cpu_rss = self.proc.stats.get(job.pid) if job.pid and job.status == RUNNING else None
+        cpu = f"{cpu_rss[0]:>5.0f}%" if cpu_rss else f"{'-':>6}"
+        rss = f"{_size(cpu_rss[1]):>7}" if cpu_rss else f"{'-':>7}"
+        lines_rate, bytes_rate = self.rate(job) if job.status == RUNNING else (0.0, 0.0)
+        rate = f"{lines_rate:>6.1f}/s" if job.status == RUNNING else f"{'':>8}"
+        fixed = (f"{job.id:>4} {job.status:<8} {_duration(job.elapsed):>7} {job.lines:>7} {rate} "
+                 f"{_size(bytes_rate) + '/s' if job.status == RUNNING else '':>8} {cpu} {rss}  {job.target[:15]:<15} "
+                 f"{job.name[:14]:<14} ")
+        last = ANSI_RE.sub("", job.last_line).replace("\t", " ")
+        row = [(STATUS_STYLE.get(job.status, ""), fixed), ("", last[:max(width - len(fixed), 0)])]
+        if job.status in FINISHED:
+            self._finished_rows[(job.id, width)] = row
+        return row
+
+    def render(self, width: int = 120, height: int = 40, pad: bool = True) -> List[Tuple[str, str]]:
+        """The whole screen as prompt_toolkit formatted text fragments (pad: fill the job table to height)."""
+        now = time.time()
+        jobs = self.jobs()
+        if now - self._proc_at >= PROC_REFRESH:
+            self._proc_at = now
+            self.proc.sample([j.pid for j in jobs if j.pid and j.status == RUNNING])
+        entries = self.queue_entries()
+        all_jobs = self.session.jobs.list()
+        running = sum(1 for j in all_jobs if j.status == RUNNING)
+        waiting = sum(1 for j in all_jobs if j.status == QUEUED)
+        queued = sum(1 for e in entries if e["status"] == "queued")
+        pool = self.session.workers
+
+        out: List[Tuple[str, str]] = []
+        title = (f" redsploit dashboard  workspace {self.session.get('workspace') or 'default'}  "
+                 f"running {running}  waiting {waiting}  queued {queued}")
+        if pool.workers:
+            title += f"  workers {sum(w.active for w in pool.workers.values())}/{sum(w.slots for w in pool.workers.values())}"
+        out.append(("reverse", f"{title:<{width}}"[:width] + "\n"))
+
+        progress = self.progress(all_jobs, entries)
+        log_lines = list(self.log.lines)[-3:] if self.log else []
+        target_rows = min(len(progress), 8)
+        table_rows = max(height - 5 - (target_rows + 2 if progress else 0) - (len(log_lines) + 1 if log_lines else 0), 1)
+
+        header = (f"{'ID':>4} {'Status':<8} {'Elapsed':>7} {'Lines':>7} {'Rate':>8} {'Out':>8} {'CPU':>6} {'RSS':>7}  "
+                  f"{'Target':<15} {'Name':<14} Last line")
+        out.append(("bold", header[:width] + "\n"))
+        self.selected = min(self.selected, max(len(jobs) - 1, 0))
+        if self.selected < self.offset:
+            self.offset = self.selected
+        elif self.selected >= self.offset + table_rows:
+            self.offset = self.selected - table_rows + 1
+        visible = jobs[self.offset:self.offset + table_rows]
+        for i, job in enumerate(visible, self.offset):
+            row = self._job_row(job, width)
+            if i == self.selected:
+                row = [(style + " reverse", text) for style, text in row]
+            out.extend(row)
+            out.append(("", "\n"))
+        if not jobs:
+            out.append(("ansigray", "  No jobs yet. Start tools with -b, -q or -remote.\n"))
+        for _ in range(table_rows - max(len(visible), 1) if pad else 0):
+            out.append(("", "\n"))
+
+        if progress:
+            out.append(("bold", f"\n{'Target':<18} {'Progress':<24} Done/Total  Running\n"))
+            for target, finished, active, total in progress[:target_rows]:
+                filled = int(20 * finished / total) if total else 0
+                out.append(("ansigreen" if finished == total else "",
+                            f"{target[:18]:<18} [{'#' * filled}{'.' * (20 - filled)}]  {finished:>4}/{total:<5}  {active:>7}\n"))
+        if log_lines:
+            out.append(("ansigray", "\n" + "\n".join(l[:width] for l in log_lines) + "\n"))
+        out.append(("reverse", f"{' q quit  up/down select  k kill  f toggle finished  ' + time.strftime('%H:%M:%S'):<{width}}"[:width]))
+        return out
+
+    def snapshot(self) -> str:
+        """Plain-text rendering (daemon clients, scripts, no terminal)."""
+        # Two samples half a refresh apart, so CPU and output rates have a baseline
+        running = [j for j in self.session.jobs.list() if j.status == RUNNING]
+        self.proc.sample([j.pid for j in running if j.pid])
+        for job in running:
+            self.rate(job)
+        time.sleep(REFRESH / 2)
+        self._proc_at = time.time()
+        self.proc.sample([j.pid for j in running if j.pid])
+        text = "".join(text for _, text in self.render(width=120, height=len(self.jobs()) + 30, pad=False))
+        return "\n".join(line.rstrip() for line in text.splitlines())
+
+    # Full-screen application
+
+    def run(self) -> None:
+        from prompt_toolkit.application import Application
+        from prompt_toolkit.key_binding import KeyBindings
+        from prompt_toolkit.layout import Layout, Window
+        from prompt_toolkit.layout.controls import FormattedTextControl
+        from prompt_toolkit.output import create_output
+
+        bindings = KeyBindings()
+
+        @bindings.add("q")
+        @bindings.add("escape")
+        @bindings.add("c-c")
+        def _quit(event):
+            event.app.exit()
+
+        @bindings.add("up")
+        def _up(event):
+            self.selected = max(self.selected - 1, 0)
+
+        @bindings.add("down")
+        def _down(event):
+            self.selected += 1
+
+        @bindings.add("k")
+        def _kill(event):
+            jobs = self.jobs()
+            if jobs and self.selected < len(jobs) and self.session.jobs.kill(jobs[self.selected].id):
+                print(f"Killed job #{jobs[self.selected].id}")
+
+        @bindings.add("f")
+        def _finished(event):
+            self.show_finished = not self.show_finished
+
+        def text():
+            size = app.output.get_size()
+            return self.render(size.columns, size.rows)
+
+        # Draw on the real terminal; prints from jobs and workers go to the log pane instead
+        output = create_output(stdout=sys.__stdout__)
+        app = Application(layout=Layout(Window(FormattedTextControl(text))), key_bindings=bindings,
+                          full_screen=True, refresh_interval=REFRESH, output=output)
+        self.log = CapturedOutput()
+        saved = sys.stdout
+        sys.stdout = self.log
+        try:
+            app.run()
+        finally:
+            sys.stdout = saved
+            self.log = None
@@ -0,0 +1,135 @@
+import contextlib
+import heapq
+import os
+import shutil
+import sys
+import tempfile
+from typing import Iterable, Iterator, List, Optional, TextIO
+
+# Rough per-entry cost of a str in a set on CPython, on top of its characters
+ENTRY_OVERHEAD = 90
+MAX_FAN_IN = 64
+
+
+def _unique(lines: Iterable[str]) -> Iterator[str]:
+    """Drop adjacent duplicates from a sorted stream."""
+    previous = None
+    for line in lines:
+        if line != previous:
+            yield line
+            previous = line
+
+
+class ExternalDedup:
+    """
+    Exact dedup of a stream larger than memory (like `sort -u`).
+
+    Lines go into an in-memory set until its estimated size reaches the
+    budget; the set is then written out as a sorted run file and cleared.
+    Reading the result k-way merges the runs (heapq.merge) with whatever is
+    still in memory, dropping duplicates on the way, so the output is
+    sorted and unique. A stream that fits in the budget never touches disk.
+    """
+
+    def __init__(self, memory_mb: int = 256, tmp_dir: Optional[str] = None, ignore_case: bool = False) -> None:
+        self.budget = max(memory_mb, 1) * 1024 * 1024
+        self.tmp_dir = tmp_dir
+        self.ignore_case = ignore_case
+        self.items: set = set()
+        self.used = 0
+        self.runs: List[str] = []
+        self._run_dir: Optional[str] = None
+        self.read = 0
+        self.written = 0
+
+    def add(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        if self.ignore_case:
+            line = line.lower()
+        self.read += 1
+        if line in self.items:
+            return
+        self.items.add(line)
+        self.used += len(line) + ENTRY_OVERHEAD
+        if self.used >= self.budget:
+            self._spill()
+
+    def extend(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.add(line)
+
+    def _new_run(self) -> str:
+        if self._run_dir is None:
+            self._run_dir = tempfile.mkdtemp(prefix="redsploit-dedup-", dir=self.tmp_dir)
+        return os.path.join(self._run_dir, f"run-{len(self.runs)}.txt")
+
+    def _spill(self) -> None:
+        path = self._new_run()
+        with open(path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            f.writelines(line + "\n" for line in sorted(self.items))
+        self.runs.append(path)
+        self.items = set()
+        self.used = 0
+
+    @staticmethod
+    def _read_run(f: TextIO) -> Iterator[str]:
+        for line in f:
+            yield line.rstrip("\n")
+
+    def _merge_runs(self) -> None:
+        """Merge runs in groups until at most MAX_FAN_IN remain (keeps open files bounded)."""
+        while len(self.runs) > MAX_FAN_IN:
+            group, self.runs = self.runs[:MAX_FAN_IN], self.runs[MAX_FAN_IN:]
+            path = self._new_run() + ".merged"
+            with contextlib.ExitStack() as stack:
+                files = [stack.enter_context(open(p, encoding="utf-8", errors="surrogateescape")) for p in group]
+                with open(path, "w", encoding="utf-8", errors="surrogateescape") as out:
+                    out.writelines(line + "\n" for line in _unique(heapq.merge(*map(self._read_run, files))))
+            for p in group:
+                os.unlink(p)
+            self.runs.append(path)
+
+    def __iter__(self) -> Iterator[str]:
+        """Sorted unique lines."""
+        if not self.runs:
+            for line in sorted(self.items):
+                self.written += 1
+                yield line
+            return
+        self._merge_runs()
+        with contextlib.ExitStack() as stack:
+            files = [stack.enter_context(open(p, encoding="utf-8", errors="surrogateescape")) for p in self.runs]
+            streams = [self._read_run(f) for f in files] + [iter(sorted(self.items))]
+            for line in _unique(heapq.merge(*streams)):
+                self.written += 1
+                yield line
+
+    def write(self, out: TextIO) -> int:
+        for line in self:
+            out.write(line + "\n")
+        return self.written
+
+    def close(self) -> None:
+        if self._run_dir:
+            shutil.rmtree(self._run_dir, ignore_errors=True)
+            self._run_dir = None
+        self.runs = []
+        self.items = set()
+
+    def __enter__(self) -> "ExternalDedup":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_inputs(paths: List[str]) -> Iterator[str]:
+    """Lines from files ('-' for stdin), one file at a time."""
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+            continue
+        with open(os.path.expanduser(path), "r", encoding="utf-8", errors="surrogateescape") as f:
+            yield from f
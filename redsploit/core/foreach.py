@@ -0,0 +1,145 @@
+import os
+import re
+import shlex
+from typing import Dict, Iterator, List, Optional, Tuple
+from .loot import parse_query
+from .rescan import changed_services
+from .spray import is_nt_hash
+
+FOREACH_RE = re.compile(r"^\s*(loot|hosts|file)\s*\((.*)\)\s*$")
+
+# Variables each source binds for the step's cmd template
+FOREACH_VARS = {
+    "loot": ["username", "password", "hash", "user", "content", "loot_id", "loot_type", "loot_target", "service"],
+    "hosts": ["target", "host", "hostname", "os", "port", "service"],
+    "file": ["item"],
+}
+
+Source = Tuple[str, List[str]]
+
+
+def parse_foreach(spec) -> List[Source]:
+    """
+    Parse a step's foreach value into (kind, args) sources.
+
+        loot(type=cred service=smb)    loot entries, same terms as `loot search`
+        hosts(port=445)  hosts(name=http)  hosts()
+                                       inventory hosts, one per matching service
+        hosts(changed port=445)        only new/changed services of the last rescan
+        file(users.txt)                non-empty lines of a file
+
+    A list of sources iterates their cartesian product (first one outermost).
+    Raises ValueError on anything else.
+    """
+    specs = spec if isinstance(spec, list) else [spec]
+    sources = []
+    for item in specs:
+        m = FOREACH_RE.match(str(item))
+        if not m:
+            raise ValueError(f"bad foreach '{item}' (expected loot(...), hosts(...) or file(...))")
+        kind, args = m.group(1), shlex.split(m.group(2))
+        if kind == "loot":
+            parse_query(args)
+        elif kind == "hosts":
+            for arg in args:
+                if arg == "changed":
+                    continue
+                field, _, value = arg.partition("=")
+                if field not in ("port", "name") or not value or (field == "port" and not value.isdigit()):
+                    raise ValueError(f"bad hosts() filter '{arg}' (expected port=<n>, name=<service> or changed)")
+        elif len(args) != 1:
+            raise ValueError("file() takes exactly one path")
+        sources.append((kind, args))
+    return sources
+
+
+def bound_vars(sources: List[Source]) -> List[str]:
+    return [var for kind, _ in sources for var in FOREACH_VARS[kind]]
+
+
+def loot_vars(entry: Dict) -> Dict[str, str]:
+    """Template variables for a loot entry (credentials split like `loot use`)."""
+    content = entry.get("content", "")
+    values = {"content": content, "loot_id": str(entry.get("id", "")), "loot_type": entry.get("type", ""),
+              "loot_target": entry.get("target", ""), "service": entry.get("service", ""),
+              "username": "", "password": "", "hash": "", "user": content}
+    if entry.get("type") in ("hash", "ntlm"):
+        user, _, nt = content.rpartition(":")
+        if user and is_nt_hash(nt) and not is_nt_hash(user):
+            values["username"], values["hash"] = user.split("\\")[-1], nt
+            values["user"] = values["username"]
+        else:
+            values["hash"] = content
+    else:
+        username, _, password = content.partition(":")
+        values["username"], values["password"] = username, password
+    return values
+
+
+def _source_items(session, kind: str, args: List[str], base_dir: str) -> Iterator[Dict[str, str]]:
+    if kind == "loot":
+        for entry in session.loot.search(**parse_query(args)):
+            yield loot_vars(entry)
+    elif kind == "hosts":
+        filters = dict(arg.split("=", 1) for arg in args if arg != "changed")
+        changed = changed_services(session) if "changed" in args else None
+        if not filters:
+            for host in session.inventory.hosts():
+                if changed is not None and host["address"] not in changed:
+                    continue
+                yield {"target": host["address"], "host": host["address"], "hostname": (host.get("hostnames") or [""])[0],
+                       "os": host.get("os", ""), "port": "", "service": ""}
+            return
+        for service in session.inventory.services(port=filters.get("port"), name=filters.get("name", "")):
+            if changed is not None and f"{service['port']}/{service['proto']}" not in changed.get(service["host"], []):
+                continue
+            host = session.inventory.get_host(service["host"]) or {}
+            yield {"target": service["host"], "host": service["host"], "hostname": (host.get("hostnames") or [""])[0],
+                   "os": host.get("os", ""), "port": str(service["port"]), "service": service.get("name", "")}
+    else:
+        path = os.path.expanduser(args[0])
+        if not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        with open(path, "r", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield {"item": line}
+
+
+def iter_items(session, sources: List[Source], base_dir: str = "") -> Iterator[Dict[str, str]]:
+    """
+    Variable bindings for every combination of the sources. The outermost
+    source is read lazily; inner ones are materialized once.
+    """
+    if not sources:
+        return
+    outer, inner = sources[0], [list(_source_items(session, kind, args, base_dir)) for kind, args in sources[1:]]
+
+    def combine(prefix: Dict[str, str], depth: int) -> Iterator[Dict[str, str]]:
+        if depth == len(inner):
+            yield prefix
+            return
+        for values in inner[depth]:
+            yield from combine(dict(prefix, **values), depth + 1)
+
+    for values in _source_items(session, outer[0], outer[1], base_dir):
+        yield from combine(values, 0)
+
+
+def quote_vars(values: Dict[str, str]) -> Dict[str, str]:
+    """Shell-quote bound values: loot and inventory data comes from target-controlled output."""
+    return {name: shlex.quote(value) for name, value in values.items()}
+
+
+def describe(values: Dict[str, str], sources: Optional[List[Source]] = None) -> str:
+    """Short label for an item in status lines."""
+    parts = []
+    for kind, _ in sources or []:
+        if kind == "loot":
+            parts.append(values.get("username") or values.get("content", ""))
+        elif kind == "hosts":
+            parts.append(values.get("host", "") + (f":{values['port']}" if values.get("port") else ""))
+        else:
+            parts.append(values.get("item", ""))
+    return " ".join(p for p in parts if p)
@@ -0,0 +1,216 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+from prompt_toolkit.history import History
+
+LEGACY_HISTORY = os.path.expanduser("~/.redsploit_history")
+MODULE_COMMANDS = {"infra", "web", "file"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    command TEXT NOT NULL,
+    tool TEXT NOT NULL DEFAULT '',
+    target TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_history_tool ON history(tool);
+CREATE INDEX IF NOT EXISTS idx_history_target ON history(target);
+CREATE INDEX IF NOT EXISTS idx_history_command ON history(command);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    command, content='history', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts(rowid, command) VALUES (new.id, new.command);
+END;
+CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, command) VALUES ('delete', old.id, old.command);
+END;
+"""
+
+
+def command_tool(command: str) -> str:
+    """Tool (or command) name of a history line, skipping module prefixes like 'infra nmap'."""
+    parts = command.split()
+    if not parts:
+        return ""
+    if parts[0] in MODULE_COMMANDS and len(parts) > 1:
+        return parts[1]
+    return parts[0]
+
+
+class WorkspaceHistory(History):
+    """
+    Command history stored per workspace in SQLite with a trigram FTS index.
+
+    Only the most recent `preload` distinct commands are handed to
+    prompt_toolkit (Up arrow / Ctrl-R); the full history stays on disk and is
+    searched through the index. The table is compacted (duplicates dropped,
+    oldest rows trimmed) once it grows past `max_entries`.
+    """
+
+    def __init__(self, session, max_entries: int = 10000, preload: int = 1000) -> None:
+        super().__init__()
+        self.session = session
+        self.max_entries = max_entries
+        self.preload = preload
+        self.history_dir = os.path.join(os.path.dirname(session.workspace_dir), "history")
+        os.makedirs(self.history_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._fts: Optional[bool] = None
+        self._inserts = 0
+
+    @property
+    def db_path(self) -> str:
+        return os.path.join(self.history_dir, f"{self.session.get('workspace') or 'default'}.db")
+
+    def _connect(self) -> sqlite3.Connection:
+        path = self.db_path
+        is_new = not os.path.exists(path)
+        conn = sqlite3.connect(path, timeout=5)
+        conn.executescript(SCHEMA)
+        if self._fts is None or is_new:
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self._fts = True
+            except sqlite3.OperationalError:
+                # SQLite without FTS5/trigram: fall back to LIKE scans
+                self._fts = False
+        if is_new and self.session.get("workspace") in ("", "default"):
+            self._import_legacy(conn)
+        return conn
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> None:
+        """One-time import of the tail of the old ~/.redsploit_history file."""
+        if not os.path.exists(LEGACY_HISTORY):
+            return
+        recent = deque(maxlen=self.max_entries)
+        try:
+            with open(LEGACY_HISTORY, "r", errors="ignore") as f:
+                for line in f:
+                    if line.startswith("+"):
+                        recent.append(line[1:].rstrip("\n"))
+        except OSError:
+            return
+        now = time.time()
+        with conn:
+            conn.executemany(
+                "INSERT INTO history (ts, command, tool) VALUES (?, ?, ?)",
+                ((now, cmd, command_tool(cmd)) for cmd in recent if cmd.strip()),
+            )
+
+    # prompt_toolkit backend
+
+    def load_history_strings(self) -> Iterable[str]:
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT command FROM history GROUP BY command ORDER BY MAX(id) DESC LIMIT ?",
+                    (self.preload,),
+                ).fetchall()
+            finally:
+                conn.close()
+        for (command,) in rows:
+            yield command
+
+    def store_string(self, string: str) -> None:
+        if not string.strip():
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    last = conn.execute("SELECT command FROM history ORDER BY id DESC LIMIT 1").fetchone()
+                    if last and last[0] == string:
+                        return
+                    conn.execute(
+                        "INSERT INTO history (ts, command, tool, target) VALUES (?, ?, ?, ?)",
+                        (time.time(), string, command_tool(string), self.session.get("target")),
+                    )
+                self._inserts += 1
+                # Check the size now and then rather than on every insert
+                if self._inserts % 100 == 0:
+                    self._maybe_compact(conn)
+            finally:
+                conn.close()
+
+    # Maintenance and search
+
+    def _maybe_compact(self, conn: sqlite3.Connection) -> None:
+        count = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        if count > self.max_entries * 1.1:
+            self._compact(conn)
+
+    def _compact(self, conn: sqlite3.Connection) -> int:
+        with conn:
+            before = conn.total_changes
+            # Keep only the latest occurrence of each (command, target)
+            conn.execute(
+                "DELETE FROM history WHERE id NOT IN "
+                "(SELECT MAX(id) FROM history GROUP BY command, target)"
+            )
+            conn.execute(
+                "DELETE FROM history WHERE id <= "
+                "(SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            removed = conn.total_changes - before
+        conn.execute("VACUUM")
+        return removed
+
+    def compact(self) -> int:
+        """Drop duplicates and trim to max_entries. Returns the number of rows removed."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                return self._compact(conn)
+            finally:
+                conn.close()
+
+    def search(self, text: str = "", tool: str = "", target: str = "",
+               limit: int = 20) -> List[Tuple[float, str, str, str]]:
+        """Newest-first (ts, command, tool, target) rows matching every given filter."""
+        clauses, params = [], []
+        with self._lock:
+            conn = self._connect()
+            try:
+                if text:
+                    if self._fts and len(text) >= 3:
+                        clauses.append("id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)")
+                        params.append('"' + text.replace('"', '""') + '"')
+                    else:
+                        clauses.append("command LIKE ? ESCAPE '\\'")
+                        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                        params.append(f"%{escaped}%")
+                if tool:
+                    clauses.append("tool = ?")
+                    params.append(tool)
+                if target:
+                    clauses.append("target = ?")
+                    params.append(target)
+                where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+                params.append(limit)
+                return conn.execute(
+                    f"SELECT ts, command, tool, target FROM history {where} ORDER BY id DESC LIMIT ?",
+                    params,
+                ).fetchall()
+            finally:
+                conn.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM history")
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+        self._loaded_strings = []
@@ -0,0 +1,190 @@
+import contextlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+from .colors import Colors, log_error
+from .storage import locked, read_json, write_json, file_version
+
+
+class Inventory:
+    """
+    Hosts and services discovered in a workspace, stored next to the loot file
+    as <workspace>_inventory.json.
+
+    Hosts are keyed by address; services by "<port>/<proto>" inside their host.
+    Adding something that already exists merges the new fields into it.
+    Changes are replayed onto a fresh read of the file under its lock, so
+    concurrent red processes merge instead of overwriting each other. A
+    re-entrant lock serializes threads of one process (parallel playbook
+    items, rescan detection) around the in-memory hosts and pending changes.
+    """
+
+    def __init__(self, workspace_dir: str, workspace_name: str) -> None:
+        self.workspace_dir = workspace_dir
+        self.workspace_name = workspace_name
+        self.inventory_file = os.path.join(workspace_dir, f"{workspace_name}_inventory.json")
+        self._hosts: Dict[str, Dict] = {}
+        self._pending: List[Callable[[Dict], None]] = []
+        self._version = None
+        self._lock = threading.RLock()
+        self.load()
+
+    @property
+    def hosts_data(self) -> Dict[str, Dict]:
+        with self._lock:
+            if not self._pending and file_version(self.inventory_file) != self._version:
+                self.load()
+            return self._hosts
+
+    def load(self) -> None:
+        with self._lock:
+            try:
+                with locked(self.inventory_file, shared=True):
+                    self._hosts = (read_json(self.inventory_file) or {}).get("hosts", {})
+                    self._version = file_version(self.inventory_file)
+            except Exception as e:
+                log_error(f"Failed to load inventory: {e}")
+                self._hosts = {}
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[Dict[str, Dict]]:
+        """Re-read the file under its lock, let the caller change the hosts, write back atomically."""
+        with self._lock, locked(self.inventory_file):
+            hosts = (read_json(self.inventory_file) or {}).get("hosts", {})
+            yield hosts
+            write_json(self.inventory_file, {"hosts": hosts})
+            self._hosts = hosts
+            self._version = file_version(self.inventory_file)
+
+    def _change(self, op: Callable[[Dict], None], save: bool) -> None:
+        with self._lock:
+            op(self._hosts)
+            self._pending.append(op)
+            if save:
+                self.save()
+
+    def save(self) -> None:
+        """Replay unsaved changes onto the current file contents."""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            try:
+                with self.transaction() as hosts:
+                    for op in pending:
+                        op(hosts)
+            except Exception as e:
+                self._pending = pending + self._pending
+                log_error(f"Failed to save inventory: {e}")
+
+    def set_workspace(self, workspace_name: str) -> None:
+        with self._lock:
+            self.save()
+            self.workspace_name = workspace_name
+            self.inventory_file = os.path.join(self.workspace_dir, f"{workspace_name}_inventory.json")
+            self.load()
+
+    @staticmethod
+    def _host(hosts: Dict[str, Dict], address: str) -> Dict:
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        host = hosts.get(address)
+        if host is None:
+            host = {"address": address, "hostnames": [], "os": "", "first_seen": now,
+                    "last_seen": now, "services": {}}
+            hosts[address] = host
+        host["last_seen"] = now
+        return host
+
+    def add_host(self, address: str, hostname: str = "", os_name: str = "", save: bool = True) -> Dict:
+        def op(hosts):
+            host = self._host(hosts, address)
+            if hostname and hostname not in host["hostnames"]:
+                host["hostnames"].append(hostname)
+            if os_name:
+                host["os"] = os_name
+        with self._lock:
+            self._change(op, save)
+            return self._hosts[address]
+
+    def add_service(self, address: str, port: int, proto: str = "tcp", name: str = "",
+                    product: str = "", version: str = "", state: str = "open", banner: str = "",
+                    save: bool = True) -> Dict:
+        key = f"{int(port)}/{proto}"
+
+        def op(hosts):
+            host = self._host(hosts, address)
+            service = host["services"].setdefault(key, {"port": int(port), "proto": proto, "name": "",
+                                                        "product": "", "version": "", "state": state})
+            for field, value in (("name", name), ("product", product), ("version", version), ("state", state),
+                                 ("banner", banner)):
+                if value:
+                    service[field] = value
+        with self._lock:
+            self._change(op, save)
+            return self._hosts[address]["services"][key]
+
+    def close_service(self, address: str, key: str, save: bool = True) -> None:
+        """Mark a known service closed (kept for history; the host is not marked as seen)."""
+        def op(hosts):
+            service = hosts.get(address, {}).get("services", {}).get(key)
+            if service:
+                service["state"] = "closed"
+        self._change(op, save)
+
+    def remove_host(self, address: str) -> bool:
+        if address not in self.hosts_data:
+            return False
+        self._change(lambda hosts: hosts.pop(address, None), True)
+        return True
+
+    def clear(self) -> None:
+        self._change(lambda hosts: hosts.clear(), True)
+
+    def hosts(self) -> List[Dict]:
+        with self._lock:
+            hosts = self.hosts_data
+            return [hosts[k] for k in sorted(hosts)]
+
+    def get_host(self, address: str) -> Optional[Dict]:
+        return self.hosts_data.get(address)
+
+    def services(self, host: str = "", port: Optional[int] = None, name: str = "",
+                 state: str = "open") -> List[Dict]:
+        """Flat list of services (each with its host address), optionally filtered. state="" includes closed ones."""
+        result = []
+        with self._lock:
+            hosts = self.hosts_data
+            for address in sorted(hosts):
+                if host and address != host:
+                    continue
+                for service in hosts[address]["services"].values():
+                    if port is not None and service["port"] != int(port):
+                        continue
+                    if name and name.lower() not in service["name"].lower():
+                        continue
+                    if state and service.get("state", "open") != state:
+                        continue
+                    result.append(dict(service, host=address))
+        return result
+
+    def show(self, port: Optional[int] = None, name: str = "") -> None:
+        if not self.hosts_data:
+            print("Inventory is empty.")
+            return
+        print(f"\n{Colors.HEADER}Inventory ({self.workspace_name}){Colors.ENDC}")
+        if port is None and not name:
+            print(f"{'Host':<18} {'Hostnames':<28} {'OS':<18} {'Ports'}")
+            print("-" * 90)
+            for host in self.hosts():
+                ports = ",".join(str(s["port"]) for s in sorted(host["services"].values(), key=lambda s: s["port"])
+                                 if s.get("state", "open") == "open")
+                print(f"{host['address']:<18} {','.join(host['hostnames'])[:28]:<28} {host['os'][:18]:<18} {ports}")
+        else:
+            print(f"{'Host':<18} {'Port':<10} {'Service':<14} {'Version'}")
+            print("-" * 70)
+            for service in self.services(port=port, name=name):
+                version = f"{service['product']} {service['version']}".strip()
+                print(f"{service['host']:<18} {str(service['port']) + '/' + service['proto']:<10} "
+                      f"{service['name']:<14} {version}")
+        print("")
@@ -0,0 +1,241 @@
+import os
+import signal
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from .colors import Colors, log_success, log_error, log_warn
+from .runner import stream_command, kill_process_group
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+KILLED = "killed"
+
+FINISHED = (DONE, FAILED, KILLED)
+
+
+class Job:
+    """A background tool run with its output captured to a log file."""
+
+    def __init__(self, job_id: int, cmd: str, tool: str = "", target: str = "",
+                 name: str = "", profile: str = "", log_path: str = "") -> None:
+        self.id = job_id
+        self.cmd = cmd
+        self.tool = tool
+        self.target = target
+        self.name = name or tool or cmd.split()[0]
+        self.profile = profile
+        self.log_path = log_path
+        self.status = QUEUED
+        self.returncode: Optional[int] = None
+        self.pid: Optional[int] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+        self.lines = 0
+        self.bytes = 0
+        self.last_line = ""
+        self.process = None
+        self.done = threading.Event()
+        self.ok_codes: Tuple[int, ...] = (0,)  # exit codes that count as DONE
+        self._kill_requested = False
+
+    @property
+    def elapsed(self) -> float:
+        if not self.started:
+            return 0.0
+        return (self.ended or time.time()) - self.started
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id, "name": self.name, "cmd": self.cmd, "tool": self.tool,
+            "target": self.target, "status": self.status, "returncode": self.returncode,
+            "pid": self.pid, "created": self.created, "started": self.started, "ended": self.ended,
+            "elapsed": round(self.elapsed, 2), "lines": self.lines, "bytes": self.bytes,
+            "last_line": self.last_line, "log": self.log_path,
+        }
+
+
+class JobManager:
+    """
+    Job table for background tool runs.
+
+    Each job runs in its own thread through runner.stream_command (rate
+    governor, resource profile), writes its output to
+    <workspace_dir>/<workspace>_jobs/<id>.log and notifies line listeners.
+    """
+
+    def __init__(self, session) -> None:
+        self.session = session
+        self.jobs: Dict[int, Job] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Job, Optional[str]], None]] = []
+
+    @property
+    def log_dir(self) -> str:
+        path = os.path.join(self.session.workspace_dir, f"{self.session.get('workspace') or 'default'}_jobs")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def add_listener(self, callback: Callable[[Job, Optional[str]], None]) -> None:
+        """callback(job, line) for every output line; line is None when the job ends."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self, job: Job, line: Optional[str]) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(job, line)
+            except Exception:
+                pass
+
+    def submit(self, cmd: str, tool: str = "", target: str = "", name: str = "", profile: str = "",
+               on_line: Optional[Callable[[str], None]] = None,
+               on_exit: Optional[Callable[[Job], None]] = None, ok_codes: Tuple[int, ...] = (0,)) -> Job:
+        """Start cmd in the background and return its Job. ok_codes: exit codes that are not failures."""
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+        # Several red processes can share a workspace: keep their job logs apart
+        job = Job(job_id, cmd, tool, target, name, profile,
+                  os.path.join(self.log_dir, f"{os.getpid()}-{job_id}.log"))
+        job.ok_codes = ok_codes
+        with self._lock:
+            self.jobs[job_id] = job
+
+        thread = threading.Thread(target=self._run, args=(job, on_line, on_exit),
+                                  name=f"job-{job_id}", daemon=True)
+        thread.start()
+        return job
+
+    def _run(self, job: Job, on_line, on_exit) -> None:
+        def started(process):
+            job.process = process
+            job.pid = process.pid
+            job.started = time.time()
+            job.status = RUNNING
+            if job._kill_requested:
+                kill_process_group(process, signal.SIGTERM)
+
+        try:
+            with open(job.log_path, "w", buffering=1, errors="replace") as log:
+                def handle(line):
+                    log.write(line + "\n")
+                    job.lines += 1
+                    job.bytes += len(line) + 1
+                    job.last_line = line
+                    if on_line:
+                        on_line(line)
+                    self._notify(job, line)
+
+                job.returncode = stream_command(self.session, job.cmd, tool=job.tool, target=job.target,
+                                                profile=job.profile, on_line=handle, on_start=started)
+            if job._kill_requested:
+                job.status = KILLED
+            else:
+                job.status = DONE if job.returncode in job.ok_codes else FAILED
+        except Exception as e:
+            job.status = FAILED
+            job.last_line = f"Launch error: {e}"
+        finally:
+            job.ended = time.time()
+            job.started = job.started or job.ended
+            job.process = None
+            job.done.set()
+            self._notify(job, None)
+            if on_exit:
+                try:
+                    on_exit(job)
+                except Exception as e:
+                    log_error(f"Job #{job.id} exit hook failed: {e}")
+
+    def get(self, job_id: int) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return [self.jobs[k] for k in sorted(self.jobs)]
+
+    def running(self) -> List[Job]:
+        return [j for j in self.list() if j.status not in FINISHED]
+
+    def kill(self, job_id: int, sig: int = signal.SIGTERM) -> bool:
+        job = self.jobs.get(job_id)
+        if not job or job.status in FINISHED:
+            return False
+        job._kill_requested = True
+        if job.process:
+            kill_process_group(job.process, sig)
+        return True
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job:
+            job.done.wait(timeout)
+        return job
+
+    def tail(self, job_id: int, lines: int = 20) -> List[str]:
+        job = self.jobs.get(job_id)
+        if not job or not os.path.exists(job.log_path):
+            return []
+        with open(job.log_path, "r", errors="replace") as f:
+            return [l.rstrip("\n") for l in deque(f, maxlen=lines)]
+
+    def clean(self) -> int:
+        """Forget finished jobs (their logs stay on disk)."""
+        with self._lock:
+            finished = [k for k, j in self.jobs.items() if j.status in FINISHED]
+            for k in finished:
+                del self.jobs[k]
+        return len(finished)
+
+    def follow(self, job_id: int, poll: float = 0.2) -> None:
+        """Print a job's output as it is written until it finishes (Ctrl+C to detach)."""
+        job = self.jobs.get(job_id)
+        if not job:
+            log_error(f"Job #{job_id} not found.")
+            return
+        while not os.path.exists(job.log_path) and not job.done.is_set():
+            time.sleep(poll)
+        try:
+            with open(job.log_path, "r", errors="replace") as f:
+                while True:
+                    line = f.readline()
+                    if line:
+                        print(line.rstrip("\n"))
+                        continue
+                    if job.done.is_set():
+                        break
+                    time.sleep(poll)
+        except FileNotFoundError:
+            pass
+        except KeyboardInterrupt:
+            print("")
+            log_warn(f"Detached from job #{job_id} (still {job.status}).")
+
+    def show(self) -> None:
+        jobs = self.list()
+        if not jobs:
+            print("No jobs.")
+            return
+        print(f"\n{Colors.HEADER}Jobs{Colors.ENDC}")
+        print(f"{'ID':<5} {'Status':<8} {'Elapsed':>8} {'Lines':>7}  {'Target':<16} {'Command'}")
+        print("-" * 90)
+        for job in jobs:
+            color = {RUNNING: Colors.OKCYAN, DONE: Colors.OKGREEN, FAILED: Colors.FAIL,
+                     KILLED: Colors.WARNING}.get(job.status, "")
+            cmd = job.cmd if len(job.cmd) <= 45 else job.cmd[:42] + "..."
+            print(f"{job.id:<5} {color}{job.status:<8}{Colors.ENDC} {job.elapsed:>7.0f}s {job.lines:>7}  "
+                  f"{job.target[:16]:<16} {cmd}")
+        print("")
+
+    def announce(self, job: Job) -> None:
+        log_success(f"Started job #{job.id}: {job.cmd}")
@@ -1,78 +1,352 @@
+import bisect
+import contextlib
 import json
 import os
+import re
 import time
-from typing import List, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from .colors import Colors, log_success, log_error, log_warn
+from .storage import locked, read_json, write_text, file_version
+
+INDEXED_FIELDS = ("type", "target", "service")
+SORT_FIELDS = ("id", "timestamp", "type", "target", "service", "content")
+PAGE_SIZE = 50
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+RELATIVE_TIME = re.compile(r"^(\d+)([smhdw])$")
+TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_time(value: str, end: bool = False) -> str:
+    """
+    Turn '2h' / '3d' (ago), '2024-05-01' or '2024-05-01 13:00[:00]' into a
+    timestamp string comparable with the stored ones. With end, a bare date
+    means the end of that day.
+    """
+    m = RELATIVE_TIME.match(value)
+    if m:
+        return time.strftime(TIME_FORMAT, time.localtime(time.time() - int(m.group(1)) * TIME_UNITS[m.group(2)]))
+    value = value.replace("T", " ")
+    for fmt in (TIME_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            stamp = time.strftime(TIME_FORMAT, time.strptime(value, fmt))
+            return stamp[:10] + " 23:59:59" if end and fmt == "%Y-%m-%d" else stamp
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time '{value}' (use 2h, 3d, YYYY-MM-DD or 'YYYY-MM-DD HH:MM')")
+
+
+def parse_query(args: List[str]) -> Dict[str, Any]:
+    """
+    Parse loot search terms into keyword arguments for LootManager.search().
+
+        type=hash,ntlm  target=10.0.0.5  service=smb      exact match (comma = any of)
+        service~smb     target~^10\.0\.                  regex match
+        content~^admin  or a bare word                    regex on content
+        since=2h  until=2024-05-01                         time range
+        sort=-timestamp                                    sort field, '-' for descending
+        page=2  limit=100                                  pagination
+    """
+    query: Dict[str, Any] = {"equals": {}, "regex": {}}
+    for arg in args:
+        m = re.match(r"^(\w+)(=|~)(.*)$", arg)
+        if not m:
+            query["regex"]["content"] = arg
+            continue
+        field, op, value = m.groups()
+        field = field.lower()
+        if field in ("since", "until"):
+            query[field] = parse_time(value, end=field == "until")
+        elif field == "sort":
+            query["reverse"] = value.startswith("-")
+            query["sort"] = value.lstrip("-+")
+            if query["sort"] not in SORT_FIELDS:
+                raise ValueError(f"Cannot sort by '{query['sort']}' (choose from: {', '.join(SORT_FIELDS)})")
+        elif field in ("page", "limit"):
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError(f"{field} must be a positive number")
+            query[field] = int(value)
+        elif field in SORT_FIELDS and field != "id" and op == "~":
+            try:
+                re.compile(value)
+            except re.error as e:
+                raise ValueError(f"Invalid regex '{value}': {e}")
+            query["regex"][field] = value
+        elif field in INDEXED_FIELDS or field == "content":
+            query["equals"][field] = value.split(",")
+        else:
+            raise ValueError(f"Unknown search field '{field}'")
+    return query
+
+
+class LootIndex:
+    """
+    Secondary indexes over one snapshot of the locker: ID -> entry, value ->
+    entries for type/target/service, and timestamps kept sorted for range
+    queries. Built lazily and thrown away whenever the file changes.
+    """
+
+    def __init__(self, entries: List[Dict]) -> None:
+        self.by_id: Dict[int, Dict] = {}
+        self.by_field: Dict[str, Dict[str, List[Dict]]] = {f: {} for f in INDEXED_FIELDS}
+        for entry in entries:
+            self.by_id[entry.get("id")] = entry
+            for field, index in self.by_field.items():
+                index.setdefault(entry.get(field, ""), []).append(entry)
+        # Appends are mostly in time order, so this sort is close to linear
+        self.by_time = sorted(entries, key=lambda e: e.get("timestamp", ""))
+        self.times = [e.get("timestamp", "") for e in self.by_time]
+
+    def time_range(self, since: Optional[str], until: Optional[str]) -> List[Dict]:
+        lo = bisect.bisect_left(self.times, since) if since else 0
+        # until is inclusive to the second
+        hi = bisect.bisect_right(self.times, until) if until else len(self.times)
+        return self.by_time[lo:hi]
 
 class LootManager:
+    """
+    Loot locker for a workspace (<workspace>_loot.json).
+
+    Every change re-reads the file under its lock, applies the change and
+    writes it back atomically, so several red processes can add loot to the
+    same workspace without losing entries. IDs come from a persisted
+    counter and are never reused after a remove.
+    """
+
     def __init__(self, workspace_dir: str, workspace_name: str):
         self.workspace_dir = workspace_dir
         self.workspace_name = workspace_name
         self.loot_file = os.path.join(workspace_dir, f"{workspace_name}_loot.json")
-        self.loot_data: List[Dict] = []
+        self._entries: List[Dict] = []
+        self._index: Optional[LootIndex] = None
+        self.next_id = 1
+        self._version = None
         self.load()
 
+    @property
+    def loot_data(self) -> List[Dict]:
+        """Current entries, reloaded if another process changed the file."""
+        self.refresh()
+        return self._entries
+
+    @property
+    def index(self) -> LootIndex:
+        """Indexes over the current entries, rebuilt only after the file changed."""
+        self.refresh()
+        if self._index is None:
+            self._index = LootIndex(self._entries)
+        return self._index
+
+    @staticmethod
+    def _normalize(data) -> Dict:
+        """Accept the legacy plain-list format as well as {"next_id", "loot"}."""
+        if data is None:
+            return {"next_id": 1, "loot": []}
+        if isinstance(data, list):
+            next_id = max((e.get("id", 0) for e in data), default=0) + 1
+            return {"next_id": next_id, "loot": data}
+        data.setdefault("loot", [])
+        data.setdefault("next_id", max((e.get("id", 0) for e in data["loot"]), default=0) + 1)
+        return data
+
+    @staticmethod
+    def _serialize(data: Dict) -> str:
+        """One entry per line: greppable, and fast to write even for very large lockers."""
+        entries = ",\n        ".join(json.dumps(e) for e in data["loot"])
+        body = f"\n        {entries}\n    " if entries else ""
+        return f'{{\n    "next_id": {data["next_id"]},\n    "loot": [{body}]\n}}\n'
+
+    @staticmethod
+    def entry_key(entry: Dict) -> Tuple[str, str, str]:
+        """Identity used for dedup: same type, content and target."""
+        return entry.get("type", ""), entry.get("content", ""), entry.get("target", "")
+
+    def _apply(self, data: Dict) -> None:
+        self._entries = data["loot"]
+        self._index = None
+        self.next_id = data["next_id"]
+        self._version = file_version(self.loot_file)
+
     def load(self):
         """Load loot from disk."""
-        if os.path.exists(self.loot_file):
-            try:
-                with open(self.loot_file, 'r') as f:
-                    self.loot_data = json.load(f)
-            except Exception as e:
-                log_error(f"Failed to load loot: {e}")
-                self.loot_data = []
-        else:
-            self.loot_data = []
+        try:
+            with locked(self.loot_file, shared=True):
+                self._apply(self._normalize(read_json(self.loot_file)))
+        except Exception as e:
+            log_error(f"Failed to load loot: {e}")
+            self._entries = []
+            self._index = None
+
+    def refresh(self) -> None:
+        if file_version(self.loot_file) != self._version:
+            self.load()
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[Dict]:
+        """Re-read the file under its lock, let the caller change it, write it back atomically."""
+        with locked(self.loot_file):
+            data = self._normalize(read_json(self.loot_file))
+            yield data
+            write_text(self.loot_file, self._serialize(data))
+            self._apply(data)
 
     def save(self):
-        """Save loot to disk."""
+        """Write any in-memory entries missing from disk (merge, never overwrite other writers)."""
         try:
-            with open(self.loot_file, 'w') as f:
-                json.dump(self.loot_data, f, indent=4)
+            with self.transaction() as data:
+                known = {e.get("id") for e in data["loot"]}
+                for entry in self._entries:
+                    if entry.get("id") not in known:
+                        data["loot"].append(entry)
+                        data["next_id"] = max(data["next_id"], entry.get("id", 0) + 1)
         except Exception as e:
             log_error(f"Failed to save loot: {e}")
 
-    def add(self, content: str, loot_type: str = "cred", service: str = "", target: str = "") -> None:
+    def add(self, content: str, loot_type: str = "cred", service: str = "", target: str = "",
+            unique: bool = False, quiet: bool = False) -> Optional[Dict]:
         """
         Add a new loot entry.
         content: The captured data (e.g., "admin:pass123" or hash)
         loot_type: "cred", "hash", "file", etc.
+        unique: skip (and return None) if the same type/content/target is already stored
         """
-        entry = {
-            "id": len(self.loot_data) + 1,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "type": loot_type,
-            "content": content,
-            "service": service,
-            "target": target
-        }
-        self.loot_data.append(entry)
-        self.save()
-        log_success(f"Added loot: {content} ({loot_type})")
+        try:
+            with self.transaction() as data:
+                if unique and any(e.get("content") == content and e.get("type") == loot_type
+                                  and e.get("target") == target for e in data["loot"]):
+                    return None
+                entry = {
+                    "id": data["next_id"],
+                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "type": loot_type,
+                    "content": content,
+                    "service": service,
+                    "target": target
+                }
+                data["next_id"] += 1
+                data["loot"].append(entry)
+        except Exception as e:
+            log_error(f"Failed to save loot: {e}")
+            return None
+        if not quiet:
+            log_success(f"Added loot: {content} ({loot_type})")
+        return entry
+
+    def add_many(self, items: Iterable[Tuple[str, str, str, str]], unique: bool = True) -> List[Dict]:
+        """
+        Add (type, content, service, target) tuples in a single transaction.
+        With unique, items already stored (same type/content/target) are skipped.
+        Returns the new entries.
+        """
+        added = []
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with self.transaction() as data:
+                index = {self.entry_key(e) for e in data["loot"]} if unique else set()
+                next_id = data["next_id"]
+                for loot_type, content, service, target in items:
+                    key = (loot_type, content, target)
+                    if key in index:
+                        continue
+                    index.add(key)
+                    added.append({"id": next_id, "timestamp": timestamp, "type": loot_type,
+                                  "content": content, "service": service, "target": target})
+                    next_id += 1
+                if not added:
+                    return []
+                data["loot"].extend(added)
+                data["next_id"] = next_id
+        except Exception as e:
+            log_error(f"Failed to save loot: {e}")
+            return []
+        return added
+
+    def get(self, loot_id: int) -> Optional[Dict]:
+        """Entry by ID (index lookup)."""
+        return self.index.by_id.get(loot_id)
+
+    def ids(self) -> List[int]:
+        return list(self.index.by_id)
+
+    def search(self, equals: Optional[Dict[str, List[str]]] = None, regex: Optional[Dict[str, str]] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               sort: str = "id", reverse: bool = False, **_) -> List[Dict]:
+        """
+        Entries matching every filter (see parse_query), sorted.
+
+        The most selective index (an exact-match field or the time range)
+        provides the candidates; remaining filters are checked on those only.
+        """
+        index = self.index
+        equals = equals or {}
+        candidates: List[List[Dict]] = []
+        for field, values in equals.items():
+            if field in index.by_field:
+                candidates.append([e for v in values for e in index.by_field[field].get(v, [])])
+        if since or until:
+            candidates.append(index.time_range(since, until))
+        rows = min(candidates, key=len) if candidates else self._entries
+
+        patterns = {field: re.compile(p, re.IGNORECASE) for field, p in (regex or {}).items()}
+        wanted = {field: set(values) for field, values in equals.items()}
+        result = []
+        for entry in rows:
+            if any(entry.get(f, "") not in values for f, values in wanted.items()):
+                continue
+            stamp = entry.get("timestamp", "")
+            if (since and stamp < since) or (until and stamp > until):
+                continue
+            if any(not p.search(str(entry.get(f, ""))) for f, p in patterns.items()):
+                continue
+            result.append(entry)
+        # Index candidates are not necessarily in ID order
+        if sort != "id" or reverse or rows is not self._entries:
+            result.sort(key=lambda e: (e.get(sort, ""), e.get("id", 0)), reverse=reverse)
+        return result
 
     def remove(self, loot_id: int) -> bool:
         """Remove a loot entry by ID."""
-        for i, entry in enumerate(self.loot_data):
-            if entry.get("id") == loot_id:
-                removed = self.loot_data.pop(i)
-                self.save()
-                log_success(f"Removed loot #{loot_id}")
-                return True
+        removed = False
+        try:
+            with self.transaction() as data:
+                before = len(data["loot"])
+                data["loot"] = [e for e in data["loot"] if e.get("id") != loot_id]
+                removed = len(data["loot"]) < before
+        except Exception as e:
+            log_error(f"Failed to save loot: {e}")
+            return False
+        if removed:
+            log_success(f"Removed loot #{loot_id}")
+            return True
         log_error(f"Loot #{loot_id} not found.")
         return False
 
     def clear(self):
-        """Clear all loot."""
-        self.loot_data = []
-        self.save()
+        """Clear all loot (IDs keep counting up)."""
+        try:
+            with self.transaction() as data:
+                data["loot"] = []
+        except Exception as e:
+            log_error(f"Failed to save loot: {e}")
+            return
         log_success("Loot locker cleared.")
 
-    def list_loot(self):
-        """Print a formatted table of loot."""
-        if not self.loot_data:
-            print("Loot locker is empty.")
+    def list_loot(self, entries: Optional[List[Dict]] = None, page: int = 1, limit: int = PAGE_SIZE):
+        """Print a formatted table of loot (all entries, or a search result), one page at a time."""
+        if entries is None:
+            entries = self.loot_data
+            if not entries:
+                print("Loot locker is empty.")
+                return
+        elif not entries:
+            print("No matching loot.")
             return
 
+        total = len(entries)
+        pages = (total + limit - 1) // limit
+        page = min(max(page, 1), pages)
+        start = (page - 1) * limit
+        shown = entries[start:start + limit]
+
         print(f"\n{Colors.HEADER}Loot Locker ({self.workspace_name}){Colors.ENDC}")
         
         # Columns: ID, Type, Target, Service, Content
@@ -88,7 +362,7 @@ class LootManager:
         print(f"{Colors.BOLD}{header_str}{Colors.ENDC}")
         print("-" * len(header_str))
         
-        for entry in self.loot_data:
+        for entry in shown:
             row = ""
             row += f"{str(entry.get('id', '?')):<{widths[0]}} "
             row += f"{entry.get('type', 'unk'):<{widths[1]}} "
@@ -101,6 +375,8 @@ class LootManager:
             row += f"{content:<{widths[4]}} "
             
             print(row)
+        if pages > 1:
+            print(f"{Colors.OKBLUE}Showing {start + 1}-{start + len(shown)} of {total} (page {page}/{pages}){Colors.ENDC}")
         print("")
 
     def set_workspace(self, workspace_name: str):
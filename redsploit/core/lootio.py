@@ -0,0 +1,284 @@
+import csv
+import io
+import itertools
+import json
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from .parsers import NetexecParser, SecretsdumpParser, NXC_PREFIX, SAM_HASH
+
+# (type, content, service, target)
+LootItem = Tuple[str, str, str, str]
+
+IMPORT_FORMATS = ("auto", "secretsdump", "pwdump", "netexec", "potfile")
+
+NT_RE = re.compile(r"^[0-9a-fA-F]{32}$")
+# secretsdump -outputfile *.ntds.cleartext / LSA: DOMAIN\user:CLEARTEXT:password
+CLEARTEXT_RE = re.compile(r"^(?P<user>[^:\s]+):CLEARTEXT:(?P<password>.*)$")
+# NetNTLMv2 (hashcat 5600): user::domain:challenge:ntproofstr:blob
+NETNTLMV2_RE = re.compile(r"^(?P<user>[^:]+)::(?P<domain>[^:]*):[0-9a-fA-F]{16}:[0-9a-fA-F]{32}:[0-9a-fA-F]+$")
+KRB_TGS_RE = re.compile(r"^\$krb5tgs\$\d+\$\*(?P<user>[^$*]+)\$")
+KRB_ASREP_RE = re.compile(r"^\$krb5asrep\$(?:\d+\$)?(?P<user>[^@:$]+)@")
+
+
+def detect_format(lines: List[str]) -> str:
+    """Guess the import format from the first lines of a file."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if NXC_PREFIX.match(line):
+            return "netexec"
+        if line.startswith("[*] ") or SAM_HASH.match(line) or CLEARTEXT_RE.match(line):
+            return "secretsdump"
+        return "potfile"
+    return "secretsdump"
+
+
+def split_potfile_line(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Split 'hash:plain'. The plaintext is after the last colon for most modes;
+    hashcat writes $HEX[...] for plaintexts it could not print.
+    """
+    line = line.rstrip("\r\n")
+    if ":" not in line:
+        return None
+    hash_part, plain = line.rsplit(":", 1)
+    if plain.startswith("$HEX[") and plain.endswith("]"):
+        try:
+            plain = bytes.fromhex(plain[5:-1]).decode("utf-8", errors="replace")
+        except ValueError:
+            pass
+    return hash_part, plain
+
+
+def potfile_user(hash_part: str) -> str:
+    """Account name embedded in a cracked hash, if the format carries one."""
+    for regex in (NETNTLMV2_RE, KRB_TGS_RE, KRB_ASREP_RE):
+        m = regex.match(hash_part)
+        if m:
+            user = m.group("user")
+            domain = m.groupdict().get("domain")
+            return f"{domain}\\{user}" if domain else user
+    return ""
+
+
+class Importer:
+    """
+    Streams a dump file into loot.
+
+    Lines are read and parsed in batches, normalized into typed (type,
+    content, service, target) items and deduplicated through a key index, so
+    memory grows with the number of distinct findings, not the file size.
+    Everything is committed to the locker in one transaction at the end.
+    """
+
+    def __init__(self, loot, fmt: str = "auto", target: str = "", batch_size: int = 10000) -> None:
+        self.loot = loot
+        self.fmt = fmt
+        self.target = target
+        self.batch_size = batch_size
+        self.lines = 0
+        self.parsed = 0
+        self._nt_owners: Optional[Dict[str, List[Tuple[str, str]]]] = None
+
+    def _items_for(self, fmt: str, batch: List[str], parser) -> Iterator[LootItem]:
+        if fmt == "potfile":
+            for line in batch:
+                yield from self._potfile_items(line)
+            return
+        for line in batch:
+            if fmt != "netexec":
+                m = CLEARTEXT_RE.match(line.strip())
+                if m:
+                    yield "cred", f"{m.group('user')}:{m.group('password')}", "ntds cleartext", self.target
+                    continue
+            for finding in parser.feed(line.rstrip("\r\n")):
+                f = finding.fields
+                if finding.kind == "loot":
+                    service = f["service"]
+                    if fmt == "pwdump":
+                        service = "pwdump"
+                    elif fmt == "secretsdump" and not parser.section:
+                        # -outputfile dumps have no "[*] Dumping ..." headers
+                        service = "ntds"
+                    yield f["type"], f["content"], service, f["target"] or self.target
+
+    def _potfile_items(self, line: str) -> Iterator[LootItem]:
+        split = split_potfile_line(line)
+        if not split or not split[0]:
+            return
+        hash_part, plain = split
+        if NT_RE.match(hash_part):
+            # NT potfile lines carry no user: resolve through the stored user:nthash entries
+            owners = self.nt_owners().get(hash_part.lower(), [])
+            for user, target in owners:
+                yield "cred", f"{user}:{plain}", "cracked", target or self.target
+            if owners:
+                return
+        user = potfile_user(hash_part)
+        if user:
+            yield "cred", f"{user}:{plain}", "cracked", self.target
+        else:
+            yield "cracked", f"{hash_part}:{plain}", "potfile", self.target
+
+    def nt_owners(self) -> Dict[str, List[Tuple[str, str]]]:
+        """Index of stored NT hashes -> [(user, target)]."""
+        if self._nt_owners is None:
+            self._nt_owners = {}
+            for entry in self.loot.loot_data:
+                if entry.get("type") not in ("hash", "ntlm"):
+                    continue
+                user, _, nt = entry.get("content", "").rpartition(":")
+                if user and NT_RE.match(nt):
+                    self._nt_owners.setdefault(nt.lower(), []).append((user, entry.get("target", "")))
+        return self._nt_owners
+
+    def parse(self, lines: Iterable[str]) -> Iterator[LootItem]:
+        """Normalized, de-duplicated items from a stream of lines."""
+        lines = iter(lines)
+        head = list(itertools.islice(lines, 20))
+        fmt = detect_format(head) if self.fmt == "auto" else self.fmt
+        self.fmt = fmt
+        parser = NetexecParser(self.target) if fmt == "netexec" else SecretsdumpParser(self.target)
+        seen = set()
+        stream = itertools.chain(head, lines)
+        while True:
+            batch = list(itertools.islice(stream, self.batch_size))
+            if not batch:
+                break
+            self.lines += len(batch)
+            for item in self._items_for(fmt, batch, parser):
+                self.parsed += 1
+                key = (item[0], item[1], item[3])
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield item
+
+    def run(self, path: str) -> List[Dict]:
+        """Import a file ('-' for stdin). Returns the entries added to the locker."""
+        # Parse before taking the locker's exclusive lock: resolving NT potfile lines
+        # reads the locker (shared lock), which would block on our own transaction
+        if path == "-":
+            items = list(self.parse(sys.stdin))
+        else:
+            with open(path, "r", errors="replace") as f:
+                items = list(self.parse(f))
+        return self.loot.add_many(items)
+
+
+# Export
+
+EXPORT_FORMATS = ("hashcat", "john", "csv", "jsonl")
+CSV_FIELDS = ("id", "timestamp", "type", "target", "service", "content")
+
+# name -> hashcat mode
+HASH_MODES = {
+    "ntlm": 1000,
+    "dcc2": 2100,
+    "netntlmv2": 5600,
+    "kerberoast": 13100,
+    "asrep": 18200,
+    "kerberoast-aes128": 19600,
+    "kerberoast-aes256": 19700,
+}
+JOHN_FORMATS = {1000: "nt", 2100: "mscash2", 5600: "netntlmv2", 13100: "krb5tgs", 18200: "krb5asrep",
+                19600: "krb5tgs-aes128", 19700: "krb5tgs-aes256"}
+# Loot types that never hold a crackable hash
+PLAIN_TYPES = ("cred", "user", "share", "cracked", "file")
+
+KRB_TGS_ETYPES = {"23": 13100, "17": 19600, "18": 19700}
+
+
+def hash_mode(entry: Dict) -> Optional[Tuple[int, str, str]]:
+    """
+    Classify a loot entry as a crackable hash: (hashcat mode, user, hash),
+    or None. Works from the content so hashes added by hand are found too.
+    """
+    if entry.get("type") in PLAIN_TYPES:
+        return None
+    content = entry.get("content", "").strip()
+    if content.startswith("$DCC2$"):
+        user = content.split("#")[1] if content.count("#") >= 2 else ""
+        return 2100, user, content
+    if content.startswith("$krb5tgs$"):
+        etype = content.split("$")[2]
+        m = KRB_TGS_RE.match(content)
+        return KRB_TGS_ETYPES.get(etype, 13100), m.group("user") if m else "", content
+    if content.startswith("$krb5asrep$"):
+        m = KRB_ASREP_RE.match(content)
+        return 18200, m.group("user") if m else "", content
+    m = NETNTLMV2_RE.match(content)
+    if m:
+        return 5600, m.group("user"), content
+    user, _, nt = content.rpartition(":")
+    if NT_RE.match(nt):
+        return 1000, user, nt.lower()
+    return None
+
+
+def resolve_mode(value: str) -> int:
+    """Hashcat mode from a number or a HASH_MODES name."""
+    if value.isdigit() and int(value) in JOHN_FORMATS:
+        return int(value)
+    if value.lower() in HASH_MODES:
+        return HASH_MODES[value.lower()]
+    names = ", ".join(f"{k} ({v})" for k, v in HASH_MODES.items())
+    raise ValueError(f"Unsupported hash mode '{value}'. Choose from: {names}")
+
+
+def mode_counts(entries: Iterable[Dict]) -> Dict[int, int]:
+    counts: Dict[int, int] = {}
+    for entry in entries:
+        classified = hash_mode(entry)
+        if classified:
+            counts[classified[0]] = counts.get(classified[0], 0) + 1
+    return counts
+
+
+def export_lines(entries: Iterable[Dict], fmt: str, mode: Optional[int] = None,
+                 with_user: bool = False) -> Iterator[str]:
+    """
+    Lines (without newline) for an export format, generated one entry at a
+    time. hashcat/john output only contains entries of the given mode (all
+    hash entries if None); bare hashcat hashes are written once each.
+    """
+    if fmt == "jsonl":
+        for entry in entries:
+            yield json.dumps(entry)
+        return
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="")
+        for row in itertools.chain([CSV_FIELDS], ([e.get(f, "") for f in CSV_FIELDS] for e in entries)):
+            writer.writerow(row)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        return
+
+    seen = set()
+    for entry in entries:
+        classified = hash_mode(entry)
+        if not classified or (mode is not None and classified[0] != mode):
+            continue
+        found, user, value = classified
+        user = user.split("\\")[-1]
+        # NetNTLMv2 and Kerberos hashes already carry the account name
+        prefixed = found in (1000, 2100) and user and (fmt == "john" or with_user)
+        line = f"{user}:{value}" if prefixed else value
+        if not prefixed:
+            if line in seen:
+                continue
+            seen.add(line)
+        yield line
+
+
+def export(entries: List[Dict], fmt: str, out: TextIO, mode: Optional[int] = None, with_user: bool = False) -> int:
+    """Write an export to an open stream. Returns the number of lines written (CSV header excluded)."""
+    written = 0
+    for line in export_lines(entries, fmt, mode, with_user):
+        out.write(line + "\n")
+        written += 1
+    return written - 1 if fmt == "csv" else written
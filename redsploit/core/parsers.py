@@ -0,0 +1,334 @@
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple, Type
+from .colors import log_success
+from .spray import is_nt_hash
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+
+class Finding:
+    """Something worth keeping that a parser saw in tool output."""
+
+    # kind: "loot" (type/content/service/target), "host" or "service" (inventory)
+    def __init__(self, kind: str, **fields) -> None:
+        self.kind = kind
+        self.fields = fields
+
+    def key(self) -> Tuple:
+        return (self.kind,) + tuple(sorted(self.fields.items()))
+
+
+def loot(loot_type: str, content: str, service: str = "", target: str = "") -> Finding:
+    return Finding("loot", type=loot_type, content=content, service=service, target=target)
+
+
+class ToolParser:
+    """
+    Incremental, line-oriented parser for one tool's output.
+
+    feed() is called once per output line as it is produced and returns the
+    findings that line completes; state needed across lines (current host,
+    current section) lives on the instance. close() flushes anything still
+    pending when the tool exits.
+    """
+
+    def __init__(self, target: str = "") -> None:
+        self.target = target
+
+    def feed(self, line: str) -> List[Finding]:
+        raise NotImplementedError
+
+    def close(self) -> List[Finding]:
+        return []
+
+
+# netexec: "SMB  10.0.0.5  445  DC01  [+] CORP\user:pass (Pwn3d!)"
+NXC_PREFIX = re.compile(r"^(?P<proto>[A-Z]+)\s+(?P<ip>\S+)\s+(?P<port>\d+)\s+(?P<host>\S+)\s+(?P<msg>.*)$")
+# The secret runs to the end of the line (passwords may contain spaces), minus netexec's status markers
+NXC_LOGIN = re.compile(r"^\[\+\]\s+(?P<user>[^\s:]+):(?P<secret>.*?)(?P<rest>(?:\s+\((?:Pwn3d!|Guest|admin)\))*)\s*$")
+NXC_INFO = re.compile(r"^\[\*\]\s+(?P<os>.+?)\s+\(name:(?P<name>[^)]*)\)\s+\(domain:(?P<domain>[^)]*)\)")
+SAM_HASH = re.compile(r"^(?P<user>[^:\s]+):(?P<rid>\d+):(?P<lm>[0-9a-fA-F]{32}):(?P<nt>[0-9a-fA-F]{32}):::")
+
+
+class NetexecParser(ToolParser):
+    """Valid logins, dumped SAM/NTDS hashes, host info and readable shares."""
+
+    def __init__(self, target: str = "") -> None:
+        super().__init__(target)
+        self.in_shares = False
+
+    def feed(self, line: str) -> List[Finding]:
+        m = NXC_PREFIX.match(line)
+        if not m:
+            return []
+        proto, ip, port, msg = m.group("proto").lower(), m.group("ip"), int(m.group("port")), m.group("msg").strip()
+        findings = []
+
+        info = NXC_INFO.match(msg)
+        if info:
+            findings.append(Finding("host", address=ip, hostname=info.group("name"), os=info.group("os")))
+            findings.append(Finding("service", address=ip, port=port, name=proto))
+            return findings
+
+        login = NXC_LOGIN.match(msg)
+        if login and login.group("secret"):
+            # Stored without the DOMAIN\ prefix, for credentials and hashes alike
+            user, secret = login.group("user").split("\\")[-1], login.group("secret")
+            service = f"{proto} (admin)" if "Pwn3d!" in login.group("rest") else proto
+            if is_nt_hash(secret):
+                findings.append(loot("hash", f"{user}:{secret.split(':')[-1]}", service, ip))
+            elif secret:
+                findings.append(loot("cred", f"{user}:{secret}", service, ip))
+            return findings
+
+        sam = SAM_HASH.match(msg)
+        if sam:
+            findings.append(loot("hash", f"{sam.group('user')}:{sam.group('nt').lower()}", f"{proto} sam", ip))
+            return findings
+
+        # Share table: "[*] Enumerated shares", header, dashes, then one row per share
+        if msg.startswith("[*] Enumerated shares"):
+            self.in_shares = True
+        elif self.in_shares:
+            if msg.startswith("[") or not msg:
+                self.in_shares = False
+            elif not msg.startswith(("Share ", "-----")):
+                parts = re.split(r"\s{2,}", msg)
+                if len(parts) >= 2 and ("READ" in parts[1] or "WRITE" in parts[1]):
+                    findings.append(loot("share", f"\\\\{ip}\\{parts[0]}", f"smb {parts[1]}", ip))
+        return findings
+
+
+SMBMAP_HOST = re.compile(r"\[\+\]\s+IP:\s*(?P<ip>[^:\s]+)(?::\d+)?")
+
+
+class SmbmapParser(ToolParser):
+    """Shares with READ/WRITE access, attributed to the current "[+] IP:" block."""
+
+    def __init__(self, target: str = "") -> None:
+        super().__init__(target)
+        self.host = target
+
+    def feed(self, line: str) -> List[Finding]:
+        m = SMBMAP_HOST.search(line)
+        if m:
+            self.host = m.group("ip")
+            return []
+        parts = [p.strip() for p in line.strip().split("\t") if p.strip()]
+        if len(parts) < 2 and "  " in line.strip():
+            parts = re.split(r"\s{2,}", line.strip())
+        if len(parts) >= 2 and parts[0] not in ("Disk", "----") and re.match(r"^(READ|WRITE)", parts[1]):
+            return [loot("share", f"\\\\{self.host}\\{parts[0]}", f"smb {parts[1]}", self.host)]
+        return []
+
+
+SECRETSDUMP_DCC2 = re.compile(r"^(?P<user>[^:\s]+):(?P<hash>\$DCC2\$[^:\s]+)")
+SECRETSDUMP_PLAIN = re.compile(r"^(?P<user>[^:\s]+\\[^:\s]+|\(Unknown User\)):(?P<password>.+)$")
+
+
+class SecretsdumpParser(ToolParser):
+    """SAM/NTDS NT hashes, cached DCC2 hashes and DefaultPassword LSA secrets."""
+
+    def __init__(self, target: str = "") -> None:
+        super().__init__(target)
+        self.section = ""
+
+    def feed(self, line: str) -> List[Finding]:
+        line = line.strip()
+        if line.startswith("[*] "):
+            header = line[4:]
+            if header.startswith("Dumping local SAM"):
+                self.section = "sam"
+            elif header.startswith("Dumping cached domain"):
+                self.section = "cached"
+            elif header.startswith("Dumping Domain Credentials") or "NTDS.DIT" in header:
+                self.section = "ntds"
+            elif header.startswith("DefaultPassword"):
+                self.section = "defaultpassword"
+            elif not header.startswith("Using"):
+                self.section = "other"
+            return []
+
+        m = SAM_HASH.match(line)
+        if m:
+            user = m.group("user")
+            return [loot("hash", f"{user}:{m.group('nt').lower()}", f"smb {self.section or 'sam'}", self.target)]
+        if self.section == "cached":
+            m = SECRETSDUMP_DCC2.match(line)
+            if m:
+                return [loot("dcc2", m.group("hash"), "smb cached", self.target)]
+        if self.section == "defaultpassword":
+            m = SECRETSDUMP_PLAIN.match(line)
+            if m and m.group("user") != "(Unknown User)":
+                return [loot("cred", f"{m.group('user')}:{m.group('password')}", "smb lsa", self.target)]
+        return []
+
+
+KERBRUTE_USER = re.compile(r"\[\+\]\s+VALID USERNAME:\s+(?P<user>\S+)")
+KERBRUTE_LOGIN = re.compile(r"\[\+\]\s+VALID LOGIN:\s+(?P<user>[^:\s]+):(?P<password>.*)$")
+
+
+class KerbruteParser(ToolParser):
+    """Valid usernames, valid logins and AS-REP roastable hashes."""
+
+    def feed(self, line: str) -> List[Finding]:
+        m = KERBRUTE_LOGIN.search(line)
+        if m:
+            return [loot("cred", f"{m.group('user')}:{m.group('password')}", "kerberos", self.target)]
+        m = KERBRUTE_USER.search(line)
+        if m:
+            return [loot("user", m.group("user"), "kerberos", self.target)]
+        if line.strip().startswith("$krb5asrep$"):
+            return [loot("asrep", line.strip(), "kerberos", self.target)]
+        return []
+
+
+NMAP_REPORT = re.compile(r"^Nmap scan report for (?P<name>\S+)(?: \((?P<ip>[^)]+)\))?")
+NMAP_PORT = re.compile(r"^(?P<port>\d+)/(?P<proto>tcp|udp)\s+(?P<state>open)\s+(?P<name>\S+)(?:\s+(?P<version>.+))?$")
+NMAP_DISCOVERED = re.compile(r"^Discovered open port (?P<port>\d+)/(?P<proto>tcp|udp) on (?P<ip>\S+)")
+NMAP_OS = re.compile(r"^(?:OS details|Running):\s+(?P<os>.+)$")
+
+
+class NmapParser(ToolParser):
+    """Hosts, open ports with service versions and OS guesses into the inventory."""
+
+    def __init__(self, target: str = "") -> None:
+        super().__init__(target)
+        self.host = ""
+
+    def feed(self, line: str) -> List[Finding]:
+        line = line.rstrip()
+        m = NMAP_DISCOVERED.match(line)
+        if m:
+            return [Finding("service", address=m.group("ip"), port=int(m.group("port")), proto=m.group("proto"))]
+        m = NMAP_REPORT.match(line)
+        if m:
+            name, ip = m.group("name"), m.group("ip")
+            self.host = ip or name
+            return [Finding("host", address=self.host, hostname=name if ip else "")]
+        if not self.host:
+            return []
+        m = NMAP_PORT.match(line)
+        if m:
+            version = (m.group("version") or "").strip()
+            return [Finding("service", address=self.host, port=int(m.group("port")), proto=m.group("proto"),
+                            name=m.group("name"), product=version)]
+        m = NMAP_OS.match(line)
+        if m:
+            return [Finding("host", address=self.host, os=m.group("os"))]
+        return []
+
+
+RUSTSCAN_OPEN = re.compile(r"^Open (?P<ip>[^\s:]+):(?P<port>\d+)")
+
+
+class RustscanParser(NmapParser):
+    """Open ports as rustscan finds them, then the nmap output it hands off to."""
+
+    def feed(self, line: str) -> List[Finding]:
+        m = RUSTSCAN_OPEN.match(line.strip())
+        if m:
+            return [Finding("service", address=m.group("ip"), port=int(m.group("port")))]
+        return super().feed(line)
+
+
+# Parsers keyed by tool name (InfraModule.TOOLS keys)
+PARSERS: Dict[str, Type[ToolParser]] = {
+    "netexec": NetexecParser,
+    "smbmap": SmbmapParser,
+    "secretsdump": SecretsdumpParser,
+    "kerbrute": KerbruteParser,
+    "nmap": NmapParser,
+    "rustscan": RustscanParser,
+}
+
+
+class OutputCollector:
+    """
+    Attaches a tool's parser to its output stream and records findings as
+    they appear: credentials, hashes and shares into loot, hosts and services
+    into the inventory. Findings are deduplicated per run and against the
+    stored loot, so repeated runs don't pile up copies.
+    """
+
+    FLUSH_EVERY = 25  # inventory changes batched per save
+    LOOT_FLUSH_EVERY = 100  # loot findings batched per locker write
+    LOOT_FLUSH_INTERVAL = 2.0  # seconds before pending loot is written anyway
+
+    def __init__(self, session, tool: str, parser: ToolParser, quiet: bool = False) -> None:
+        self.session = session
+        self.tool = tool
+        self.parser = parser
+        self.quiet = quiet
+        self.seen: Set[Tuple] = set()
+        self.counts = {"loot": 0, "host": 0, "service": 0}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._loot: List[Tuple[str, str, str, str]] = []
+        self._loot_since = time.monotonic()
+
+    def feed(self, line: str) -> None:
+        with self._lock:
+            try:
+                findings = self.parser.feed(ANSI_RE.sub("", line))
+            except Exception:
+                return  # a parser bug must never break the tool run
+            self._record(findings)
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._record(self.parser.close())
+            except Exception:
+                pass
+            self._flush_loot()
+            if self._unsaved:
+                self.session.inventory.save()
+                self._unsaved = 0
+
+    def _record(self, findings: List[Finding]) -> None:
+        for finding in findings:
+            key = finding.key()
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            f = finding.fields
+            if finding.kind == "loot":
+                if not self._loot:
+                    self._loot_since = time.monotonic()
+                self._loot.append((f["type"], f["content"], f.get("service", ""), f.get("target", "")))
+            elif finding.kind == "host":
+                self.session.inventory.add_host(f["address"], f.get("hostname", ""), f.get("os", ""), save=False)
+                self.counts["host"] += 1
+                self._unsaved += 1
+            elif finding.kind == "service":
+                self.session.inventory.add_service(f["address"], f["port"], f.get("proto", "tcp"),
+                                                   f.get("name", ""), f.get("product", ""), save=False)
+                self.counts["service"] += 1
+                self._unsaved += 1
+        if self._unsaved >= self.FLUSH_EVERY:
+            self.session.inventory.save()
+            self._unsaved = 0
+        if self._loot and (len(self._loot) >= self.LOOT_FLUSH_EVERY
+                           or time.monotonic() - self._loot_since >= self.LOOT_FLUSH_INTERVAL):
+            self._flush_loot()
+
+    def _flush_loot(self) -> None:
+        """Write pending loot in one locker transaction (duplicates of stored loot are skipped)."""
+        if not self._loot:
+            return
+        items, self._loot = self._loot, []
+        for entry in self.session.loot.add_many(items):
+            self.counts["loot"] += 1
+            if not self.quiet:
+                log_success(f"[{self.tool}] Looted {entry['type']}: {entry['content']}")
+
+
+def collector_for(session, tool: str, target: str = "", quiet: bool = False) -> Optional[OutputCollector]:
+    """OutputCollector for the tool, or None if no parser is registered for it."""
+    parser_cls = PARSERS.get(tool)
+    if not parser_cls:
+        return None
+    return OutputCollector(session, tool, parser_cls(target), quiet=quiet)
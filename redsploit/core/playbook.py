@@ -1,9 +1,19 @@
+import itertools
+import json
 import os
-import subprocess
-import yaml
+import re
 import time
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict
 from .colors import Colors, log_success, log_error, log_warn, log_info
+from .runner import run_command
+from .cache import FileCache, cached_playbooks, compile_playbook
+from .foreach import describe, iter_items, quote_vars
+from .parsers import collector_for
+
+DEFAULT_WORKERS = 4
+OUTPUT_TAIL = 2000  # characters of each item's output kept in the results file
+SLUG_RE = re.compile(r"[^A-Za-z0-9_.-]+")
 
 class PlaybookManager:
     def __init__(self, session):
@@ -11,36 +21,57 @@ class PlaybookManager:
         # Playbooks stored in playbooks/ at project root
         self.project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.playbooks_dir = os.path.join(self.project_root, "playbooks")
+        # Set for resource scripts: steps run without prompting
+        self.assume_yes = False
         
         if not os.path.exists(self.playbooks_dir):
             os.makedirs(self.playbooks_dir, exist_ok=True)
 
+    def available(self) -> List[Dict]:
+        """Playbook files with their name and description."""
+        files = sorted(f for f in os.listdir(self.playbooks_dir) if f.endswith('.yaml') or f.endswith('.yml'))
+        # Parsed once per file version (~/.redsploit/cache/playbooks.pickle)
+        compiled = cached_playbooks([os.path.join(self.playbooks_dir, f) for f in files], self.playbooks_dir)
+        playbooks = []
+        for f in files:
+            data = compiled[os.path.join(self.playbooks_dir, f)]
+            if data is None:
+                playbooks.append({"file": f, "name": f, "description": "Error reading file"})
+            else:
+                playbooks.append({"file": f, "name": data["name"], "description": data["description"]})
+        return playbooks
+
     def list_playbooks(self):
         """List available playbooks."""
-        files = [f for f in os.listdir(self.playbooks_dir) if f.endswith('.yaml') or f.endswith('.yml')]
+        playbooks = self.available()
         
-        if not files:
+        if not playbooks:
             print("No playbooks found in 'playbooks/' directory.")
             return
 
         print(f"\n{Colors.HEADER}Available Playbooks{Colors.ENDC}")
         print("=" * 40)
-        for f in sorted(files):
-            name = f
-            # Try to read description
-            try:
-                with open(os.path.join(self.playbooks_dir, f), 'r') as pf:
-                    data = yaml.safe_load(pf)
-                    desc = data.get('description', '')
-                    name = data.get('name', f)
-            except:
-                desc = "Error reading file"
-
-            print(f"{f:<20} {desc}")
+        for pb in playbooks:
+            print(f"{pb['file']:<20} {pb['description']}")
         print("")
 
-    def run_playbook(self, playbook_name: str):
-        """Execute a playbook."""
+    def _ask(self, prompt: str, answer: str) -> str:
+        """Prompt the operator, or return answer without reading stdin when assume_yes is set."""
+        if self.assume_yes:
+            print(f"{prompt}{answer} (auto)")
+            return answer
+        return input(prompt).lower()
+
+    def run_playbook(self, playbook_name: str, assume_yes: bool = False):
+        """Execute a playbook; with assume_yes every step runs without prompting."""
+        previous = self.assume_yes
+        self.assume_yes = previous or assume_yes
+        try:
+            self._run_playbook(playbook_name)
+        finally:
+            self.assume_yes = previous
+
+    def _run_playbook(self, playbook_name: str):
         # Handle file extension
         if not playbook_name.endswith('.yaml') and not playbook_name.endswith('.yml'):
             playbook_name += ".yaml"
@@ -52,11 +83,17 @@ class PlaybookManager:
             return
 
         try:
-            with open(path, 'r') as f:
-                data = yaml.safe_load(f)
+            cache = FileCache("playbooks")
+            data = cache.get(path, compile_playbook)
+            cache.flush()
         except Exception as e:
             log_error(f"Failed to load playbook: {e}")
             return
+        for error in data["errors"]:
+            log_warn(f"Playbook problem: {error}")
+        unknown = [p for p in data["placeholders"] if p not in self.session.env and p not in ("url", "domain", "hash")]
+        if unknown:
+            log_warn(f"Unknown placeholders: {', '.join(unknown)}")
 
         print(f"\n{Colors.HEADER}Running Playbook: {data.get('name', playbook_name)}{Colors.ENDC}")
         print(f"{data.get('description', '')}\n")
@@ -80,21 +117,27 @@ class PlaybookManager:
                 context['url'] = url if url else ""
                 context['domain'] = domain if domain else ""
                 context['hash'] = self.session.get("hash")
-                
-                # Check for Loot iteration? (Future scope)
-                
+
+                if step.get('foreach'):
+                    if not step.get('sources'):
+                        log_error(f"Invalid foreach, skipping step: {step['foreach']}")
+                        continue
+                    if not self._run_foreach(step, step_name, context):
+                        break
+                    continue
+
                 cmd = cmd_template.format(**context)
             except KeyError as e:
                 log_error(f"Missing variable for command: {e}")
                 log_warn(f"Command template: {cmd_template}")
-                if input("Continue anyway? (y/n) ").lower() != 'y':
+                if self._ask("Continue anyway? (y/n) ", "y") != 'y':
                     break
                 continue
             
             print(f"Command: {Colors.OKCYAN}{cmd}{Colors.ENDC}")
             
             # Interactive Check
-            action = input("[E]xecute, [S]kip, [Q]uit? ").lower()
+            action = self._ask("[E]xecute, [S]kip, [Q]uit? ", "e")
             
             if action == 'q':
                 break
@@ -104,13 +147,139 @@ class PlaybookManager:
             elif action == 'e' or action == '':
                 try:
                     log_info(f"Executing: {cmd}")
-                    subprocess.run(cmd, shell=True, check=True)
-                    log_success("Step complete.")
-                except subprocess.CalledProcessError as e:
-                     log_error(f"Step failed with exit code {e.returncode}")
+                    returncode, _ = run_command(self.session, cmd, target=context['domain'] or context['target'],
+                                                profile=step.get('profile', ''))
+                    if returncode == 0:
+                        log_success("Step complete.")
+                    else:
+                        log_error(f"Step failed with exit code {returncode}")
                 except Exception as e:
                      log_error(f"Execution error: {e}")
             else:
                 log_error("Invalid choice.")
         
         print("\nPlaybook execution finished.")
+
+    def _run_foreach(self, step: Dict, step_name: str, context: Dict) -> bool:
+        """
+        Run a foreach step: the cmd template is expanded per item (lazily, as
+        the pool has room) and the expansions run through a bounded worker
+        pool. Each item's status is printed as it finishes and its result
+        appended to <workspace>_playbooks/<timestamp>-<step>.jsonl; with
+        `tool:` set, output also goes through that tool's parser into loot
+        and inventory. Returns False if the operator quit the playbook.
+        """
+        sources = step['sources']
+        workers = int(step.get('parallel') or self.session.config.get("playbook", {}).get("workers", DEFAULT_WORKERS))
+        workers = max(workers, 1)
+        try:
+            items = iter_items(self.session, sources, self.playbooks_dir)
+            first = next(items, None)
+        except (OSError, ValueError) as e:
+            log_error(f"Cannot iterate {step['foreach']}: {e}")
+            return True
+        if first is None:
+            log_warn(f"Nothing to iterate for {step['foreach']}, skipping step.")
+            return True
+        items = itertools.chain([first], items)
+
+        print(f"Foreach: {step['foreach']} ({workers} workers)")
+        try:
+            print(f"Command: {Colors.OKCYAN}{step['cmd'].format(**dict(context, **quote_vars(first)))}{Colors.ENDC} (first item)")
+        except (KeyError, IndexError) as e:
+            log_error(f"Missing variable for command: {e}")
+            log_warn(f"Command template: {step['cmd']}")
+        action = self._ask("[E]xecute all, [S]kip, [Q]uit? ", "e")
+        if action == 'q':
+            return False
+        if action == 's':
+            log_warn("Skipping step...")
+            return True
+        if action not in ('e', ''):
+            log_error("Invalid choice.")
+            return True
+
+        results_path = self._results_path(step_name)
+        counts = {"ok": 0, "failed": 0, "error": 0}
+        started = time.time()
+        in_flight = {}
+        submitted = 0
+        try:
+            with open(results_path, "a") as results, ThreadPoolExecutor(max_workers=workers) as executor:
+                try:
+                    while True:
+                        # Keep the pool busy without expanding the whole source up front
+                        while len(in_flight) < workers * 2:
+                            values = next(items, None)
+                            if values is None:
+                                break
+                            submitted += 1
+                            fut = executor.submit(self._run_item, step, context, values)
+                            in_flight[fut] = (submitted, values)
+                        if not in_flight:
+                            break
+                        done, _ = wait(list(in_flight.keys()), return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            number, values = in_flight.pop(fut)
+                            result = fut.result()
+                            counts[result["status"]] += 1
+                            self._report_item(number, describe(values, sources), result)
+                            results.write(json.dumps(dict(result, item=values)) + "\n")
+                            results.flush()
+                except KeyboardInterrupt:
+                    log_warn(f"Interrupted, waiting for {len(in_flight)} running item(s)...")
+                    for fut in in_flight:
+                        fut.cancel()
+        except OSError as e:
+            log_error(f"Cannot write step results: {e}")
+            return True
+
+        total = sum(counts.values())
+        summary = f"{total} items in {time.time() - started:.1f}s: {counts['ok']} ok, {counts['failed']} failed, {counts['error']} errors"
+        if counts['failed'] or counts['error']:
+            log_warn(f"Step finished, {summary}")
+        else:
+            log_success(f"Step complete, {summary}")
+        log_info(f"Results saved to {results_path}")
+        return True
+
+    def _run_item(self, step: Dict, context: Dict, values: Dict) -> Dict:
+        """Expand and run one foreach item (worker thread). Bound values are shell-quoted."""
+        start = time.time()
+        try:
+            cmd = step['cmd'].format(**dict(context, **quote_vars(values)))
+        except (KeyError, IndexError) as e:
+            return {"status": "error", "cmd": step['cmd'], "returncode": None, "duration": 0.0,
+                    "output": f"Missing variable: {e}"}
+        target = values.get('host') or context['domain'] or values.get('target') or context['target']
+        try:
+            returncode, output = run_command(self.session, cmd, tool=step.get('tool', ''), target=target,
+                                             capture=True, timeout=step.get('timeout'),
+                                             profile=step.get('profile', ''))
+        except Exception as e:
+            return {"status": "error", "cmd": cmd, "returncode": None, "duration": time.time() - start,
+                    "output": str(e)}
+        if step.get('tool'):
+            collector = collector_for(self.session, step['tool'], target, quiet=True)
+            if collector:
+                for line in output.splitlines():
+                    collector.feed(line)
+                collector.close()
+        return {"status": "ok" if returncode == 0 else "failed", "cmd": cmd, "returncode": returncode,
+                "duration": round(time.time() - start, 3), "output": output[-OUTPUT_TAIL:]}
+
+    def _report_item(self, number: int, label: str, result: Dict) -> None:
+        if result["status"] == "ok":
+            status = f"{Colors.OKGREEN}ok{Colors.ENDC}"
+        elif result["status"] == "failed":
+            status = f"{Colors.WARNING}rc={result['returncode']}{Colors.ENDC}"
+        else:
+            status = f"{Colors.FAIL}error{Colors.ENDC}"
+        print(f"  [{number}] {status} {result['duration']:.1f}s {label}")
+        if result["status"] == "error":
+            print(f"      {result['output']}")
+
+    def _results_path(self, step_name: str) -> str:
+        directory = os.path.join(self.session.workspace_dir, f"{self.session.get('workspace') or 'default'}_playbooks")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{SLUG_RE.sub('_', step_name)[:40]}.jsonl")
@@ -0,0 +1,127 @@
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, List, Tuple
+from .colors import Colors, log_info, log_error
+
+SAMPLE_INTERVAL = 0.005
+TOP_N = 15
+SLUG_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def profile_dir(session=None) -> str:
+    """<workspace>_profiles next to the workspace files."""
+    workspace = (session.get("workspace") if session else "") or "default"
+    base = session.workspace_dir if session else os.path.expanduser("~/.redsploit/workspaces")
+    path = os.path.join(base, f"{workspace}_profiles")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}"
+
+
+class StackSampler(threading.Thread):
+    """
+    Sampling profiler for one thread: every interval it reads the thread's
+    current frame (sys._current_frames) and counts the stack root-first, in
+    the collapsed format flamegraph.pl / speedscope / inferno read
+    ("a;b;c <count>").
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL) -> None:
+        super().__init__(daemon=True, name="redsploit-sampler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def summary(stats: pstats.Stats, top: int = TOP_N, sort: str = "cumulative") -> List[Tuple[str, int, float, float]]:
+    """Top functions as (name, calls, tottime, cumtime), the profiler's own frames left out."""
+    rows = []
+    for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        if filename == __file__ or func.startswith("<method 'disable'"):
+            continue
+        name = f"{os.path.basename(filename)}:{line}({func})" if line else func
+        rows.append((name, calls, tottime, cumtime))
+    key = 2 if sort == "tottime" else 1 if sort == "calls" else 3
+    rows.sort(key=lambda r: r[key], reverse=True)
+    return rows[:top]
+
+
+def profile_call(func: Callable[..., Any], *args: Any, name: str = "profile", session=None,
+                 top: int = TOP_N, sort: str = "cumulative", **kwargs: Any) -> Any:
+    """
+    Run func(*args, **kwargs) under cProfile with a stack sampler alongside.
+
+    Saves <timestamp>-<name>.pstats (open with `python -m pstats` or
+    snakeviz) and <timestamp>-<name>.folded (collapsed stacks for flame
+    graphs) in the workspace's profiles directory, prints the top functions,
+    and returns whatever func returned.
+    """
+    sampler = StackSampler(threading.get_ident())
+    sampler.start()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Only one profiler per process (e.g. `profile` inside `red --profile`)
+        sampler.stop()
+        log_error(f"Cannot profile: {e}")
+        return func(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - start
+        sampler.stop()
+        _save(profiler, sampler, name, wall, session, top, sort)
+
+
+def _save(profiler: cProfile.Profile, sampler: StackSampler, name: str, wall: float, session,
+          top: int, sort: str) -> None:
+    try:
+        directory = profile_dir(session)
+        base = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{SLUG_RE.sub('_', name)[:40]}")
+        profiler.dump_stats(base + ".pstats")
+        sampler.write(base + ".folded")
+    except OSError as e:
+        log_error(f"Failed to save profile: {e}")
+        return
+
+    stats = pstats.Stats(profiler)
+    print(f"\n{Colors.HEADER}Profile: {name}{Colors.ENDC} ({wall:.3f}s wall, {stats.total_calls} calls, "
+          f"{sum(sampler.stacks.values())} samples)")
+    print(f"{'cumtime':>9} {'tottime':>9} {'calls':>9}  function")
+    for func_name, calls, tottime, cumtime in summary(stats, top, sort):
+        print(f"{cumtime:>9.4f} {tottime:>9.4f} {calls:>9}  {func_name}")
+    log_info(f"Saved {base}.pstats and {base}.folded")
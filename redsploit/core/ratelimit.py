@@ -0,0 +1,184 @@
+import threading
+import time
+from typing import Dict, Optional
+from .colors import log_info
+
+
+def host_of(target: str) -> str:
+    """Reduce a target (URL, host:port, user@host) to the bare host used as rate key."""
+    if not target:
+        return ""
+    host = target
+    if "://" in host:
+        host = host.split("://", 1)[1]
+    host = host.split("/", 1)[0]
+    if "@" in host:
+        host = host.rsplit("@", 1)[1]
+    if host.startswith("["):
+        # [ipv6]:port
+        return host[1:].split("]", 1)[0]
+    if host.count(":") == 1:
+        host = host.split(":", 1)[0]
+    return host.lower()
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst` stored."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.last = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if available now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+
+class Limit:
+    """Launch budget for one host or interface."""
+
+    def __init__(self, spec: Dict) -> None:
+        per_minute = spec.get("launches_per_minute")
+        self.bucket = TokenBucket(per_minute / 60.0, spec.get("burst", 1)) if per_minute else None
+        self.max_concurrent = spec.get("max_concurrent")
+        self.tool_rate = spec.get("tool_rate")
+        self.active = 0
+
+    def wait_time(self, now: float) -> Optional[float]:
+        """0 if a launch can be admitted now, seconds to wait, or None to wait for a release."""
+        if self.max_concurrent and self.active >= self.max_concurrent:
+            return None
+        if self.bucket:
+            return self.bucket.wait_time(now)
+        return 0.0
+
+
+class Ticket:
+    """Admission for one launched process; releases its concurrency slots on exit."""
+
+    def __init__(self, governor: "RateGovernor", limits) -> None:
+        self.governor = governor
+        self.limits = limits
+
+    def release(self) -> None:
+        if self.limits is not None:
+            self.governor._release(self.limits)
+            self.limits = None
+
+    def __enter__(self) -> "Ticket":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class RateGovernor:
+    """
+    Global admission control for launched tools.
+
+    Every launch takes a token from the bucket of its target host and of the
+    outgoing interface, and holds a concurrency slot on both until it exits.
+    Limits come from the `rate_limits` section of config.yaml; hosts and
+    interfaces without a matching entry (and no `default`) are unlimited.
+    """
+
+    def __init__(self, config: Optional[Dict] = None) -> None:
+        config = config or {}
+        self.host_config = config.get("hosts", {}) or {}
+        self.iface_config = config.get("interfaces", {}) or {}
+        self.limits: Dict[str, Limit] = {}
+        self._cond = threading.Condition()
+
+    def _spec(self, section: Dict, name: str) -> Optional[Dict]:
+        default = section.get("default")
+        specific = section.get(name)
+        if default is None and specific is None:
+            return None
+        spec = dict(default or {})
+        spec.update(specific or {})
+        return spec
+
+    def _limit(self, kind: str, name: str) -> Optional[Limit]:
+        key = f"{kind}:{name}"
+        if key not in self.limits:
+            section = self.host_config if kind == "host" else self.iface_config
+            spec = self._spec(section, name)
+            self.limits[key] = Limit(spec) if spec else None
+        return self.limits[key]
+
+    def _limits_for(self, target: str, interface: str):
+        limits = []
+        host = host_of(target)
+        if host:
+            limits.append(self._limit("host", host))
+        if interface:
+            limits.append(self._limit("iface", interface))
+        return [l for l in limits if l is not None]
+
+    def admit(self, target: str = "", interface: str = "", timeout: Optional[float] = None) -> Ticket:
+        """
+        Block until a launch against target over interface fits every budget.
+        Raises TimeoutError if timeout (seconds) expires first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        announced = False
+        with self._cond:
+            limits = self._limits_for(target, interface)
+            while True:
+                now = time.monotonic()
+                waits = [l.wait_time(now) for l in limits]
+                if all(w == 0 for w in waits):
+                    for l in limits:
+                        if l.bucket:
+                            l.bucket.consume()
+                        l.active += 1
+                    return Ticket(self, limits)
+
+                known = [w for w in waits if w]
+                delay = max(known) if known else 1.0
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise TimeoutError(f"Rate limit admission timed out for {target or interface}")
+                    delay = min(delay, remaining)
+                if not announced:
+                    log_info(f"Rate limit reached for {host_of(target) or interface}, waiting...")
+                    announced = True
+                self._cond.wait(delay)
+
+    def _release(self, limits) -> None:
+        with self._cond:
+            for l in limits:
+                l.active = max(l.active - 1, 0)
+            self._cond.notify_all()
+
+    def tool_rate(self, target: str = "", interface: str = "") -> Optional[int]:
+        """
+        Per-tool request rate (req/s) for a new launch: the tightest `tool_rate`
+        budget of host and interface, shared with tools already running there.
+        """
+        with self._cond:
+            shares = []
+            for l in self._limits_for(target, interface):
+                if l.tool_rate:
+                    shares.append(l.tool_rate / (l.active + 1))
+        if not shares:
+            return None
+        return max(int(min(shares)), 1)
+
+    def active(self) -> Dict[str, int]:
+        """Current number of admitted launches per host/interface."""
+        with self._cond:
+            return {k: l.active for k, l in self.limits.items() if l is not None and l.active}
@@ -0,0 +1,323 @@
+import ipaddress
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set, Tuple
+from .colors import Colors, log_info, log_success, log_warn, log_error
+from .parsers import collector_for
+from .runner import run_command
+
+DEFAULT_TOP_PORTS = 100
+DEFAULT_WORKERS = 4
+# {ports} nmap -p list, {targets} file with one scope entry per line; must print grepable (-oG) output
+DEFAULT_PROBE = "nmap -Pn -n -T4 --open -sV --version-intensity 0 -p {ports} -iL {targets} -oG -"
+# Run per host on its new and changed ports only; output goes through the nmap parser
+DEFAULT_DETECT = "nmap -sV -sC -Pn -v -p {ports} {target}"
+
+NMAP_SERVICES = ("/usr/share/nmap/nmap-services", "/usr/local/share/nmap/nmap-services")
+# Fallback when nmap-services is not readable, most frequent first
+COMMON_PORTS = [80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111, 995, 993,
+                5900, 1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001, 10000, 514, 5060, 179, 1026, 2000,
+                8443, 8000, 32768, 554, 26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631,
+                631, 49153, 8081, 2049, 88, 79, 5800, 106, 2121, 1110, 49155, 6000, 513, 990, 5357, 427,
+                49156, 543, 544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009, 7070, 5190, 3000, 5432,
+                1900, 3986, 13, 1029, 9, 5051, 6646, 49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37]
+
+Ports = Dict[str, Dict[str, str]]
+
+
+def top_ports(count: int) -> List[int]:
+    """The `count` most frequently open TCP ports according to nmap-services."""
+    for path in NMAP_SERVICES:
+        try:
+            ranked = []
+            with open(path, "r", errors="replace") as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 3 and fields[1].endswith("/tcp") and not line.startswith("#"):
+                        ranked.append((float(fields[2]), int(fields[1].split("/")[0])))
+            return [port for _, port in sorted(ranked, reverse=True)[:count]]
+        except (OSError, ValueError):
+            continue
+    return COMMON_PORTS[:count]
+
+
+def port_ranges(ports: List[int]) -> str:
+    """Sorted ports as an nmap -p list with consecutive runs collapsed (21-23,80,443)."""
+    ranges: List[List[int]] = []
+    for port in sorted(set(ports)):
+        if ranges and port == ranges[-1][1] + 1:
+            ranges[-1][1] = port
+        else:
+            ranges.append([port, port])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def parse_grepable(output: str) -> Dict[str, Ports]:
+    """
+    Open TCP ports per host from nmap -oG output:
+        Host: 10.0.0.5 ()	Ports: 22/open/tcp//ssh//OpenSSH 8.2p1 Ubuntu/, 80/open/tcp//http///
+    """
+    hosts: Dict[str, Ports] = {}
+    for line in output.splitlines():
+        if not line.startswith("Host: ") or "\tPorts: " not in line:
+            continue
+        address = line[6:].split(None, 1)[0]
+        ports = hosts.setdefault(address, {})
+        for entry in line.split("\tPorts: ", 1)[1].split("\t", 1)[0].split(", "):
+            fields = entry.strip().split("/")
+            if len(fields) < 7 or fields[1] != "open" or fields[2] != "tcp" or not fields[0].isdigit():
+                continue
+            ports[f"{fields[0]}/tcp"] = {"name": fields[4].rstrip("?"), "banner": fields[6].strip()}
+    return hosts
+
+
+def rescans_dir(session) -> str:
+    return os.path.join(session.workspace_dir, f"{session.get('workspace') or 'default'}_rescans")
+
+
+def last_report(session) -> Optional[Dict]:
+    """The most recent rescan report of the workspace, or None."""
+    directory = rescans_dir(session)
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(".json"))
+        if names:
+            with open(os.path.join(directory, names[-1]), "r") as f:
+                return json.load(f)
+    except (OSError, ValueError) as e:
+        log_error(f"Failed to read last rescan: {e}")
+    return None
+
+
+def changed_services(session) -> Dict[str, List[str]]:
+    """Host -> new or changed service keys ("445/tcp") from the last rescan."""
+    report = last_report(session) or {}
+    return report.get("changed_hosts", {})
+
+
+class Rescan:
+    """
+    Incremental re-assessment of a workspace: a light probe of the known and
+    top ports finds what changed since the last scan, and only the changed
+    hosts and ports get full service detection.
+
+    The probe records a light banner per port in the inventory; a port whose
+    banner differs on the next rescan counts as changed. Ports no longer open
+    are marked closed. The diff is saved as <workspace>_rescans/<timestamp>.json
+    and is what foreach `hosts(changed)` iterates in playbooks.
+    """
+
+    def __init__(self, session, scope: Optional[List[str]] = None, top: Optional[int] = None,
+                 extra_ports: Optional[List[int]] = None) -> None:
+        self.session = session
+        self.config = session.config.get("rescan", {})
+        self.scope = scope or []
+        self.top = int(self.config.get("top_ports", DEFAULT_TOP_PORTS) if top is None else top)
+        self.extra_ports = extra_ports or []
+        self.workers = max(int(self.config.get("workers", DEFAULT_WORKERS)), 1)
+
+    # Scope
+
+    def _scope_entries(self) -> List[str]:
+        """Explicit targets (files expanded), or every inventory host."""
+        if not self.scope:
+            return [host["address"] for host in self.session.inventory.hosts()]
+        entries = []
+        for item in self.scope:
+            path = os.path.expanduser(item)
+            if os.path.isfile(path):
+                with open(path, "r", errors="replace") as f:
+                    entries.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+            else:
+                entries.append(item)
+        return entries
+
+    @staticmethod
+    def _matcher(entries: List[str]):
+        networks, names = [], set()
+        for entry in entries:
+            try:
+                networks.append(ipaddress.ip_network(entry, strict=False))
+            except ValueError:
+                names.add(entry.lower())
+
+        def in_scope(host: Dict) -> bool:
+            if host["address"].lower() in names or names.intersection(h.lower() for h in host.get("hostnames", [])):
+                return True
+            try:
+                address = ipaddress.ip_address(host["address"])
+            except ValueError:
+                return False
+            return any(address in network for network in networks)
+        return in_scope
+
+    def known(self, entries: List[str]) -> Tuple[Dict[str, Ports], Set[int]]:
+        """Open TCP services of in-scope inventory hosts, and every TCP port ever seen on them."""
+        in_scope = self._matcher(entries)
+        known: Dict[str, Ports] = {}
+        ports: Set[int] = set()
+        for host in self.session.inventory.hosts():
+            if self.scope and not in_scope(host):
+                continue
+            services = {}
+            for key, service in host["services"].items():
+                if service.get("proto") != "tcp":
+                    continue
+                ports.add(int(service["port"]))
+                if service.get("state", "open") == "open":
+                    services[key] = dict(service)
+            known[host["address"]] = services
+        return known, ports
+
+    # Phases
+
+    def probe(self, entries: List[str], ports: List[int]) -> Dict[str, Ports]:
+        directory = rescans_dir(self.session)
+        os.makedirs(directory, exist_ok=True)
+        targets_file = os.path.join(directory, "targets.txt")
+        with open(targets_file, "w") as f:
+            f.write("\n".join(entries) + "\n")
+        cmd = self.config.get("probe", DEFAULT_PROBE).format(ports=port_ranges(ports), targets=targets_file)
+        log_info(f"Probing {len(entries)} scope entries on {len(ports)} ports...")
+        print(f"{Colors.OKCYAN}{cmd}{Colors.ENDC}")
+        returncode, output = run_command(self.session, cmd, tool="nmap", capture=True)
+        if returncode != 0:
+            raise RuntimeError(f"probe exited with {returncode}: {output.strip()[-300:]}")
+        return parse_grepable(output)
+
+    def _detect_host(self, address: str, keys: List[str]) -> Tuple[str, Optional[int]]:
+        ports = ",".join(sorted((key.split("/")[0] for key in keys), key=int))
+        cmd = self.config.get("detect", DEFAULT_DETECT).format(ports=ports, target=address)
+        try:
+            returncode, output = run_command(self.session, cmd, tool="nmap", target=address, capture=True)
+        except Exception as e:
+            log_error(f"Detection on {address} failed: {e}")
+            return address, None
+        collector = collector_for(self.session, "nmap", address, quiet=True)
+        for line in output.splitlines():
+            collector.feed(line)
+        collector.close()
+        return address, returncode
+
+    def detect(self, changed: Dict[str, List[str]]) -> None:
+        """Full service detection on the changed ports, a bounded number of hosts at a time."""
+        if not changed:
+            return
+        total = sum(len(keys) for keys in changed.values())
+        log_info(f"Service detection on {total} ports of {len(changed)} hosts ({self.workers} workers)...")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._detect_host, address, keys) for address, keys in changed.items()]
+            for fut in as_completed(futures):
+                address, returncode = fut.result()
+                if returncode not in (0, None):
+                    log_warn(f"Detection on {address} exited with {returncode}")
+
+    # Run
+
+    def run(self) -> Optional[Dict]:
+        entries = self._scope_entries()
+        if not entries:
+            log_error("Nothing to rescan: the inventory is empty (scan first or give targets).")
+            return None
+        started = time.time()
+        known, seen_ports = self.known(entries)
+        ports = sorted(seen_ports.union(top_ports(self.top), self.extra_ports))
+        probed = self.probe(entries, ports)
+        probe_time = time.time() - started
+
+        inventory = self.session.inventory
+        report = {"started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)),
+                  "scope": self.scope or ["inventory"], "ports": len(ports), "hosts_up": len(probed),
+                  "new_hosts": [], "gone_hosts": [], "new": [], "closed": [], "changed": [], "changed_hosts": {}}
+        changed: Dict[str, List[str]] = {}
+        for address, services in sorted(probed.items()):
+            before = known.get(address, {})
+            if not before:
+                report["new_hosts"].append(address)
+            for key, probe in sorted(services.items()):
+                if key not in before:
+                    changed.setdefault(address, []).append(key)
+                    report["new"].append({"host": address, "service": key})
+                elif before[key].get("banner") and probe["banner"] and before[key]["banner"] != probe["banner"]:
+                    changed.setdefault(address, []).append(key)
+                    report["changed"].append({"host": address, "service": key, "before": before[key]})
+        for address, services in sorted(known.items()):
+            closed = sorted(key for key in services if key not in probed.get(address, {}))
+            if services and len(closed) == len(services):
+                report["gone_hosts"].append(address)
+            for key in closed:
+                report["closed"].append({"host": address, "service": key, "name": services[key].get("name", ""),
+                                         "product": services[key].get("product", "")})
+                inventory.close_service(address, key, save=False)
+
+        self.detect(changed)
+        for address, services in probed.items():
+            for key, probe in services.items():
+                inventory.add_service(address, int(key.split("/")[0]), "tcp", name=probe["name"],
+                                      banner=probe["banner"], save=False)
+        inventory.save()
+
+        # Fill in the detected versions now that the inventory has them
+        for item in report["new"] + report["changed"]:
+            service = (inventory.get_host(item["host"]) or {}).get("services", {}).get(item["service"], {})
+            item["after"] = {field: service.get(field, "") for field in ("name", "product", "version")}
+        report["changed_hosts"] = changed
+        report["duration"] = round(time.time() - started, 1)
+        report["probe_duration"] = round(probe_time, 1)
+        self._save(report)
+        return report
+
+    def _save(self, report: Dict) -> None:
+        # Microseconds plus an exclusive-create counter keep back-to-back rescans
+        # from overwriting each other while the names still sort chronologically.
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now % 1 * 1e6):06d}"
+        directory = rescans_dir(self.session)
+        try:
+            for n in range(100):
+                path = os.path.join(directory, f"{stamp}-{n:02d}.json")
+                try:
+                    with open(path, "x") as f:
+                        json.dump(report, f, indent=2)
+                    report["path"] = path
+                    return
+                except FileExistsError:
+                    continue
+            log_error(f"Cannot save rescan report: too many reports named {stamp}-*")
+        except OSError as e:
+            log_error(f"Cannot save rescan report: {e}")
+
+
+def show_report(report: Dict) -> None:
+    print(f"\n{Colors.HEADER}Rescan {report['started']}{Colors.ENDC} "
+          f"({report['hosts_up']} hosts up, {report['ports']} ports, probe {report.get('probe_duration', 0)}s, "
+          f"total {report.get('duration', 0)}s)")
+    new_hosts = set(report["new_hosts"])
+    gone_hosts = set(report["gone_hosts"])
+    rows = []
+    for item in report["new"]:
+        after = item.get("after", {})
+        note = " (new host)" if item["host"] in new_hosts else ""
+        rows.append((item["host"], item["service"], Colors.OKGREEN + "+",
+                     f"{after.get('name', '')} {after.get('product', '')} {after.get('version', '')}".strip() + note))
+    for item in report["closed"]:
+        note = " (host gone)" if item["host"] in gone_hosts else ""
+        rows.append((item["host"], item["service"], Colors.FAIL + "-", f"{item['name']} {item['product']}".strip() + note))
+    for item in report["changed"]:
+        before, after = item["before"], item.get("after", {})
+        was = f"{before.get('product', '')} {before.get('version', '')}".strip() or before.get("banner", "")
+        now = f"{after.get('product', '')} {after.get('version', '')}".strip()
+        rows.append((item["host"], item["service"], Colors.WARNING + "~", f"{after.get('name', '')} {was} -> {now}"))
+    if not rows:
+        log_success("No changes since the last scan.")
+    else:
+        print(f"   {'Host':<18} {'Port':<10} {'Service'}")
+        print("-" * 70)
+        for host, key, mark, text in sorted(rows, key=lambda r: (r[0], int(r[1].split("/")[0]))):
+            print(f"{mark}{Colors.ENDC}  {host:<18} {key:<10} {text}")
+        print(f"\n{len(report['new'])} new, {len(report['closed'])} closed, {len(report['changed'])} changed "
+              f"on {len(report['changed_hosts'])} hosts ({len(new_hosts)} new, {len(gone_hosts)} gone)")
+    if report.get("path"):
+        log_info(f"Report saved to {report['path']}")
+    print("")
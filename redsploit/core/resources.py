@@ -0,0 +1,220 @@
+import os
+import resource
+import shlex
+import shutil
+from typing import Dict, List, Optional
+from .colors import log_warn
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+IOPRIO_CLASSES = {"none": 0, "realtime": 1, "best-effort": 2, "idle": 3}
+IOPRIO_CLASS_SHIFT = 13
+
+SIZE_UNITS = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+
+def parse_size(value) -> Optional[int]:
+    """Parse '512M', '4G' or a plain byte count."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    value = str(value).strip().lower().rstrip("b")
+    if value and value[-1] in SIZE_UNITS:
+        return int(float(value[:-1]) * SIZE_UNITS[value[-1]])
+    return int(value)
+
+
+def parse_cpus(value) -> Optional[List[int]]:
+    """Parse a CPU list like '0-3,6' into [0, 1, 2, 3, 6]."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return [value]
+    if isinstance(value, list):
+        return [int(c) for c in value]
+    cpus = []
+    for part in str(value).split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+
+def parse_ionice(value):
+    """Parse 'idle', 'best-effort' or 'best-effort:7' into an ioprio value."""
+    if not value:
+        return None
+    cls, _, level = str(value).partition(":")
+    if cls not in IOPRIO_CLASSES:
+        raise ValueError(f"Unknown ionice class '{cls}'")
+    level = int(level) if level else (0 if cls == "idle" else 4)
+    return (IOPRIO_CLASSES[cls] << IOPRIO_CLASS_SHIFT) | level
+
+
+def _soft_limit(limit: int, value: int) -> int:
+    """value capped at the hard limit the child inherits, so prlimit never fails."""
+    _, hard = resource.getrlimit(limit)
+    return value if hard == resource.RLIM_INFINITY else min(value, hard)
+
+
+class ResourceProfile:
+    """
+    Resource limits applied to a spawned tool.
+
+    Limits are applied by prefixing the command with nice, ionice, prlimit
+    and taskset (plus a cgroup.procs write), so nothing runs between fork
+    and exec: launches come from job, worker and daemon threads, where
+    preexec_fn is unsafe. Utilities that are missing are skipped with a
+    warning. Only soft rlimits are set, capped at the inherited hard limit.
+    """
+
+    def __init__(self, name: str, spec: Dict) -> None:
+        self.name = name
+        self.nice = spec.get("nice")
+        self.ioprio = parse_ionice(spec.get("ionice"))
+        self.nofile = spec.get("nofile")
+        self.memory = parse_size(spec.get("memory"))
+        self.cpus = parse_cpus(spec.get("cpus"))
+        self.cgroup = spec.get("cgroup")
+        self._prefix: Optional[str] = None
+        self._cgroup_procs: Optional[str] = None
+
+    def _prepare_cgroup(self) -> Optional[str]:
+        """Create the cgroup v2 group and write its limits (once, in the parent). Returns cgroup.procs."""
+        path = os.path.join(CGROUP_ROOT, self.cgroup.strip("/"))
+        try:
+            os.makedirs(path, exist_ok=True)
+            if self.memory:
+                with open(os.path.join(path, "memory.max"), "w") as f:
+                    f.write(str(self.memory))
+            return os.path.join(path, "cgroup.procs")
+        except OSError as e:
+            log_warn(f"cgroup '{self.cgroup}' unavailable ({e}), using rlimits only.")
+            return None
+
+    def _utility(self, name: str, purpose: str) -> bool:
+        if shutil.which(name):
+            return True
+        log_warn(f"Profile '{self.name}': {name} not found, {purpose} not applied.")
+        return False
+
+    def prefix(self) -> str:
+        """Utility chain that applies the profile, built once (empty when nothing applies)."""
+        if self._prefix is not None:
+            return self._prefix
+        cgroup_procs = self._cgroup_procs = self._prepare_cgroup() if self.cgroup else None
+        parts = []
+        if self.nice and self._utility("nice", "nice"):
+            parts += ["nice", "-n", str(self.nice)]
+        if self.ioprio is not None and self.ioprio >> IOPRIO_CLASS_SHIFT and self._utility("ionice", "ionice"):
+            cls = self.ioprio >> IOPRIO_CLASS_SHIFT
+            # -t: run anyway if the class is not permitted (realtime needs root)
+            parts += ["ionice", "-t", "-c", str(cls)] + (["-n", str(self.ioprio & 0xff)] if cls != 3 else [])
+        limits = []
+        if self.nofile:
+            limits.append(f"--nofile={_soft_limit(resource.RLIMIT_NOFILE, int(self.nofile))}:")
+        if self.memory and not cgroup_procs:
+            limits.append(f"--as={_soft_limit(resource.RLIMIT_AS, self.memory)}:")
+        if limits and self._utility("prlimit", "rlimits"):
+            parts += ["prlimit"] + limits
+        if self.cpus:
+            cpus = sorted(set(self.cpus) & os.sched_getaffinity(0))
+            if not cpus:
+                log_warn(f"Profile '{self.name}': none of cpus {self.cpus} is available, affinity not applied.")
+            elif self._utility("taskset", "CPU affinity"):
+                parts += ["taskset", "-c", ",".join(map(str, cpus))]
+        self._prefix = " ".join(parts)
+        return self._prefix
+
+    def wrap(self, cmd: str) -> str:
+        """cmd with the profile applied; the original command runs unchanged under sh -c."""
+        prefix = self.prefix()
+        if not prefix and not self._cgroup_procs:
+            return cmd
+        # exec keeps the launched pid (and its process group) for the tool
+        launch = f"exec {prefix} sh -c {shlex.quote(cmd)}".replace("exec  ", "exec ")
+        if self._cgroup_procs:
+            launch = f"echo $$ > {shlex.quote(self._cgroup_procs)} 2>/dev/null; {launch}"
+        return launch
+
+    def describe(self) -> str:
+        parts = []
+        if self.nice:
+            parts.append(f"nice={self.nice}")
+        if self.ioprio is not None:
+            parts.append(f"ionice={self.ioprio >> IOPRIO_CLASS_SHIFT}:{self.ioprio & 0xff}")
+        if self.nofile:
+            parts.append(f"nofile={self.nofile}")
+        if self.memory:
+            parts.append(f"memory={self.memory // (1024 ** 2)}M")
+        if self.cpus:
+            parts.append(f"cpus={','.join(map(str, self.cpus))}")
+        if self.cgroup:
+            parts.append(f"cgroup={self.cgroup}")
+        return " ".join(parts) or "unrestricted"
+
+
+class ResourceManager:
+    """
+    Resolves the resource profile for a launched tool.
+
+    Profiles are defined in the `resources` section of config.yaml. A tool is
+    mapped to a profile by `resources.tools` (keyed by tool or binary name),
+    then by a `profile` key in its TOOLS entry, then by `resources.default`.
+    """
+
+    def __init__(self, config: Optional[Dict] = None) -> None:
+        config = config or {}
+        self.tool_map = config.get("tools", {}) or {}
+        self.default = config.get("default")
+        self.profiles: Dict[str, ResourceProfile] = {}
+        for name, spec in (config.get("profiles", {}) or {}).items():
+            try:
+                self.profiles[name] = ResourceProfile(name, spec or {})
+            except ValueError as e:
+                log_warn(f"Invalid resource profile '{name}': {e}")
+
+    def profile_for(self, tool: str = "", cmd: str = "", profile: str = "") -> Optional[ResourceProfile]:
+        name = profile
+        if not name and tool:
+            name = self.tool_map.get(tool)
+        if not name and cmd:
+            binary = os.path.basename(cmd.split()[0]) if cmd.split() else ""
+            name = self.tool_map.get(binary)
+        if not name and tool:
+            name = self._registry_profile(tool)
+        name = name or self.default
+        if not name:
+            return None
+        if name not in self.profiles:
+            log_warn(f"Unknown resource profile '{name}'")
+            return None
+        return self.profiles[name]
+
+    @staticmethod
+    def _registry_profile(tool: str) -> Optional[str]:
+        """Look up a `profile` key in the module tool registries."""
+        from ..modules.infra import InfraModule
+        from ..modules.web import WebModule
+        for registry in (InfraModule.TOOLS, WebModule.TOOLS):
+            entry = registry.get(tool)
+            if isinstance(entry, dict) and entry.get("profile"):
+                return entry["profile"]
+        return None
+
+    def show(self) -> None:
+        from .colors import Colors
+        print(f"\n{Colors.HEADER}Resource Profiles{Colors.ENDC}")
+        print("=" * 60)
+        for name, prof in sorted(self.profiles.items()):
+            marker = " (default)" if name == self.default else ""
+            print(f"{name:<15} {prof.describe()}{marker}")
+        if self.tool_map:
+            print(f"\n{Colors.BOLD}Tool Mapping{Colors.ENDC}")
+            for tool, name in sorted(self.tool_map.items()):
+                print(f"  {tool:<18} {name}")
+        print("")
@@ -0,0 +1,186 @@
+import contextlib
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Optional, Tuple
+from .telemetry import RunSample
+
+# Per-thread execution context (the daemon runs each client in its own thread)
+_context = threading.local()
+
+
+class RunLocally(Exception):
+    """Raised when an interactive command must run in the caller's terminal instead."""
+
+    def __init__(self, cmd: str) -> None:
+        super().__init__(cmd)
+        self.cmd = cmd
+
+
+def set_cwd(cwd: Optional[str]) -> None:
+    """Working directory for processes launched from the current thread."""
+    _context.cwd = cwd
+
+
+def get_cwd() -> Optional[str]:
+    return getattr(_context, "cwd", None)
+
+
+def _track(session, cmd: str, tool: str, target: str) -> "contextlib.AbstractContextManager[RunSample]":
+    """Telemetry sample for one launch (a throwaway sample when the session has no telemetry)."""
+    telemetry = getattr(session, "telemetry", None)
+    tool = tool or (cmd.split() or ["?"])[0]
+    if telemetry is None:
+        return contextlib.nullcontext(RunSample(tool, target))
+    return telemetry.run(tool, target)
+
+
+def run_command(session, cmd: str, tool: str = "", target: str = "", capture: bool = False,
+                timeout: Optional[float] = None, profile: str = "") -> Tuple[Optional[int], str]:
+    """
+    Launch a shell command on behalf of a module, playbook or engine.
+
+    The launch is admitted through the session's rate governor (per target host
+    and interface) before the process is spawned, and the tool's resource
+    profile (nice, ionice, rlimits, affinity, cgroup) is applied by prefixing the command.
+    Interactive commands inherit the terminal; with capture=True stdout/stderr
+    are collected and returned.
+    Returns (returncode, output). Raises subprocess.TimeoutExpired on timeout.
+    """
+    interface = session.get("interface")
+    limits = session.resources.profile_for(tool, cmd, profile)
+    spawn = limits.wrap(cmd) if limits else cmd
+
+    with _track(session, cmd, tool, target) as sample, session.governor.admit(target, interface):
+        sample.admitted()
+        if capture:
+            proc = subprocess.run(spawn, shell=True, capture_output=True, text=True, cwd=get_cwd(),
+                                  errors="replace", timeout=timeout)
+            session.last_returncode = sample.returncode = proc.returncode
+            sample.bytes = len(proc.stdout) + len(proc.stderr)
+            return proc.returncode, proc.stdout + proc.stderr
+
+        # Use Popen to handle signals correctly for interactive tools
+        process = subprocess.Popen(spawn, shell=True, cwd=get_cwd())
+        sample.spawned()
+        while True:
+            try:
+                process.wait(timeout=timeout)
+                break
+            except KeyboardInterrupt:
+                # Ignore Ctrl+C in parent, let child handle it.
+                # If child exits, wait() returns. If child stays alive, we wait again.
+                continue
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                raise
+        session.last_returncode = sample.returncode = process.returncode
+        return process.returncode, ""
+
+
+def tee_available() -> bool:
+    """True when foreground tools can keep the terminal and still be parsed (util-linux script on a tty)."""
+    return (sys.platform.startswith("linux") and shutil.which("script") is not None
+            and sys.stdin.isatty() and sys.stdout.isatty())
+
+
+def run_tee(session, cmd: str, tool: str = "", target: str = "", profile: str = "",
+            on_line: Optional[Callable[[str], None]] = None) -> Optional[int]:
+    """
+    Run a command attached to the terminal (colors, progress, nmap's status
+    keys keep working) under script(1), which records a copy of the output.
+    The copy is tailed while the tool runs and every line handed to on_line,
+    so parsers still see findings as they appear. Returns the exit code.
+    """
+    fd, log_path = tempfile.mkstemp(prefix="redsploit-", suffix=".log")
+    os.close(fd)
+    done = threading.Event()
+
+    def tail():
+        with open(log_path, "rb") as f:
+            pending = b""
+            while True:
+                finished = done.is_set()
+                chunk = f.read(65536)
+                if chunk:
+                    pending += chunk
+                    *lines, pending = pending.split(b"\n")
+                    for raw in lines:
+                        # Keep what a progress line finally shows after its carriage returns
+                        on_line(raw.decode("utf-8", errors="replace").rstrip("\r").split("\r")[-1])
+                elif finished:
+                    break
+                else:
+                    time.sleep(0.2)
+            if pending:
+                on_line(pending.decode("utf-8", errors="replace").rstrip("\r").split("\r")[-1])
+
+    thread = threading.Thread(target=tail, name="redsploit-tee", daemon=True)
+    if on_line:
+        thread.start()
+    try:
+        returncode, _ = run_command(session, f"script -qefc {shlex.quote(cmd)} {shlex.quote(log_path)}",
+                                    tool=tool, target=target, profile=profile)
+        return returncode
+    finally:
+        done.set()
+        if on_line:
+            thread.join()
+        os.unlink(log_path)
+
+
+def stream_command(session, cmd: str, tool: str = "", target: str = "", profile: str = "",
+                   on_line: Optional[Callable[[str], None]] = None,
+                   on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+                   cwd: Optional[str] = None) -> int:
+    """
+    Launch a non-interactive command with stdout/stderr piped and hand every
+    output line (without trailing newline) to on_line as it arrives.
+
+    The child gets its own process group so terminal Ctrl+C does not reach
+    background tools and the whole tree can be signalled at once. on_start
+    receives the Popen object right after spawning. Returns the exit code.
+    """
+    interface = session.get("interface")
+    limits = session.resources.profile_for(tool, cmd, profile)
+    spawn = limits.wrap(cmd) if limits else cmd
+
+    with _track(session, cmd, tool, target) as sample, session.governor.admit(target, interface):
+        sample.admitted()
+        process = subprocess.Popen(
+            spawn, shell=True, cwd=cwd or get_cwd(),
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+        sample.spawned()
+        if on_start:
+            on_start(process)
+        try:
+            for raw in process.stdout:
+                sample.bytes += len(raw)
+                if on_line:
+                    on_line(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+        except BaseException:
+            # Consumer went away (client disconnect, Ctrl+C): don't leave the tool running
+            kill_process_group(process, signal.SIGTERM)
+            process.wait()
+            raise
+        finally:
+            process.stdout.close()
+        sample.returncode = process.wait()
+        return sample.returncode
+
+
+def kill_process_group(process: subprocess.Popen, sig: int) -> None:
+    """Signal a process started by stream_command together with its children."""
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
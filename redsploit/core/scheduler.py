@@ -0,0 +1,366 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from .colors import Colors, log_info, log_success, log_warn, log_error
+from .jobs import DONE, FAILED, KILLED
+from .parsers import collector_for
+from .storage import locked, read_json, write_json
+
+# Queue entry states (running/done/failed/killed as in jobs)
+QUEUED = "queued"
+RUNNING = "running"
+
+DEFAULT_PRIORITY = 5  # 0 = most urgent, 9 = whenever there is room
+DEFAULTS = {"max_running": 4, "per_target": 2, "preempt_gap": 3, "poll": 1.0, "autostart": True}
+
+
+def _alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Scheduler:
+    """
+    Persistent priority queue for long-running scans (<workspace>_queue.json).
+
+    Entries are picked by (priority, id) as long as the global cap
+    (max_running) and the per-target cap (per_target) leave room, and only
+    once every entry they depend on (`after`) is done. Picked entries run as
+    ordinary background jobs. The queue file is shared by every red process
+    on the workspace (flock, atomic replace), so the caps hold across them;
+    an entry left `running` by a process that no longer exists is requeued,
+    which is how work survives a killed terminal or a restart.
+
+    Preemption: when an entry cannot start for lack of a slot, a running
+    preemptible entry of this process that is at least preempt_gap priority
+    levels less urgent (on the same target if the target cap is what blocks)
+    is killed and requeued. It starts over once there is room again.
+    """
+
+    def __init__(self, session) -> None:
+        self.session = session
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        # queue id -> job for entries this process launched
+        self._launched: Dict[int, object] = {}
+        self._preempting: set = set()
+        self._lock = threading.Lock()
+        # Set by long-lived processes (interactive shell, daemon) that run the loop
+        self.attached = False
+
+    @property
+    def config(self) -> Dict:
+        return dict(DEFAULTS, **(self.session.config.get("scheduler", {}) or {}))
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.session.workspace_dir, f"{self.session.get('workspace') or 'default'}_queue.json")
+
+    @staticmethod
+    def _read(path: str) -> Dict:
+        data = read_json(path) or {}
+        data.setdefault("next_id", 1)
+        data.setdefault("entries", [])
+        return data
+
+    def entries(self) -> List[Dict]:
+        with locked(self.path, shared=True):
+            return self._read(self.path)["entries"]
+
+    def _update(self, path: str, entry_id: int, **fields) -> None:
+        with locked(path):
+            data = self._read(path)
+            for entry in data["entries"]:
+                if entry["id"] == entry_id:
+                    entry.update(fields)
+                    write_json(path, data)
+                    return
+
+    # Queue editing
+
+    def add(self, cmd: str, tool: str = "", target: str = "", priority: int = DEFAULT_PRIORITY,
+            after: Optional[List[int]] = None, name: str = "", profile: str = "",
+            preemptible: bool = True) -> Dict:
+        """Append an entry and wake the scheduler loop. Raises ValueError on unknown dependencies."""
+        with locked(self.path):
+            data = self._read(self.path)
+            known = {e["id"] for e in data["entries"]}
+            missing = [str(d) for d in after or [] if d not in known]
+            if missing:
+                raise ValueError(f"unknown queue entries: {', '.join(missing)}")
+            entry = {
+                "id": data["next_id"], "cmd": cmd, "tool": tool, "target": target, "name": name or tool or cmd.split()[0],
+                "profile": profile, "priority": int(priority), "after": list(after or []), "preemptible": preemptible,
+                "status": QUEUED, "created": time.time(), "started": None, "ended": None, "returncode": None,
+                "owner": None, "job": None, "log": "", "attempts": 0, "preempted": 0, "reason": "",
+            }
+            data["next_id"] += 1
+            data["entries"].append(entry)
+            write_json(self.path, data)
+        self._wake.set()
+        return entry
+
+    def remove(self, entry_id: int) -> bool:
+        """Drop an entry; a running one of this process is killed first."""
+        with locked(self.path):
+            data = self._read(self.path)
+            entry = next((e for e in data["entries"] if e["id"] == entry_id), None)
+            if not entry:
+                return False
+            if entry["status"] == RUNNING and entry["owner"] != os.getpid() and _alive(entry["owner"]):
+                log_warn(f"Queue #{entry_id} is running in process {entry['owner']}, remove it there.")
+                return False
+            data["entries"].remove(entry)
+            write_json(self.path, data)
+        with self._lock:
+            job = self._launched.pop(entry_id, None)
+        if job:
+            self.session.jobs.kill(job.id)
+        return True
+
+    def retry(self, entry_id: int) -> bool:
+        """Requeue a failed or killed entry."""
+        with locked(self.path):
+            data = self._read(self.path)
+            for entry in data["entries"]:
+                if entry["id"] == entry_id and entry["status"] in (FAILED, KILLED):
+                    entry.update(status=QUEUED, reason="", returncode=None, owner=None)
+                    write_json(self.path, data)
+                    self._wake.set()
+                    return True
+        return False
+
+    def clean(self) -> int:
+        """Forget finished entries that nothing still queued depends on."""
+        with locked(self.path):
+            data = self._read(self.path)
+            needed = {d for e in data["entries"] if e["status"] in (QUEUED, RUNNING) for d in e["after"]}
+            keep = [e for e in data["entries"] if e["status"] in (QUEUED, RUNNING) or e["id"] in needed]
+            removed = len(data["entries"]) - len(keep)
+            data["entries"] = keep
+            write_json(self.path, data)
+        return removed
+
+    def pending(self) -> int:
+        return sum(1 for e in self.entries() if e["status"] in (QUEUED, RUNNING))
+
+    # Scheduling
+
+    def _recover(self, entries: List[Dict]) -> bool:
+        """Requeue entries whose owning process is gone (killed terminal, crash, reboot)."""
+        changed = False
+        for entry in entries:
+            if entry["status"] != RUNNING:
+                continue
+            mine = entry["owner"] == os.getpid()
+            if (mine and entry["id"] not in self._launched) or (not mine and not _alive(entry["owner"])):
+                entry.update(status=QUEUED, owner=None, reason="interrupted")
+                changed = True
+        return changed
+
+    def _victim(self, entry: Dict, running: List[Dict], same_target: bool) -> Optional[Dict]:
+        gap = int(self.config["preempt_gap"])
+        if gap <= 0:
+            return None
+        candidates = [r for r in running if r["owner"] == os.getpid() and r.get("preemptible", True)
+                      and r["priority"] - entry["priority"] >= gap and r["id"] not in self._preempting
+                      and (not same_target or r["target"] == entry["target"])]
+        # Least urgent first, then the one that has run the shortest
+        candidates.sort(key=lambda r: (r["priority"], r["started"] or 0), reverse=True)
+        return candidates[0] if candidates else None
+
+    def tick(self) -> Tuple[int, int]:
+        """One scheduling pass: returns (started, preempted)."""
+        config = self.config
+        max_running, per_target = int(config["max_running"]), int(config["per_target"])
+        path = self.path
+        launches: List[Dict] = []
+        victims: List[Dict] = []
+        with locked(path), self._lock:
+            data = self._read(path)
+            entries = data["entries"]
+            changed = self._recover(entries)
+            by_id = {e["id"]: e for e in entries}
+            running = [e for e in entries if e["status"] == RUNNING]
+            # Slots already being freed by earlier preemptions
+            freeing = [r for r in running if r["id"] in self._preempting]
+            for entry in sorted((e for e in entries if e["status"] == QUEUED), key=lambda e: (e["priority"], e["id"])):
+                deps = [by_id.get(d) for d in entry["after"]]
+                broken = [str(d) for d, dep in zip(entry["after"], deps) if dep is None or dep["status"] in (FAILED, KILLED)]
+                if broken:
+                    entry.update(status=FAILED, ended=time.time(), reason=f"dependency #{', #'.join(broken)} failed")
+                    changed = True
+                    continue
+                if any(dep["status"] != DONE for dep in deps):
+                    continue
+                target_busy = bool(per_target > 0 and entry["target"] and
+                                   sum(1 for r in running if r["target"] == entry["target"]) >= per_target)
+                if len(running) < max_running and not target_busy:
+                    entry.update(status=RUNNING, owner=os.getpid(), started=time.time(), ended=None,
+                                 attempts=entry["attempts"] + 1, reason="")
+                    running.append(entry)
+                    launches.append(entry)
+                    changed = True
+                    continue
+                freed = next((r for r in freeing if not target_busy or r["target"] == entry["target"]), None)
+                if freed:
+                    freeing.remove(freed)
+                    continue
+                victim = self._victim(entry, running, same_target=target_busy)
+                if victim:
+                    victims.append(victim)
+                    self._preempting.add(victim["id"])
+            if changed:
+                write_json(path, data)
+
+        for victim in victims:
+            with self._lock:
+                job = self._launched.get(victim["id"])
+            if job:
+                log_warn(f"Preempting queue #{victim['id']} ({victim['name']}, priority {victim['priority']}) "
+                         f"for more urgent work")
+                self.session.jobs.kill(job.id)
+        for entry in launches:
+            self._launch(path, entry)
+        return len(launches), len(victims)
+
+    def _launch(self, path: str, entry: Dict) -> None:
+        collector = collector_for(self.session, entry["tool"], entry["target"], quiet=True)
+
+        def on_exit(job):
+            if collector:
+                collector.close()
+            with self._lock:
+                preempted = entry["id"] in self._preempting
+            if preempted:
+                self._update(path, entry["id"], status=QUEUED, owner=None, returncode=job.returncode,
+                             ended=job.ended, preempted=entry["preempted"] + 1, reason="preempted")
+            else:
+                self._update(path, entry["id"], status=job.status, owner=None, returncode=job.returncode,
+                             ended=job.ended, reason=job.last_line if job.status == FAILED else "")
+            # Only now, so a pass in between cannot mistake the entry for an interrupted one
+            with self._lock:
+                self._launched.pop(entry["id"], None)
+                self._preempting.discard(entry["id"])
+            self._wake.set()
+
+        with self._lock:
+            job = self.session.jobs.submit(entry["cmd"], tool=entry["tool"], target=entry["target"],
+                                           name=f"q{entry['id']}:{entry['name']}", profile=entry["profile"],
+                                           on_line=collector.feed if collector else None, on_exit=on_exit)
+            if not job.done.is_set():
+                self._launched[entry["id"]] = job
+        self._update(path, entry["id"], job=job.id, log=job.log_path)
+
+    # Loop
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> bool:
+        """Start the scheduler loop in a background thread (False if it already runs)."""
+        if self.running:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="redsploit-scheduler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        """Stop picking new work; running entries finish as jobs."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def _loop(self) -> None:
+        poll = float(self.config["poll"])
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                log_error(f"Scheduler pass failed: {e}")
+            self._wake.wait(poll)
+            self._wake.clear()
+
+    def attach(self) -> None:
+        """
+        Called by the interactive shell and the daemon: from now on new
+        entries start the loop, and unfinished work left in the workspace
+        queue is resumed right away (scheduler.autostart).
+        """
+        self.attached = True
+        if not self.config["autostart"] or not os.path.exists(self.path):
+            return
+        pending = self.pending()
+        if pending:
+            log_info(f"Resuming {pending} queued scan(s) from the workspace queue (see 'queue').")
+            self.start()
+
+    def poke(self) -> None:
+        """Start the loop for new entries, or explain when they will run (batch and CLI modes)."""
+        if self.attached:
+            self.start()
+        elif not self.running:
+            log_info("Entries run in an interactive session, under the daemon, or with 'queue run'.")
+
+    def drain(self) -> None:
+        """Run the loop until nothing is queued or running (batch mode); Ctrl+C detaches."""
+        started_here = self.start()
+        seen = {e["id"]: e["status"] for e in self.entries()}
+        try:
+            while True:
+                time.sleep(float(self.config["poll"]))
+                entries = self.entries()
+                for entry in entries:
+                    if seen.get(entry["id"]) != entry["status"] and entry["status"] != QUEUED:
+                        self._report(entry)
+                    seen[entry["id"]] = entry["status"]
+                if not any(e["status"] in (QUEUED, RUNNING) for e in entries):
+                    break
+        except KeyboardInterrupt:
+            print("")
+            log_warn("Detached from the queue.")
+        finally:
+            if started_here:
+                self.stop()
+
+    @staticmethod
+    def _report(entry: Dict) -> None:
+        label = f"queue #{entry['id']} ({entry['name']})"
+        if entry["status"] == RUNNING:
+            log_info(f"Started {label} as job #{entry['job']}" if entry.get("job") else f"Started {label}")
+        elif entry["status"] == DONE:
+            log_success(f"Finished {label}")
+        else:
+            log_error(f"{label} {entry['status']}{': ' + entry['reason'] if entry['reason'] else ''}")
+
+    def show(self) -> None:
+        entries = self.entries()
+        if not entries:
+            print("Queue is empty.")
+            return
+        print(f"\n{Colors.HEADER}Queue{Colors.ENDC} (scheduler {'running' if self.running else 'stopped'})")
+        print(f"{'ID':<5} {'Pri':>3} {'Status':<8} {'After':<8} {'Runs':>4}  {'Target':<16} {'Command'}")
+        print("-" * 90)
+        order = {RUNNING: 0, QUEUED: 1}
+        for entry in sorted(entries, key=lambda e: (order.get(e["status"], 2), e["priority"], e["id"])):
+            color = {RUNNING: Colors.OKCYAN, DONE: Colors.OKGREEN, FAILED: Colors.FAIL,
+                     KILLED: Colors.WARNING}.get(entry["status"], "")
+            after = ",".join(str(d) for d in entry["after"]) or "-"
+            cmd = entry["cmd"] if len(entry["cmd"]) <= 40 else entry["cmd"][:37] + "..."
+            note = f" ({entry['reason']})" if entry["reason"] and entry["status"] != RUNNING else ""
+            print(f"{entry['id']:<5} {entry['priority']:>3} {color}{entry['status']:<8}{Colors.ENDC} {after[:8]:<8} "
+                  f"{entry['attempts']:>4}  {entry['target'][:16]:<16} {cmd}{note[:40]}")
+        print("")
@@ -0,0 +1,118 @@
+import sys
+import time
+from typing import Iterable
+from .colors import Colors, errors_logged, log_error
+
+
+class ScriptRunner:
+    """
+    Run resource-script commands (set, use, tool invocations, loot, playbook)
+    through the normal shell dispatch without any prompt or TTY setup.
+
+    Shells are created once per module and reused, so thousands of lines cost
+    one interpreter start. A command fails if it raises, is unknown, logs an
+    error or launches a tool that exits non-zero; the exit status is 1 if any
+    command failed.
+    """
+
+    def __init__(self, session, stop_on_error: bool = False) -> None:
+        self.session = session
+        self.stop_on_error = stop_on_error
+        self.shells = {}
+        self.executed = 0
+        self.failed = []
+        # Nobody is there to answer playbook prompts, and under `-r -` they would eat script lines
+        session.playbook.assume_yes = True
+
+    def _shell(self, name: str):
+        if name not in self.shells:
+            if name == "main":
+                from .shell import RedShell
+                shell = RedShell(self.session)
+            elif name == "infra":
+                from ..modules.infra import InfraShell
+                shell = InfraShell(self.session)
+            elif name == "web":
+                from ..modules.web import WebShell
+                shell = WebShell(self.session)
+            elif name == "file":
+                from ..modules.file import FileShell
+                shell = FileShell(self.session)
+            elif name == "shell":
+                from ..modules.system import SystemShell
+                shell = SystemShell(self.session)
+            else:
+                raise ValueError(f"Unknown shell: {name}")
+            shell.use_rawinput = False
+            self.shells[name] = shell
+        return self.shells[name]
+
+    def run_line(self, line: str, shell_name: str) -> str:
+        """Run one command in shell_name. Returns the shell to use next ('' to stop)."""
+        shell = self._shell(shell_name)
+        errors_before = errors_logged()
+        self.session.last_returncode = None
+        self.session.next_shell = shell_name
+
+        unknown = []
+        original_default = shell.default
+        if shell_name != "shell":
+            def default(l):
+                unknown.append(l)
+                original_default(l)
+            shell.default = default
+
+        ok = True
+        stop = False
+        try:
+            stop = shell.onecmd(line)
+        except Exception as e:
+            log_error(f"Command failed: {e}")
+            ok = False
+        finally:
+            shell.default = original_default
+
+        if unknown or errors_logged() > errors_before or self.session.last_returncode not in (None, 0):
+            ok = False
+
+        self.executed += 1
+        if not ok:
+            self.failed.append(line)
+
+        if stop:
+            # 'use', 'back' and 'exit' hand control to session.next_shell
+            return self.session.next_shell or ""
+        if not ok and self.stop_on_error:
+            return ""
+        return shell_name
+
+    def run_lines(self, lines: Iterable[str]) -> int:
+        shell_name = "main"
+        start = time.time()
+        for raw in lines:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            shell_name = self.run_line(line, shell_name)
+            if not shell_name:
+                break
+
+        elapsed = time.time() - start
+        status = 1 if self.failed else 0
+        color = Colors.FAIL if status else Colors.OKGREEN
+        print(f"{color}[*] Script finished: {self.executed} command(s), "
+              f"{len(self.failed)} failed in {elapsed:.2f}s{Colors.ENDC}", file=sys.stderr)
+        for line in self.failed[:20]:
+            print(f"    {line}", file=sys.stderr)
+        return status
+
+    def run_file(self, path: str) -> int:
+        """Run a resource script from path ('-' reads stdin)."""
+        if path == "-":
+            return self.run_lines(sys.stdin)
+        try:
+            with open(path, "r") as f:
+                return self.run_lines(f)
+        except OSError as e:
+            log_error(f"Cannot read script '{path}': {e}")
+            return 1
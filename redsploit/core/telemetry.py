@@ -0,0 +1,340 @@
+import atexit
+import contextlib
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .colors import Colors, log_error
+from .storage import locked, read_json, write_json, write_text
+
+# Upper bounds (seconds) of the duration histogram buckets; +Inf is implicit
+BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+# Pending samples are merged into the stats file after this many top-level events or seconds
+DEFAULT_FLUSH_EVERY = 50
+DEFAULT_FLUSH_INTERVAL = 5.0
+LABEL_ESCAPE = re.compile(r'["\\\n]')
+
+
+def _escape(value) -> str:
+    """OpenMetrics label value escaping (backslash, double quote, newline)."""
+    return LABEL_ESCAPE.sub(lambda m: "\\n" if m.group() == "\n" else "\\" + m.group(), str(value))
+
+
+def _histogram() -> Dict:
+    return {"count": 0, "sum": 0.0, "buckets": [0] * (len(BUCKETS) + 1)}
+
+
+def _observe(hist: Dict, value: float) -> None:
+    hist["count"] += 1
+    hist["sum"] += value
+    for i, bound in enumerate(BUCKETS):
+        if value <= bound:
+            hist["buckets"][i] += 1
+            return
+    hist["buckets"][-1] += 1
+
+
+def quantile(hist: Dict, q: float) -> float:
+    """Approximate quantile from bucket counts (upper bound of the bucket holding it)."""
+    if not hist["count"]:
+        return 0.0
+    rank = q * hist["count"]
+    seen = 0
+    for i, count in enumerate(hist["buckets"]):
+        seen += count
+        if seen >= rank:
+            return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+    return float("inf")
+
+
+class RunSample:
+    """Timings of one tool launch, filled in by the runner."""
+
+    def __init__(self, tool: str, target: str) -> None:
+        self.tool = tool
+        self.target = target
+        self.start = time.monotonic()
+        self.admit = 0.0
+        self.spawn = 0.0
+        self.wall = 0.0
+        self.bytes = 0
+        self.returncode: Optional[int] = None
+        self._mark = self.start
+
+    def admitted(self) -> None:
+        now = time.monotonic()
+        self.admit, self._mark = now - self._mark, now
+
+    def spawned(self) -> None:
+        now = time.monotonic()
+        self.spawn, self._mark = now - self._mark, now
+
+
+class Telemetry:
+    """
+    Per-workspace timing telemetry (<workspace>_stats.json).
+
+    Shell commands are timed around onecmd (parse + dispatch), module command
+    building inside run_tool, and every launch in runner (admission wait,
+    spawn, wall time, exit code, output bytes). Samples are aggregated into
+    per-tool, per-target and per-command duration histograms and merged into
+    the stats file under its lock in batches: every flush_every top-level
+    commands/launches, after flush_interval seconds, before `stats` reads it,
+    on workspace switch and at exit. The file is replaced atomically but not
+    fsynced; losing the last batch in a crash is fine for timing data. If
+    telemetry.textfile is configured, the totals are also written there in
+    OpenMetrics text format for node_exporter.
+    """
+
+    def __init__(self, session) -> None:
+        self.session = session
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: List[Callable[[Dict], None]] = []
+        self._events = 0
+        self._flushed = time.monotonic()
+        atexit.register(self.flush)
+
+    @property
+    def config(self) -> Dict:
+        return self.session.config.get("telemetry", {}) or {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.get("enabled", True)
+
+    @property
+    def stats_file(self) -> str:
+        return os.path.join(self.session.workspace_dir, f"{self.session.get('workspace') or 'default'}_stats.json")
+
+    # Recording
+
+    @contextlib.contextmanager
+    def command(self, name: str, parse: float = 0.0) -> Iterator[None]:
+        """Time a shell command; nested commands (playbooks, scripts) are timed on their own."""
+        outer = getattr(self._local, "command", None)
+        self._local.command = name
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            wall = time.monotonic() - start
+            self._local.command = outer
+            if self.enabled:
+                self._add(lambda data: self._apply_command(data, name, wall, parse))
+                if outer is None:
+                    self._maybe_flush()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, tool: str = "") -> Iterator[None]:
+        """Time one phase (e.g. "build") of the current command, attributed to tool if given."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            if self.enabled and tool:
+                self._add(lambda data: self._apply_phase(data, tool, name, elapsed))
+                if getattr(self._local, "command", None) is None:
+                    self._maybe_flush()
+
+    @contextlib.contextmanager
+    def run(self, tool: str, target: str = "") -> Iterator[RunSample]:
+        """Context for one launch; the runner fills in the sample."""
+        sample = RunSample(tool, target)
+        try:
+            yield sample
+        finally:
+            sample.wall = time.monotonic() - sample.start - sample.admit
+            if self.enabled:
+                self._add(lambda data: self._apply_run(data, sample))
+                if getattr(self._local, "command", None) is None:
+                    self._maybe_flush()
+
+    def _add(self, op: Callable[[Dict], None]) -> None:
+        with self._lock:
+            self._pending.append(op)
+
+    def _maybe_flush(self) -> None:
+        """Flush once enough top-level events or time have accumulated."""
+        with self._lock:
+            self._events += 1
+            due = (self._events >= int(self.config.get("flush_every", DEFAULT_FLUSH_EVERY)) or
+                   time.monotonic() - self._flushed >= float(self.config.get("flush_interval", DEFAULT_FLUSH_INTERVAL)))
+        if due:
+            self.flush()
+
+    # Aggregation (ops replayed onto the stats file)
+
+    @staticmethod
+    def _tool(data: Dict, tool: str) -> Dict:
+        return data.setdefault("tools", {}).setdefault(tool, {
+            "runs": 0, "failures": 0, "wall": _histogram(), "admit": 0.0, "spawn": 0.0,
+            "bytes": 0, "exit_codes": {}})
+
+    @staticmethod
+    def _apply_phase(data: Dict, tool: str, name: str, elapsed: float) -> None:
+        entry = Telemetry._tool(data, tool).setdefault(name, {"sum": 0.0, "count": 0})
+        entry["sum"] += elapsed
+        entry["count"] += 1
+
+    @staticmethod
+    def _apply_run(data: Dict, sample: RunSample) -> None:
+        tool = Telemetry._tool(data, sample.tool)
+        tool["runs"] += 1
+        if sample.returncode != 0:
+            tool["failures"] += 1
+        _observe(tool["wall"], sample.wall)
+        tool["admit"] += sample.admit
+        tool["spawn"] += sample.spawn
+        tool["bytes"] += sample.bytes
+        code = "error" if sample.returncode is None else str(sample.returncode)
+        tool["exit_codes"][code] = tool["exit_codes"].get(code, 0) + 1
+        if sample.target:
+            target = data.setdefault("targets", {}).setdefault(sample.target, {
+                "runs": 0, "wall": _histogram(), "bytes": 0, "tools": {}})
+            target["runs"] += 1
+            _observe(target["wall"], sample.wall)
+            target["bytes"] += sample.bytes
+            target["tools"][sample.tool] = round(target["tools"].get(sample.tool, 0.0) + sample.wall, 3)
+
+    @staticmethod
+    def _apply_command(data: Dict, name: str, wall: float, parse: float) -> None:
+        command = data.setdefault("commands", {}).setdefault(name, {"wall": _histogram(), "parse": 0.0})
+        _observe(command["wall"], wall)
+        command["parse"] += parse
+
+    def flush(self) -> None:
+        """Merge pending samples into the stats file (and refresh the OpenMetrics textfile)."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._events, self._flushed = 0, time.monotonic()
+        if not pending:
+            return
+        try:
+            with locked(self.stats_file):
+                data = read_json(self.stats_file, {}) or {}
+                data.setdefault("since", time.strftime("%Y-%m-%d %H:%M:%S"))
+                for op in pending:
+                    op(data)
+                write_json(self.stats_file, data, indent=None, sync=False)
+        except Exception as e:
+            log_error(f"Failed to save stats: {e}")
+            return
+        if self.config.get("textfile"):
+            self.export(os.path.expanduser(self.config["textfile"]), data)
+
+    def load(self) -> Dict:
+        self.flush()
+        with locked(self.stats_file, shared=True):
+            return read_json(self.stats_file, {}) or {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending = []
+        with locked(self.stats_file):
+            write_json(self.stats_file, {}, indent=None)
+
+    # Output
+
+    def show(self, section: str = "tools") -> None:
+        data = self.load()
+        rows = data.get(section, {})
+        if not rows:
+            print("No stats recorded yet.")
+            return
+        print(f"\n{Colors.HEADER}Stats: {section} ({self.session.get('workspace')}, since {data.get('since', '?')}){Colors.ENDC}")
+        if section == "commands":
+            print(f"{'Command':<20} {'Count':>7} {'Total':>10} {'Mean':>9} {'p95':>8}")
+            print("-" * 60)
+            for name, entry in sorted(rows.items(), key=lambda kv: -kv[1]["wall"]["sum"]):
+                hist = entry["wall"]
+                print(f"{name[:20]:<20} {hist['count']:>7} {hist['sum']:>9.1f}s "
+                      f"{hist['sum'] / max(hist['count'], 1):>8.2f}s {self._fmt(quantile(hist, 0.95)):>8}")
+        else:
+            label = "Tool" if section == "tools" else "Target"
+            print(f"{label:<20} {'Runs':>6} {'Fail':>5} {'Total':>10} {'Mean':>9} {'p50':>7} {'p95':>7} "
+                  f"{'Build':>8} {'Spawn':>8} {'Output':>9}")
+            print("-" * 99)
+            for name, entry in sorted(rows.items(), key=lambda kv: -kv[1]["wall"]["sum"]):
+                hist = entry["wall"]
+                runs = max(entry["runs"], 1)
+                spawn = f"{entry['spawn'] / runs * 1000:.1f}ms" if "spawn" in entry else "-"
+                build = entry.get("build")
+                build = f"{build['sum'] / max(build['count'], 1) * 1000:.1f}ms" if build else "-"
+                print(f"{name[:20]:<20} {entry['runs']:>6} {entry.get('failures', 0) if section == 'tools' else '-':>5} "
+                      f"{hist['sum']:>9.1f}s {hist['sum'] / runs:>8.2f}s {self._fmt(quantile(hist, 0.5)):>7} "
+                      f"{self._fmt(quantile(hist, 0.95)):>7} {build:>8} {spawn:>8} {self._bytes(entry['bytes']):>9}")
+        print("")
+
+    @staticmethod
+    def _fmt(seconds: float) -> str:
+        if seconds == float("inf"):
+            return f">{BUCKETS[-1] // 60}m"
+        return f"<={seconds:g}s"
+
+    @staticmethod
+    def _bytes(count: int) -> str:
+        for unit in ("B", "K", "M", "G"):
+            if count < 1024:
+                return f"{count:.0f}{unit}"
+            count /= 1024
+        return f"{count:.0f}T"
+
+    def openmetrics(self, data: Optional[Dict] = None) -> str:
+        """Totals as OpenMetrics text (counters and histograms, labelled by workspace)."""
+        data = self.load() if data is None else data
+        ws = self.session.get("workspace") or "default"
+        lines: List[str] = []
+
+        def labels(**kv) -> str:
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in kv.items()) + "}"
+
+        def histogram(name: str, help_text: str, series: List[Tuple[Dict, Dict]]) -> None:
+            lines.append(f"# TYPE {name} histogram")
+            lines.append(f"# HELP {name} {help_text}")
+            for label_set, hist in series:
+                cumulative = 0
+                for bound, count in zip(list(BUCKETS) + ["+Inf"], hist["buckets"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{labels(**label_set, le=bound)} {cumulative}")
+                lines.append(f"{name}_count{labels(**label_set)} {hist['count']}")
+                lines.append(f"{name}_sum{labels(**label_set)} {hist['sum']:.6f}")
+
+        def counter(name: str, help_text: str, series: List[Tuple[Dict, float]]) -> None:
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"# HELP {name} {help_text}")
+            for label_set, value in series:
+                lines.append(f"{name}_total{labels(**label_set)} {value}")
+
+        tools = data.get("tools", {})
+        targets = data.get("targets", {})
+        commands = data.get("commands", {})
+        histogram("redsploit_tool_duration_seconds", "Wall time of tool runs.",
+                  [({"workspace": ws, "tool": t}, e["wall"]) for t, e in sorted(tools.items())])
+        counter("redsploit_tool_runs", "Tool runs by exit code.",
+                [({"workspace": ws, "tool": t, "code": c}, n) for t, e in sorted(tools.items())
+                 for c, n in sorted(e["exit_codes"].items())])
+        counter("redsploit_tool_output_bytes", "Output bytes captured from tools.",
+                [({"workspace": ws, "tool": t}, e["bytes"]) for t, e in sorted(tools.items())])
+        counter("redsploit_tool_spawn_seconds", "Time spent spawning tool processes.",
+                [({"workspace": ws, "tool": t}, round(e["spawn"], 6)) for t, e in sorted(tools.items())])
+        counter("redsploit_tool_admission_wait_seconds", "Time tools waited for rate-limit admission.",
+                [({"workspace": ws, "tool": t}, round(e["admit"], 6)) for t, e in sorted(tools.items())])
+        histogram("redsploit_target_duration_seconds", "Wall time of tool runs per target.",
+                  [({"workspace": ws, "target": t}, e["wall"]) for t, e in sorted(targets.items())])
+        histogram("redsploit_command_duration_seconds", "Wall time of shell commands.",
+                  [({"workspace": ws, "command": c}, e["wall"]) for c, e in sorted(commands.items())])
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str, data: Optional[Dict] = None) -> bool:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # Atomic rename: the textfile collector must never read a partial file
+            write_text(path, self.openmetrics(data))
+            return True
+        except OSError as e:
+            log_error(f"Failed to write metrics to {path}: {e}")
+            return False
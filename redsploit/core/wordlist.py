@@ -0,0 +1,305 @@
+import glob
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import urllib.request
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .colors import log_warn
+
+WORDLIST_KINDS = ("dir", "vhost", "dns")
+# Kinds built from host labels rather than paths
+HOST_KINDS = ("vhost", "dns")
+
+URL_RE = re.compile(r"https?://[^\s\"'<>()\[\]]+")
+# gobuster dir: "/admin (Status: 301) ...", dirsearch: "200 -  1KB - /admin"
+PATH_RE = re.compile(r"(?:^|\s)(/[A-Za-z0-9._~%!$&'*+,;=:@/-]*)")
+# ffuf: "admin   [Status: 200, Size: ...]"
+FFUF_RE = re.compile(r"^(?P<word>\S+)\s+\[Status: \d+")
+HREF_RE = re.compile(r"""(?:href|src|action)\s*=\s*["']([^"'#?]+)""", re.IGNORECASE)
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9_-]{2,24}")
+TAG_RE = re.compile(r"<[^>]*>|&\w+;")
+HOST_RE = re.compile(r"^(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,}$")
+SEGMENT_RE = re.compile(r"^[A-Za-z0-9._~-]{1,64}$")
+
+DEFAULT_EXTENSIONS = [".php", ".html", ".txt", ".bak", ".old", ".zip"]
+DEFAULT_AFFIXES = ["dev", "test", "staging", "admin", "api", "internal"]
+FETCH_BYTES = 2 * 1024 * 1024
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter (bytearray bit set, double hashing over one
+    blake2b digest). No false negatives; false positives at roughly
+    error_rate once capacity items have been added.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode("utf-8", "surrogateescape"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> bool:
+        """Add item; True if it was (possibly) present already."""
+        present = True
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p // 8] & (1 << (p % 8)) for p in self._positions(item))
+
+
+class DiskSet:
+    """Exact string set in a temporary SQLite file."""
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        fd, self.path = tempfile.mkstemp(prefix="redsploit-set-", suffix=".db", dir=directory)
+        os.close(fd)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("CREATE TABLE seen (item TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add(self, item: str) -> bool:
+        """Add item; True if it was new."""
+        return self.conn.execute("INSERT OR IGNORE INTO seen VALUES (?)", (item,)).rowcount == 1
+
+    def close(self) -> None:
+        self.conn.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class Deduper:
+    """
+    Streaming exact dedup: the Bloom filter answers "definitely new" in
+    memory for almost every candidate, and only its positives (real
+    duplicates or rare false positives) are checked against the disk set.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, directory: Optional[str] = None) -> None:
+        self.bloom = BloomFilter(capacity)
+        self.disk = DiskSet(directory)
+        self.duplicates = 0
+
+    def is_new(self, item: str) -> bool:
+        if not self.bloom.add(item):
+            self.disk.add(item)
+            return True
+        if self.disk.add(item):
+            return True
+        self.duplicates += 1
+        return False
+
+    def filter(self, items: Iterable[str]) -> Iterator[str]:
+        for item in items:
+            if self.is_new(item):
+                yield item
+
+    def close(self) -> None:
+        self.disk.close()
+
+
+# Sources: each yields candidate words for one kind
+
+def path_words(path: str) -> Iterator[str]:
+    """A URL path as candidates: the relative path and each segment."""
+    path = path.split("?", 1)[0].split("#", 1)[0].strip("/")
+    if not path:
+        return
+    segments = [s for s in path.split("/") if SEGMENT_RE.match(s)]
+    if len(segments) > 1:
+        yield "/".join(segments)
+    yield from segments
+
+
+def host_labels(host: str, domain: str) -> Iterator[str]:
+    """Sub-labels of a host under the target domain (a.b.example.com -> a.b, a, b)."""
+    host = host.lower().rstrip(".")
+    domain = domain.lower()
+    if not domain or not host.endswith("." + domain):
+        return
+    prefix = host[:-len(domain) - 1]
+    yield prefix
+    if "." in prefix:
+        yield from prefix.split(".")
+
+
+def text_words(text: str, kind: str, domain: str, plain: bool = True) -> Iterator[str]:
+    """Candidates from free text: URLs, paths, hostnames, links and (with plain) every word."""
+    for url in URL_RE.findall(text):
+        rest = url.split("://", 1)[1]
+        host, _, path = rest.partition("/")
+        host = host.split(":")[0]
+        if kind in HOST_KINDS:
+            yield from host_labels(host, domain)
+        else:
+            yield from path_words(path)
+    if kind in HOST_KINDS:
+        for token in re.split(r"[\s,;\"'<>]+", text):
+            if HOST_RE.match(token):
+                yield from host_labels(token, domain)
+        return
+    for link in HREF_RE.findall(text):
+        if "://" not in link:
+            yield from path_words(link)
+    for line in text.splitlines():
+        m = FFUF_RE.match(line.strip())
+        if m and "/" not in m.group("word"):
+            yield m.group("word")
+        for path in PATH_RE.findall(line):
+            yield from path_words(path)
+    if plain:
+        for word in WORD_RE.findall(TAG_RE.sub(" ", text)):
+            yield word.lower()
+
+
+class WordlistBuilder:
+    """
+    Per-target wordlist from workspace artifacts.
+
+    Sources (job logs of earlier tool runs, inventory hostnames, loot
+    usernames, fetched pages, extra files) are generators; candidates are
+    deduplicated through a Deduper and written straight to the output file.
+    Mutations are applied afterwards by re-reading that file, so neither
+    pass holds the list in memory.
+    """
+
+    def __init__(self, session, kind: str = "dir", config: Optional[Dict] = None) -> None:
+        self.session = session
+        self.kind = kind
+        self.config = config or {}
+        self.domain, self.url, _ = session.resolve_target()
+        self.counts: Dict[str, int] = {}
+
+    def job_logs(self) -> Iterator[Tuple[str, str]]:
+        pattern = os.path.join(self.session.jobs.log_dir, "*.log")
+        for path in sorted(glob.glob(pattern)):
+            # Tool output: only URLs, paths and hostnames, not every word of it
+            yield from self.file_words(path, "jobs", plain=False)
+
+    def file_words(self, path: str, source: str, plain: bool = True) -> Iterator[Tuple[str, str]]:
+        try:
+            with open(os.path.expanduser(path), "r", errors="replace") as f:
+                for line in f:
+                    for word in text_words(line, self.kind, self.domain or "", plain):
+                        yield source, word
+        except OSError as e:
+            log_warn(f"Skipping {path}: {e}")
+
+    def inventory_words(self) -> Iterator[Tuple[str, str]]:
+        for host in self.session.inventory.hosts():
+            for name in host.get("hostnames", []):
+                if self.kind in HOST_KINDS:
+                    for label in host_labels(name, self.domain or ""):
+                        yield "inventory", label
+                else:
+                    yield "inventory", name.split(".")[0].lower()
+
+    def loot_words(self) -> Iterator[Tuple[str, str]]:
+        if self.kind != "dir":
+            return
+        for entry in self.session.loot.loot_data:
+            if entry.get("type") not in ("cred", "user", "hash"):
+                continue
+            user = entry.get("content", "").split(":", 1)[0].split("\\")[-1].split("@")[0]
+            if WORD_RE.fullmatch(user):
+                yield "loot", user.lower()
+                yield "loot", "~" + user.lower()
+
+    def fetched_words(self, limit: int) -> Iterator[Tuple[str, str]]:
+        """Fetch the target page and same-host links found on it (breadth-first, up to limit pages)."""
+        if not self.url:
+            return
+        queue, visited = [self.url + "/"], set()
+        while queue and len(visited) < limit:
+            url = queue.pop(0)
+            if url in visited:
+                continue
+            visited.add(url)
+            try:
+                request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    if "html" not in response.headers.get("Content-Type", "html"):
+                        continue
+                    text = response.read(FETCH_BYTES).decode("utf-8", errors="replace")
+            except Exception as e:
+                log_warn(f"Fetch failed for {url}: {e}")
+                continue
+            for link in HREF_RE.findall(text):
+                if "://" not in link and link.startswith("/") and not link.startswith("//"):
+                    queue.append(self.url + link)
+            for word in text_words(text, self.kind, self.domain or ""):
+                yield "pages", word
+
+    def mutations(self, word: str) -> Iterator[str]:
+        if self.kind in HOST_KINDS:
+            for affix in self.config.get("vhost_affixes", DEFAULT_AFFIXES):
+                if affix != word:
+                    yield f"{word}-{affix}"
+                    yield f"{affix}-{word}"
+            return
+        if "." in word.rsplit("/", 1)[-1]:
+            # Already has an extension: try backup copies
+            yield word + ".bak"
+            yield word + "~"
+            return
+        for ext in self.config.get("extensions", DEFAULT_EXTENSIONS):
+            yield word + ext
+
+    def build(self, out_path: str, fetch: int = 0, files: Optional[List[str]] = None,
+              mutate: bool = True) -> int:
+        """Write the list to out_path; returns the number of words written."""
+        sources = [self.job_logs(), self.inventory_words(), self.loot_words()]
+        if fetch:
+            sources.append(self.fetched_words(fetch))
+        for path in files or []:
+            sources.append(self.file_words(path, "files"))
+
+        deduper = Deduper(int(self.config.get("capacity", 1_000_000)), os.path.dirname(out_path))
+        written = 0
+        tmp = out_path + ".tmp"
+        try:
+            with open(tmp, "w") as out:
+                for source in sources:
+                    for name, word in source:
+                        word = word.strip()
+                        if not word or len(word) > 128 or not deduper.is_new(word):
+                            continue
+                        out.write(word + "\n")
+                        written += 1
+                        self.counts[name] = self.counts.get(name, 0) + 1
+            if mutate and written:
+                # Mutations are appended after the base words, which are read back from the same file
+                base_end = os.path.getsize(tmp)
+                with open(tmp, "rb") as base, open(tmp, "a") as out:
+                    while base.tell() < base_end:
+                        line = base.readline().decode("utf-8", errors="replace").rstrip("\n")
+                        for word in self.mutations(line):
+                            if deduper.is_new(word):
+                                out.write(word + "\n")
+                                written += 1
+                                self.counts["mutations"] = self.counts.get("mutations", 0) + 1
+            os.replace(tmp, out_path)
+        finally:
+            deduper.close()
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        self.counts["duplicates"] = deduper.duplicates
+        return written
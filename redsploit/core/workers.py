@@ -0,0 +1,361 @@
+import itertools
+import os
+import shlex
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from .colors import Colors, log_info, log_success, log_warn, log_error
+from .jobs import DONE, FAILED, KILLED
+from .parsers import collector_for
+from .storage import locked, read_json, write_json
+
+REGISTRY_PATH = "~/.redsploit/workers.json"
+LOCAL = "local"
+SSH_FAILURE = 255  # ssh's own exit code for connection/authentication errors
+DEFAULTS = {"retries": 2, "cooldown": 60, "connect_timeout": 10, "ssh_options": ""}
+REMOTE_DIR = ".redsploit-worker"
+
+
+class Worker:
+    """A registered attack box: an SSH destination (or "local") with a number of job slots."""
+
+    def __init__(self, name: str, dest: str, slots: int = 2, ssh_options: str = "") -> None:
+        self.name = name
+        self.dest = dest
+        self.slots = slots
+        self.ssh_options = ssh_options
+        self.active = 0
+        self.done = 0
+        self.failed = 0
+        self.down_until = 0.0
+        self.last_error = ""
+
+    @property
+    def up(self) -> bool:
+        return time.time() >= self.down_until
+
+    @property
+    def free(self) -> int:
+        return self.slots - self.active if self.up else 0
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "dest": self.dest, "slots": self.slots, "ssh_options": self.ssh_options}
+
+
+class WorkSpec:
+    """One fully formatted command to run on some worker, plus an optional file to upload first."""
+
+    def __init__(self, cmd: str, tool: str = "", target: str = "", name: str = "", upload: str = "") -> None:
+        self.cmd = cmd
+        self.tool = tool
+        self.target = target
+        self.name = name or tool or cmd.split()[0]
+        self.upload = upload
+        self.attempts = 0
+        self.tried: List[str] = []
+
+
+class WorkerPool:
+    """
+    Coordinator for distributed runs over SSH workers.
+
+    Specs are queued and handed to the worker with the most free slots;
+    each runs as a local background job whose command is the ssh call, so
+    remote output streams into the local job log, the tool parsers (loot,
+    inventory) and the telemetry like any other job. An ssh failure (exit
+    255: unreachable, auth) marks the worker down for `cooldown` seconds and
+    retries the spec on another worker, up to `retries` times. For a spec
+    with an upload (a shard), the file is copied to the worker first and
+    `{shard}` in the command becomes its remote path. Remote commands record
+    their session's PID so a killed or retried job is also stopped on the
+    worker, not just on the local ssh client.
+
+    Workers are registered once per operator (~/.redsploit/workers.json);
+    the destination "local" runs on this box without ssh, for testing.
+    """
+
+    def __init__(self, session, registry: str = REGISTRY_PATH) -> None:
+        self.session = session
+        self.registry = os.path.expanduser(registry)
+        self.workers: Dict[str, Worker] = {}
+        self._pending: Deque[WorkSpec] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._runs = itertools.count(1)
+        self.load()
+
+    @property
+    def config(self) -> Dict:
+        return dict(DEFAULTS, **(self.session.config.get("workers", {}) or {}))
+
+    # Registry
+
+    def load(self) -> None:
+        if not os.path.exists(self.registry):
+            return
+        with locked(self.registry, shared=True):
+            entries = read_json(self.registry, {}).get("workers", [])
+        for entry in entries:
+            worker = self.workers.get(entry["name"])
+            if worker:
+                worker.dest, worker.slots, worker.ssh_options = entry["dest"], entry["slots"], entry.get("ssh_options", "")
+            else:
+                self.workers[entry["name"]] = Worker(entry["name"], entry["dest"], entry["slots"],
+                                                     entry.get("ssh_options", ""))
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.registry), exist_ok=True)
+        with locked(self.registry):
+            write_json(self.registry, {"workers": [w.to_dict() for w in self.workers.values()]})
+
+    def add(self, name: str, dest: str, slots: int = 2, ssh_options: str = "") -> Worker:
+        worker = Worker(name, dest, slots, ssh_options)
+        with self._cond:
+            old = self.workers.get(name)
+            if old:
+                worker.active, worker.done, worker.failed = old.active, old.done, old.failed
+            self.workers[name] = worker
+            self._cond.notify_all()
+        self.save()
+        return worker
+
+    def remove(self, name: str) -> bool:
+        with self._cond:
+            if not self.workers.pop(name, None):
+                return False
+        self.save()
+        return True
+
+    # Commands
+
+    def _ssh(self, worker: Worker, extra: str = "") -> str:
+        options = f"-o BatchMode=yes -o ConnectTimeout={int(self.config['connect_timeout'])}"
+        for opts in (self.config["ssh_options"], worker.ssh_options, extra):
+            if opts:
+                options += f" {opts}"
+        return f"ssh {options} {shlex.quote(worker.dest)}"
+
+    def wrap(self, worker: Worker, cmd: str, pidfile: str = "") -> str:
+        """
+        The local command that runs cmd on the worker. With pidfile, the remote
+        command runs in its own session whose leader PID is written to pidfile,
+        so kill_remote can stop it: killing the local ssh client alone leaves
+        the remote tool running.
+        """
+        if worker.dest == LOCAL:
+            return f"sh -c {shlex.quote(cmd)}"
+        remote = f"sh -c {shlex.quote(cmd)}"
+        if pidfile:
+            leader = f"echo $$ > {shlex.quote(pidfile)}; exec sh -c {shlex.quote(cmd)}"
+            remote = (f"mkdir -p {REMOTE_DIR} && setsid -w sh -c {shlex.quote(leader)}; "
+                      f"rc=$?; rm -f {shlex.quote(pidfile)}; exit $rc")
+        # The remote login shell parses its argument once more, hence the double quoting
+        return f"{self._ssh(worker, '-n')} {shlex.quote(remote)}"
+
+    def kill_remote(self, worker: Worker, pidfile: str) -> bool:
+        """Terminate the process group recorded in pidfile on the worker. Best effort."""
+        script = (f"test -s {shlex.quote(pidfile)} && kill -TERM -$(cat {shlex.quote(pidfile)}); "
+                  f"rm -f {shlex.quote(pidfile)}")
+        try:
+            proc = subprocess.run(f"{self._ssh(worker, '-n')} {shlex.quote(script)}", shell=True,
+                                  capture_output=True, timeout=int(self.config["connect_timeout"]) + 5)
+            return proc.returncode == 0
+        except subprocess.TimeoutExpired:
+            return False
+
+    def upload(self, worker: Worker, path: str) -> str:
+        """Copy a file to the worker; returns its path there. Raises RuntimeError on failure."""
+        name = f"{os.getpid()}-{os.path.basename(path)}"
+        if worker.dest == LOCAL:
+            directory = os.path.expanduser(os.path.join("~", REMOTE_DIR))
+            os.makedirs(directory, exist_ok=True)
+            remote = os.path.join(directory, name)
+            cmd = f"cat > {shlex.quote(remote)}"
+        else:
+            remote = f"{REMOTE_DIR}/{name}"
+            cmd = f"{self._ssh(worker)} {shlex.quote(f'mkdir -p {REMOTE_DIR} && cat > {shlex.quote(remote)}')}"
+        with open(path, "rb") as f:
+            proc = subprocess.run(cmd, shell=True, stdin=f, capture_output=True, timeout=300)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.decode(errors="replace").strip() or f"exit {proc.returncode}")
+        return remote
+
+    def check(self, worker: Worker) -> Optional[float]:
+        """Round trip time of a no-op on the worker, None if it is unreachable (marks it down)."""
+        start = time.time()
+        try:
+            proc = subprocess.run(self.wrap(worker, "true"), shell=True, capture_output=True, text=True,
+                                  timeout=int(self.config["connect_timeout"]) + 5)
+            ok = proc.returncode == 0
+            error = proc.stderr.strip()
+        except subprocess.TimeoutExpired:
+            ok, error = False, "timeout"
+        if not ok:
+            self._mark_down(worker, error or "unreachable")
+            return None
+        worker.down_until = 0.0
+        worker.last_error = ""
+        return time.time() - start
+
+    def _mark_down(self, worker: Worker, error: str) -> None:
+        worker.down_until = time.time() + float(self.config["cooldown"])
+        worker.last_error = error.splitlines()[-1][:80] if error else ""
+        log_warn(f"Worker {worker.name} is down for {int(self.config['cooldown'])}s: {worker.last_error}")
+
+    # Dispatch
+
+    def submit(self, specs: List[WorkSpec]) -> None:
+        """Queue specs for the workers and make sure the dispatcher runs."""
+        if not self.workers:
+            log_error("No workers registered (see 'workers add').")
+            return
+        with self._cond:
+            self._pending.extend(specs)
+            self._ensure_dispatcher()
+
+    def _ensure_dispatcher(self) -> None:
+        # Called with self._cond held; the dispatcher clears _thread under it before exiting
+        self._cond.notify_all()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._dispatch, name="redsploit-workers", daemon=True)
+            self._thread.start()
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._pending) or any(w.active for w in self.workers.values())
+
+    def _pick(self, spec: WorkSpec) -> Optional[Worker]:
+        candidates = [w for w in self.workers.values() if w.free > 0]
+        if not candidates:
+            return None
+        # Most free slots first; a retry prefers workers it has not failed on
+        candidates.sort(key=lambda w: (w.name in spec.tried, -w.free, w.done + w.failed))
+        return candidates[0]
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                worker = None
+                while self._pending:
+                    worker = self._pick(self._pending[0])
+                    if worker:
+                        break
+                    if not any(w.up for w in self.workers.values()):
+                        # Everything is down: wake up when the first cooldown ends
+                        wake = min((w.down_until for w in self.workers.values()), default=time.time() + 1)
+                        self._cond.wait(max(wake - time.time(), 0.1))
+                    else:
+                        self._cond.wait(1.0)
+                if not self._pending:
+                    self._thread = None
+                    return
+                spec = self._pending.popleft()
+                worker.active += 1
+            threading.Thread(target=self._start, args=(worker, spec), name=f"worker-{worker.name}",
+                             daemon=True).start()
+
+    def _start(self, worker: Worker, spec: WorkSpec) -> None:
+        spec.attempts += 1
+        spec.tried.append(worker.name)
+        cmd = spec.cmd
+        if spec.upload:
+            try:
+                cmd = cmd.replace("{shard}", shlex.quote(self.upload(worker, spec.upload)))
+            except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+                self._finish(worker, spec, worker_failed=True, error=f"upload failed: {e}")
+                return
+        collector = collector_for(self.session, spec.tool, spec.target, quiet=True)
+        pidfile = "" if worker.dest == LOCAL else f"{REMOTE_DIR}/{os.getpid()}-{next(self._runs)}.pid"
+
+        def on_exit(job):
+            if collector:
+                collector.close()
+            worker_failed = job.status == FAILED and (job.returncode == SSH_FAILURE or job.returncode is None) \
+                and worker.dest != LOCAL
+            # A killed job or a dropped connection leaves the remote copy running: stop it
+            # before the spec is retried elsewhere
+            if pidfile and (job.status == KILLED or worker_failed):
+                if not self.kill_remote(worker, pidfile):
+                    log_warn(f"Could not stop {spec.name} on {worker.name}; it may still be running there")
+            self._finish(worker, spec, worker_failed=worker_failed, error=job.last_line, job=job)
+
+        job = self.session.jobs.submit(self.wrap(worker, cmd, pidfile), tool=spec.tool, target=spec.target,
+                                       name=f"{worker.name}:{spec.name}",
+                                       on_line=collector.feed if collector else None, on_exit=on_exit)
+        log_info(f"Job #{job.id} on {worker.name}: {cmd}")
+
+    def _finish(self, worker: Worker, spec: WorkSpec, worker_failed: bool, error: str = "", job=None) -> None:
+        with self._cond:
+            worker.active -= 1
+            if worker_failed:
+                worker.failed += 1
+            elif job and job.status == DONE:
+                worker.done += 1
+            self._cond.notify_all()
+        if not worker_failed:
+            if job and job.status == FAILED:
+                log_warn(f"Job #{job.id} on {worker.name} exited {job.returncode}")
+            elif job and job.status == DONE:
+                log_success(f"Job #{job.id} on {worker.name} done ({spec.name})")
+            return
+        self._mark_down(worker, error)
+        if spec.attempts > int(self.config["retries"]):
+            log_error(f"Giving up on {spec.name} after {spec.attempts} attempts: {spec.cmd}")
+            return
+        log_info(f"Retrying {spec.name} on another worker (attempt {spec.attempts + 1})")
+        with self._cond:
+            self._pending.appendleft(spec)
+            self._ensure_dispatcher()
+
+    def wait(self, poll: float = 0.5) -> None:
+        """Block until nothing is pending or running on any worker (Ctrl+C detaches)."""
+        try:
+            while self.busy:
+                time.sleep(poll)
+        except KeyboardInterrupt:
+            print("")
+            log_warn("Detached; remote jobs keep running (see 'jobs').")
+
+    # Shards
+
+    def shard_dir(self) -> str:
+        path = os.path.join(self.session.workspace_dir, f"{self.session.get('workspace') or 'default'}_shards")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def split(self, path: str, count: int) -> List[str]:
+        """Split a line file (targets, wordlist) into up to count shard files, round robin."""
+        with open(os.path.expanduser(path), "r", errors="replace") as f:
+            lines = [line for line in f if line.strip()]
+        count = max(min(count, len(lines)), 1)
+        base = os.path.join(self.shard_dir(), f"{int(time.time())}-{os.path.basename(path)}")
+        shards = []
+        for i in range(count):
+            shard = f"{base}.{i + 1}of{count}"
+            with open(shard, "w") as out:
+                out.writelines(lines[i::count])
+            shards.append(shard)
+        return shards
+
+    def shard_specs(self, template: str, shards: List[str], tool: str = "", target: str = "") -> List[WorkSpec]:
+        """One spec per shard file: {shard} in template becomes the uploaded file's path on the worker."""
+        return [WorkSpec(template, tool=tool, target=target, name=f"{tool or template.split()[0]}[{i + 1}/{len(shards)}]",
+                         upload=shard) for i, shard in enumerate(shards)]
+
+    def total_slots(self) -> int:
+        return sum(w.slots for w in self.workers.values() if w.up) or 1
+
+    def show(self) -> None:
+        if not self.workers:
+            print("No workers registered.")
+            return
+        print(f"\n{Colors.HEADER}Workers{Colors.ENDC} ({len(self._pending)} specs pending)")
+        print(f"{'Name':<14} {'State':<6} {'Slots':>5} {'Active':>6} {'Done':>5} {'Failed':>6}  {'Destination':<24} {'Last error'}")
+        print("-" * 96)
+        for worker in sorted(self.workers.values(), key=lambda w: w.name):
+            state = f"{Colors.OKGREEN}up    {Colors.ENDC}" if worker.up else f"{Colors.FAIL}down  {Colors.ENDC}"
+            print(f"{worker.name[:14]:<14} {state} {worker.slots:>5} {worker.active:>6} {worker.done:>5} "
+                  f"{worker.failed:>6}  {worker.dest[:24]:<24} {worker.last_error}")
+        print("")
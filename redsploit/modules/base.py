@@ -4,7 +4,9 @@ import sys
 import subprocess
 import readline
 from typing import Optional
-from ..core.colors import log_info, log_success, log_warn, Colors
+from ..core.colors import log_info, log_success, log_warn, log_error, Colors
+from ..core.runner import run_command, run_tee, stream_command, tee_available, RunLocally
+from ..core.parsers import collector_for
 
 class HelpExit(Exception):
     pass
@@ -32,7 +34,20 @@ class BaseModule:
             return None
         return target
 
-    def _exec(self, cmd: str, copy_only: bool = False, edit: bool = False, run: bool = True, preview: bool = False) -> None:
+    @staticmethod
+    def parse_queue_arg(args_list) -> Optional[int]:
+        """Queue priority from CLI args (-q [N]), None without -q."""
+        if "-q" not in args_list:
+            return None
+        i = args_list.index("-q")
+        if i + 1 < len(args_list) and args_list[i + 1].isdigit():
+            return int(args_list[i + 1])
+        from ..core.scheduler import DEFAULT_PRIORITY
+        return DEFAULT_PRIORITY
+
+    def _exec(self, cmd: str, copy_only: bool = False, edit: bool = False, run: bool = True, preview: bool = False,
+              tool: str = "", background: bool = False, interactive: bool = False,
+              queue: Optional[int] = None, remote: bool = False) -> None:
         if preview:
             print(f"{Colors.OKCYAN}{cmd}{Colors.ENDC}")
             return
@@ -49,18 +64,62 @@ class BaseModule:
         if copy_only:
             self._copy_to_clipboard(cmd)
         elif run:
+            domain, _, _ = self.session.resolve_target()
+            target = domain or self.session.get("target")
+
+            if remote:
+                from ..core.workers import WorkSpec
+                self.session.workers.submit([WorkSpec(cmd, tool=tool, target=target)])
+                return
+
+            if queue is not None:
+                entry = self.session.scheduler.add(cmd, tool=tool, target=target, priority=queue)
+                log_success(f"Queued #{entry['id']} at priority {queue}: {cmd}")
+                self.session.scheduler.poke()
+                return
+
+            # Tools with an output parser feed loot/inventory while they run
+            collector = None if interactive else collector_for(self.session, tool, target, quiet=background)
+
+            if background:
+                job = self.session.jobs.submit(cmd, tool=tool, target=target,
+                                               on_line=collector.feed if collector else None,
+                                               on_exit=(lambda job: collector.close()) if collector else None)
+                self.session.jobs.announce(job)
+                return
+            
+            if self.session.capture_output and interactive:
+                # Daemon mode: no terminal here, the client runs it
+                raise RunLocally(cmd)
+            
             log_info(f"Running: {cmd}")
             try:
-                # Use Popen to handle signals correctly for interactive tools
-                process = subprocess.Popen(cmd, shell=True)
-                while True:
+                if collector and not self.session.capture_output and tee_available():
+                    # Keep the terminal (colors, status keys); the parser reads a recorded copy
+                    try:
+                        self.session.last_returncode = run_tee(self.session, cmd, tool=tool, target=target,
+                                                               on_line=collector.feed)
+                    finally:
+                        collector.close()
+                        self._report_findings(collector)
+                elif self.session.capture_output or collector:
+                    # Stream the output (to the daemon client, or a terminal-less run) through the parser
+                    def on_line(line):
+                        print(line)
+                        if collector:
+                            collector.feed(line)
                     try:
-                        process.wait()
-                        break
-                    except KeyboardInterrupt:
-                        # Ignore Ctrl+C in parent, let child handle it.
-                        # If child exits, wait() returns. If child stays alive, we wait again.
-                        continue
+                        self.session.last_returncode = stream_command(self.session, cmd, tool=tool, target=target,
+                                                                      on_line=on_line)
+                    finally:
+                        if collector:
+                            collector.close()
+                            self._report_findings(collector)
+                else:
+                    # Admitted through the rate governor, then spawned attached to the terminal
+                    run_command(self.session, cmd, tool=tool, target=target)
+            except KeyboardInterrupt:
+                print("\nCancelled.")
             except Exception as e:
                 log_error(f"Execution failed: {e}")
         else:
@@ -68,6 +127,12 @@ class BaseModule:
             print(cmd)
             self._copy_to_clipboard(cmd)
 
+    def _report_findings(self, collector) -> None:
+        counts = collector.counts
+        if counts["loot"] or counts["service"]:
+            log_success(f"{collector.tool}: {counts['loot']} new loot entries, "
+                        f"{counts['service']} services recorded in inventory")
+
     def _get_input_with_prefill(self, initial_text: str) -> Optional[str]:
         """
         Get user input with pre-filled text using readline.
@@ -189,7 +189,7 @@ class FileShell(BaseShell):
 
     def do_download(self, arg):
         """Generate download command: download <filename> [tool]"""
-        arg, copy_only, edit, preview, _ = self.parse_common_options(arg)
+        arg, copy_only, edit, preview, _, _ = self.parse_common_options(arg)
         parts = arg.split()
         if not parts:
             log_error("Usage: download <filename> [tool]")
@@ -211,7 +211,7 @@ class FileShell(BaseShell):
 
     def do_base64(self, arg):
         """Base64 encode a file: base64 <filename>"""
-        arg, copy_only, edit, preview, _ = self.parse_common_options(arg)
+        arg, copy_only, edit, preview, _, _ = self.parse_common_options(arg)
         if not arg:
             log_error("Usage: base64 <filename>")
             return
@@ -223,7 +223,7 @@ class FileShell(BaseShell):
 
     def do_server(self, arg):
         """Start a server: server [http|smb]"""
-        arg, copy_only, edit, preview, _ = self.parse_common_options(arg)
+        arg, copy_only, edit, preview, _, _ = self.parse_common_options(arg)
         server_type = arg.strip() or "http"
         self.file_module.run_server(server_type, preview=preview)
 
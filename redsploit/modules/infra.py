@@ -1,5 +1,6 @@
 import shlex
 import os
+import glob
 from ..core.colors import log_info, log_warn, log_error
 from ..core.base_shell import BaseShell
 from .base import ArgumentParserNoExit, BaseModule, HelpExit
@@ -10,12 +11,15 @@ class InfraModule(BaseModule):
         "nmap": {
             "cmd": "nmap -sV -sC -Pn -v {config_flags} {target}",
             "category": "Scanners",
-            "requires": ["target"]
+            "requires": ["target"],
+            "rate_flag": "--max-rate {rate}",
+            "profile": "scanner"
         },
         "rustscan": {
-            "cmd": "rustscan -a {target} --ulimit 5000",
+            "cmd": "rustscan -a {target} --ulimit {ulimit}",
             "category": "Scanners",
-            "requires": ["target"]
+            "requires": ["target"],
+            "profile": "scanner"
         },
         "smbclient": {
             "cmd": "smbclient -L //{target}/ {auth}",
@@ -51,42 +55,49 @@ class InfraModule(BaseModule):
             "cmd": "lftp -u '{user},{password}' ftp://{target}",
             "category": "Remote Access",
             "requires": ["target"],
-            "auth_mode": "custom_ftp"
+            "auth_mode": "custom_ftp",
+            "interactive": True
         },
         "msf": {
             "cmd": "msfconsole -q -x \"use exploit/multi/handler; set payload {payload}; set LHOST {lhost}; set LPORT {lport}; run\"",
             "category": "Exploitation",
-            "requires": ["lport", "interface"]
+            "requires": ["lport", "interface"],
+            "interactive": True
         },
         "rdp": {
             "cmd": "xfreerdp3 /v:{target} +clipboard /dynamic-resolution /drive:share,. {auth}",
             "category": "Remote Access",
             "requires": ["target"],
-            "auth_mode": "rdp_flags" # /u /p
+            "auth_mode": "rdp_flags", # /u /p
+            "interactive": True
         },
         "ssh": {
             "cmd": "sshpass -p '{password}' ssh -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null {user}@{target}",
             "category": "Remote Access",
             "requires": ["target", "auth_mandatory"],
-            "auth_mode": "custom" # handled by template
+            "auth_mode": "custom", # handled by template
+            "interactive": True
         },
         "evil_winrm": {
             "cmd": "evil-winrm-py -i {target} {auth}",
             "category": "Remote Execution",
             "requires": ["target"],
-            "auth_mode": "u_p_flags"
+            "auth_mode": "u_p_flags",
+            "interactive": True
         },
         "psexec": {
             "cmd": "impacket-psexec {creds}@{target}",
             "category": "Remote Execution",
             "requires": ["target"],
-            "auth_mode": "impacket"
+            "auth_mode": "impacket",
+            "interactive": True
         },
         "wmiexec": {
             "cmd": "impacket-wmiexec {creds}@{target}",
             "category": "Remote Execution",
             "requires": ["target"],
-            "auth_mode": "impacket"
+            "auth_mode": "impacket",
+            "interactive": True
         },
         "secretsdump": {
             "cmd": "impacket-secretsdump {creds}@{target}",
@@ -104,11 +115,12 @@ class InfraModule(BaseModule):
     def __init__(self, session):
         super().__init__(session)
 
-    def run_tool(self, tool_name, copy_only=False, edit=False, preview=False, use_auth=False):
+    def build_command(self, tool_name, use_auth=False):
+        """Resolve the session into the tool's command line. Returns None (after logging why) if it can't be built."""
         tool = self.TOOLS.get(tool_name)
         if not tool:
             log_error(f"Tool {tool_name} not found.")
-            return
+            return None
 
         # Use unified resolution
         domain_resolved, url_resolved, port_resolved = self.session.resolve_target()
@@ -118,7 +130,7 @@ class InfraModule(BaseModule):
 
         if not target:
              log_warn("Target is not set. Use 'set TARGET <ip/domain>'")
-             return
+             return None
 
         # 1. Get Variables
         user = self.session.get("username")
@@ -131,14 +143,14 @@ class InfraModule(BaseModule):
         reqs = tool.get("requires", [])
         if "target" in reqs and not target:
             log_warn("Target is not set.")
-            return
+            return None
         if "domain" in reqs and not domain_resolved:
             log_warn("Domain is not set. (Try 'set domain ...')")
-            return
+            return None
         if "auth_mandatory" in reqs:
             if not use_auth or not (user and (password or hash_val)):
                  log_warn("Credentials required for this tool.")
-                 return
+                 return None
 
         # 3. Build Auth String
         auth_str = ""
@@ -200,9 +212,15 @@ class InfraModule(BaseModule):
                  "lport": shlex.quote(lport or "4444"),
                  "lhost": shlex.quote(get_ip_address(interface) or "0.0.0.0"),
                   "payload": "windows/meterpreter/reverse_tcp",  # Default payload
-                  "config_flags": config_flags
+                  "config_flags": config_flags,
+                  "ulimit": 5000
               }
              
+             # File descriptor budget follows the tool's resource profile
+             profile = self.session.resources.profile_for(tool_name)
+             if profile and profile.nofile:
+                 format_args["ulimit"] = profile.nofile
+             
              # Special case for FTP default anonymous
              if tool_name == "ftp":
                  if not use_auth:
@@ -214,13 +232,32 @@ class InfraModule(BaseModule):
              
              cmd = tool["cmd"].format(**format_args)
              
-             # Clean up double spaces
-             cmd = " ".join(cmd.split())
-             
-             self._exec(cmd, copy_only, edit, preview=preview)
+             # Apply the per-host request budget to tools that support a rate flag
+             if tool.get("rate_flag"):
+                 rate = self.session.governor.tool_rate(target, interface)
+                 if rate:
+                     cmd += " " + tool["rate_flag"].format(rate=rate)
              
+             # Clean up double spaces
+             return " ".join(cmd.split())
         except Exception as e:
             log_error(f"Error building command: {e}")
+            return None
+
+    def run_tool(self, tool_name, copy_only=False, edit=False, preview=False, use_auth=False, background=False,
+                 queue=None, remote=False):
+        with self.session.telemetry.phase("build", tool=tool_name):
+            cmd = self.build_command(tool_name, use_auth)
+        if not cmd:
+            return
+
+        tool = self.TOOLS[tool_name]
+        if (background or queue is not None or remote) and tool.get("interactive"):
+            log_warn(f"{tool_name} is interactive and cannot run in the background.")
+            background, queue, remote = False, None, False
+
+        self._exec(cmd, copy_only, edit, preview=preview, tool=tool_name, background=background,
+                   interactive=tool.get("interactive", False), queue=queue, remote=remote)
 
     # Legacy CLI run method
     def run(self, args_list):
@@ -271,7 +308,8 @@ class InfraModule(BaseModule):
                      # In interactive, use_auth logic relies on -auth flag.
                      # In CLI, if -U is provided, we assume we want to use them.
                      use_auth = has_creds # Auto-use credentials in CLI mode if set
-                     self.run_tool(tool_name, use_auth=use_auth)
+                     self.run_tool(tool_name, use_auth=use_auth, background="-b" in args_list,
+                                   queue=self.parse_queue_arg(args_list), remote="-remote" in args_list)
                      return
 
         log_warn("No valid tool flag found. Use interactive mode or specify -<toolname>")
@@ -297,6 +335,8 @@ class InfraShell(BaseShell):
             comp_func = self._create_complete_method()
             setattr(self, f"complete_{name}", comp_func)
 
+        self.COMMAND_CATEGORIES["spray"] = "Active Directory"
+
     def _create_do_method(self, tool_name):
         def do_tool(arg):
             """Run tool or configure it"""
@@ -306,8 +346,10 @@ class InfraShell(BaseShell):
                 return
             
             # Normal tool execution
-            _, copy_only, edit, preview, use_auth = self.parse_common_options(arg)
-            self.infra_module.run_tool(tool_name, copy_only, edit, preview, use_auth)
+            arg, queue = self.parse_queue_option(arg)
+            arg, remote = self.parse_remote_option(arg)
+            _, copy_only, edit, preview, use_auth, background = self.parse_common_options(arg)
+            self.infra_module.run_tool(tool_name, copy_only, edit, preview, use_auth, background, queue, remote)
         
         do_tool.__doc__ = f"Run {tool_name} or use '{tool_name} config' to configure"
         do_tool.__name__ = f"do_{tool_name}"
@@ -315,7 +357,7 @@ class InfraShell(BaseShell):
 
     def _create_complete_method(self):
         def complete_tool(text, line, begidx, endidx):
-            options = ["-c", "-e", "-p", "-auth"]
+            options = ["-c", "-e", "-p", "-auth", "-b"]
             if text:
                 return [o for o in options if o.startswith(text)]
             return options
@@ -328,6 +370,105 @@ class InfraShell(BaseShell):
             return [m for m in modules if m.startswith(text)]
         return modules
 
+    def do_spray(self, arg):
+        """
+        Lockout-aware credential spraying (users x secrets x targets) with netexec.
+        Usage: spray [-u users.txt] [-P passwords.txt] [-H hashes.txt] [-t targets] [options]
+
+        Options:
+            --loot           Add users/passwords/hashes from the loot locker
+            --pairs          Only try known user:secret pairs instead of the full matrix
+            --local-auth     Treat each host/user as a separate (local) account
+            -d <domain>      Domain for authentication (default: session domain)
+            --threshold N    Lockout threshold of the target policy
+            --window N       Lockout observation window in minutes
+            --workers N      Concurrent netexec workers
+            --protocol P     netexec protocol (smb, ldap, winrm, ...)
+            --stop           Stop after the first valid credential
+            -p               Preview the attempts without running them
+
+        Targets may be a file, comma separated hosts or CIDR ranges (default: session target).
+        Valid credentials are stored in the loot locker automatically.
+        """
+        from ..core.spray import SprayEngine, expand_targets, read_lines
+
+        spray_config = self.session.config.get("infra", {}).get("spray", {})
+        parser = ArgumentParserNoExit(prog="spray", add_help=False)
+        parser.add_argument("-u", "--users")
+        parser.add_argument("-P", "--passwords")
+        parser.add_argument("-H", "--hashes")
+        parser.add_argument("-t", "--targets")
+        parser.add_argument("-d", "--domain")
+        parser.add_argument("--loot", action="store_true")
+        parser.add_argument("--pairs", action="store_true")
+        parser.add_argument("--local-auth", action="store_true")
+        parser.add_argument("--threshold", type=int, default=spray_config.get("threshold", 5))
+        parser.add_argument("--window", type=int, default=spray_config.get("window", 30))
+        parser.add_argument("--safety", type=int, default=spray_config.get("safety", 1))
+        parser.add_argument("--workers", type=int, default=spray_config.get("workers", 8))
+        parser.add_argument("--protocol", default=spray_config.get("protocol", "smb"))
+        parser.add_argument("--stop", action="store_true")
+        parser.add_argument("-p", "--preview", action="store_true")
+
+        try:
+            args = parser.parse_args(shlex.split(arg))
+        except (ValueError, HelpExit) as e:
+            log_error(f"spray: {e}")
+            return
+
+        users, secrets, pairs = [], [], []
+        try:
+            if args.users:
+                users.extend(read_lines(args.users))
+            if args.passwords:
+                secrets.extend((p, False) for p in read_lines(args.passwords))
+            if args.hashes:
+                secrets.extend((h, True) for h in read_lines(args.hashes))
+        except OSError as e:
+            log_error(f"Failed to read wordlist: {e}")
+            return
+
+        if args.loot:
+            loot_users, loot_secrets, pairs = SprayEngine.secrets_from_loot(self.session.loot.loot_data)
+            users.extend(loot_users)
+            secrets.extend(loot_secrets)
+
+        # Fall back to the session credential
+        if not users and self.session.get("username"):
+            users.append(self.session.get("username"))
+        if not secrets:
+            if self.session.get("password"):
+                secrets.append((self.session.get("password"), False))
+            elif self.session.get("hash"):
+                secrets.append((self.session.get("hash"), True))
+
+        target_spec = args.targets or self.session.get("target")
+        if not target_spec:
+            log_warn("Target is not set. Use 'set TARGET <ip>' or 'spray -t <targets>'")
+            return
+        targets = expand_targets(target_spec)
+
+        engine = SprayEngine(
+            self.session,
+            threshold=args.threshold,
+            window=args.window,
+            safety=args.safety,
+            workers=args.workers,
+            local_auth=args.local_auth,
+            domain=args.domain if args.domain is not None else self.session.get("domain"),
+            protocol=args.protocol,
+            stop_on_success=args.stop,
+        )
+        engine.run(users, secrets, targets, pairs=pairs if args.pairs else None, dry_run=args.preview)
+
+    def complete_spray(self, text, line, begidx, endidx):
+        """Autocomplete spray options"""
+        options = ["-u", "-P", "-H", "-t", "-d", "--loot", "--pairs", "--local-auth", "--threshold",
+                   "--window", "--workers", "--protocol", "--stop", "-p"]
+        if text.startswith("-"):
+            return [o for o in options if o.startswith(text)]
+        return [f for f in glob.glob(os.path.expanduser(text) + '*')]
+
     def _handle_tool_config(self, tool_name, config_arg):
         """Handle configuration for a specific tool"""
         from ..core.colors import Colors, log_warn, log_error
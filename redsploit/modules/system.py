@@ -8,7 +8,8 @@ class SystemShell(BaseShell):
 
     def default(self, line):
         """Execute system commands directly"""
-        os.system(line)
+        status = os.system(line)
+        self.session.last_returncode = os.waitstatus_to_exitcode(status) if status != -1 else 1
 
     def emptyline(self):
         """Do nothing on empty line"""
@@ -1,3 +1,4 @@
+import glob
 import os
 import shlex
 from ..core.colors import log_info, log_error, log_warn
@@ -29,22 +30,26 @@ class WebModule(BaseModule):
         "dir_ffuf": {
             "cmd": "ffuf -u {url}/FUZZ -w {wordlist_dir} -mc 200,301,302,403",
             "category": "Directory Scanning",
-            "requires": ["url"]
+            "requires": ["url"],
+            "rate_flag": "-rate {rate}"
         },
         "vhost": {
             "cmd": "ffuf -u {url} -H 'Host:FUZZ.{domain}' -w {wordlist_vhost} -ic",
             "category": "Subdomain Discovery",
-            "requires": ["url", "domain"]
+            "requires": ["url", "domain"],
+            "rate_flag": "-rate {rate}"
         },
         "dir_ferox": {
             "cmd": "feroxbuster -u {url}",
             "category": "Directory Scanning",
-            "requires": ["url"]
+            "requires": ["url"],
+            "rate_flag": "--rate-limit {rate}"
         },
         "dir_dirsearch": {
             "cmd": "dirsearch -u {url}",
             "category": "Directory Scanning",
-            "requires": ["url"]
+            "requires": ["url"],
+            "rate_flag": "--max-rate {rate}"
         },
         "gobuster_dir": {
              "cmd": "gobuster dir -u {url} -w {wordlist_dir}",
@@ -54,7 +59,9 @@ class WebModule(BaseModule):
         "nuclei": {
             "cmd": "nuclei -u {url}",
             "category": "Vulnerability Scanning",
-            "requires": ["url"]
+            "requires": ["url"],
+            "rate_flag": "-rl {rate}",
+            "profile": "heavy"
         },
         "wpscan": {
             "cmd": "wpscan --url {url} --enumerate --api-token $WPSCAN_API",
@@ -84,37 +91,55 @@ class WebModule(BaseModule):
 
     # Remove legacy _get_domain_or_target
     
-    def run_tool(self, tool_name, copy_only=False, edit=False, preview=False):
+    def build_command(self, tool_name):
+        """Resolve the session into the tool's command line. Returns None (after logging why) if it can't be built."""
         tool = self.TOOLS.get(tool_name)
         if not tool:
             log_error(f"Tool {tool_name} not found.")
-            return
+            return None
 
         domain, url, port = self.session.resolve_target()
         
         reqs = tool.get("requires", [])
         if "domain" in reqs and not domain:
             log_warn("Target domain is not set. Use 'set TARGET <domain>'")
-            return
+            return None
         if "url" in reqs and not url:
             log_warn("Target URL is not set. Use 'set TARGET <url>'")
-            return
+            return None
 
+        # Session wordlists (e.g. from 'wordlist build <kind>') replace the configured list of their kind
         # Prepare formatting vars with QUOTING
         format_args = {
             "domain": shlex.quote(domain or ""),
             "url": shlex.quote(url or ""),
             "port": shlex.quote(port or ""),
-            "wordlist_dir": shlex.quote(self.wordlist_dir),
-            "wordlist_subdomain": shlex.quote(self.wordlist_subdomain),
-            "wordlist_vhost": shlex.quote(self.wordlist_vhost)
+            "wordlist_dir": shlex.quote(self.session.get("wordlist_dir") or self.wordlist_dir),
+            "wordlist_subdomain": shlex.quote(self.session.get("wordlist_dns") or self.wordlist_subdomain),
+            "wordlist_vhost": shlex.quote(self.session.get("wordlist_vhost") or self.wordlist_vhost)
         }
 
         try:
             cmd = tool["cmd"].format(**format_args)
-            self._exec(cmd, copy_only, edit, preview=preview)
+            
+            # Apply the per-host request budget to tools that support a rate flag
+            if tool.get("rate_flag"):
+                rate = self.session.governor.tool_rate(domain, self.session.get("interface"))
+                if rate:
+                    cmd += " " + tool["rate_flag"].format(rate=rate)
+            return cmd
         except Exception as e:
             log_error(f"Error building command: {e}")
+            return None
+
+    def run_tool(self, tool_name, copy_only=False, edit=False, preview=False, background=False, queue=None,
+                 remote=False):
+        with self.session.telemetry.phase("build", tool=tool_name):
+            cmd = self.build_command(tool_name)
+        if not cmd:
+            return
+        self._exec(cmd, copy_only, edit, preview=preview, tool=tool_name, background=background, queue=queue,
+                   remote=remote)
 
     # Legacy method for CLI
     # Legacy CLI run method
@@ -165,7 +190,8 @@ class WebModule(BaseModule):
                 tool_key = alias_map.get(tool_name, tool_name)
                 
                 if tool_key in self.TOOLS:
-                    self.run_tool(tool_key)
+                    self.run_tool(tool_key, background="-b" in args_list, queue=self.parse_queue_arg(args_list),
+                                  remote="-remote" in args_list)
                     return
         
         log_warn("No valid tool flag found. Use interactive mode.")
@@ -193,9 +219,11 @@ class WebShell(BaseShell):
     def _create_do_method(self, tool_name):
         def do_tool(arg):
             """Run tool"""
-            # Fix unpacking: expects 5 values now (use_auth was added but web doesn't use it yet)
-            _, copy_only, edit, preview, _ = self.parse_common_options(arg)
-            self.web_module.run_tool(tool_name, copy_only, edit, preview)
+            # Fix unpacking: expects 6 values now (use_auth was added but web doesn't use it yet)
+            arg, queue = self.parse_queue_option(arg)
+            arg, remote = self.parse_remote_option(arg)
+            _, copy_only, edit, preview, _, background = self.parse_common_options(arg)
+            self.web_module.run_tool(tool_name, copy_only, edit, preview, background, queue, remote)
         
         do_tool.__doc__ = f"Run {tool_name}"
         do_tool.__name__ = f"do_{tool_name}"
@@ -204,12 +232,97 @@ class WebShell(BaseShell):
     def _create_complete_method(self):
         def complete_tool(text, line, begidx, endidx):
             """Autocomplete flags"""
-            options = ["-c", "-e", "-p", "-copy", "-edit", "-preview"]
+            options = ["-c", "-e", "-p", "-b", "-copy", "-edit", "-preview"]
             if text:
                 return [o for o in options if o.startswith(text)]
             return options
         return complete_tool
 
+    def do_wordlist(self, arg):
+        """
+        Build a target-specific wordlist from workspace artifacts.
+        Usage:
+            wordlist build [dir|vhost|dns] [--fetch N] [-i file]... [-o file] [--no-mutate]
+            wordlist use [dir|vhost|dns] <file>
+            wordlist clear [dir|vhost|dns]
+
+        Sources: URLs/paths/hostnames in job logs, inventory hostnames, loot
+        usernames, pages fetched from the target (--fetch N pages) and extra
+        files (-i, e.g. crawler output or saved HTML). The built list is set
+        as the session variable of its kind (wordlist_dir, wordlist_vhost or
+        wordlist_dns), which replaces the configured list of that kind only:
+        dir for dir_ffuf/gobuster_dir/..., vhost for vhost, dns for the DNS
+        brute-forcers.
+        """
+        from ..core.wordlist import WordlistBuilder, WORDLIST_KINDS, HOST_KINDS
+
+        parser = ArgumentParserNoExit(prog="wordlist", add_help=False)
+        parser.add_argument("action", nargs="?", default="build", choices=["build", "use", "clear"])
+        parser.add_argument("values", nargs="*")
+        parser.add_argument("--fetch", type=int, default=0)
+        parser.add_argument("-i", "--input", action="append", default=[])
+        parser.add_argument("-o", "--output")
+        parser.add_argument("--no-mutate", action="store_true")
+        try:
+            args = parser.parse_args(shlex.split(arg))
+        except (ValueError, HelpExit) as e:
+            log_error(f"wordlist: {e}")
+            return
+
+        values = list(args.values)
+        kind = values.pop(0) if values and values[0] in WORDLIST_KINDS else "dir"
+        if args.action == "clear":
+            if values:
+                log_error("Usage: wordlist clear [dir|vhost|dns]")
+                return
+            for name in ([kind] if args.values else WORDLIST_KINDS):
+                self.session.set(f"wordlist_{name}", "")
+            return
+        if args.action == "use":
+            if len(values) != 1 or not os.path.isfile(os.path.expanduser(values[0])):
+                log_error("Usage: wordlist use [dir|vhost|dns] <existing file>")
+                return
+            self.session.set(f"wordlist_{kind}", os.path.expanduser(values[0]))
+            return
+
+        if values:
+            log_error(f"Unknown wordlist kind '{values[0]}'. Choose from: {', '.join(WORDLIST_KINDS)}")
+            return
+        builder = WordlistBuilder(self.session, kind, self.session.config.get("web", {}).get("wordgen", {}))
+        if kind in HOST_KINDS and not builder.domain:
+            log_warn("Target domain is not set. Use 'set TARGET <domain>'")
+            return
+        out_path = os.path.expanduser(args.output) if args.output else os.path.join(
+            self.session.workspace_dir, f"{self.session.get('workspace') or 'default'}_wordlists",
+            f"{builder.domain or 'target'}-{kind}.txt")
+        os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+
+        log_info(f"Building {kind} wordlist for {builder.domain or 'workspace'}...")
+        try:
+            written = builder.build(out_path, fetch=args.fetch, files=args.input, mutate=not args.no_mutate)
+        except OSError as e:
+            log_error(f"wordlist: {e}")
+            return
+        if not written:
+            log_warn("No candidates found (run some scans first, or use --fetch / -i).")
+            return
+        summary = ", ".join(f"{k}: {v}" for k, v in builder.counts.items())
+        log_info(f"{written} words -> {out_path} ({summary})")
+        self.session.set(f"wordlist_{kind}", out_path)
+
+    def complete_wordlist(self, text, line, begidx, endidx):
+        """Autocomplete wordlist actions and files"""
+        parts = line.split()
+        if len(parts) == 1 or (len(parts) == 2 and not line.endswith(' ')):
+            return [c for c in ["build", "use", "clear"] if c.startswith(text)]
+        if parts[1] in ("build", "use", "clear") and (len(parts) == 2 or (len(parts) == 3 and not line.endswith(' '))):
+            kinds = [k for k in ["dir", "vhost", "dns"] if k.startswith(text)]
+            if parts[1] != "use" or kinds:
+                return kinds
+        if text.startswith("-"):
+            return [o for o in ["--fetch", "-i", "-o", "--no-mutate"] if o.startswith(text)]
+        return glob.glob(os.path.expanduser(text) + "*")
+
     def complete_use(self, text, line, begidx, endidx):
         """Autocomplete module names for 'use' command, excluding loot and playbook"""
         modules = ["infra", "web", "file", "shell", "main"]